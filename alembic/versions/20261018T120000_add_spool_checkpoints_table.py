@@ -0,0 +1,32 @@
+"""add spool_checkpoints table
+
+Revision ID: 7c2e9d41a0b3
+Revises: 559105c435f6
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2e9d41a0b3"
+down_revision: Union[str, None] = "559105c435f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "spool_checkpoints",
+        sa.Column("spool_id", sa.String(length=36), nullable=False),
+        sa.Column("last_seq", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("spool_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("spool_checkpoints")
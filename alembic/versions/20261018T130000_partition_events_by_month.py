@@ -0,0 +1,188 @@
+"""partition events and payloads by month
+
+Revision ID: a4d8e2f61c95
+Revises: 7c2e9d41a0b3
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4d8e2f61c95"
+down_revision: Union[str, None] = "7c2e9d41a0b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Сколько месяцев вперёд создать сразу; дальше секции досоздаёт
+# задача maintain_event_partitions
+PREMAKE_MONTHS = 3
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_month_partitions(first_month: date, last_month: date) -> None:
+    month = first_month
+    while month <= last_month:
+        bounds = (
+            f"FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        for table in ("events", "payloads"):
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES {bounds}"
+            )
+        month = _add_months(month, 1)
+
+
+def upgrade() -> None:
+    # Секционирование есть только в PostgreSQL; на остальных СУБД payloads
+    # лишь получает копию trigger_time, чтобы схема совпадала с моделями
+    if op.get_bind().dialect.name != "postgresql":
+        op.add_column(
+            "payloads", sa.Column("trigger_time", sa.DateTime(), nullable=True)
+        )
+        op.execute(
+            "UPDATE payloads SET trigger_time = "
+            "(SELECT events.trigger_time FROM events WHERE events.id = payloads.event_id)"
+        )
+        with op.batch_alter_table("payloads", schema=None) as batch_op:
+            batch_op.alter_column(
+                "trigger_time", existing_type=sa.DateTime(), nullable=False
+            )
+        return
+
+    # Старые таблицы освобождают имена индексов PK и владение sequence,
+    # новые секционированные таблицы продолжают те же sequence
+    op.execute("ALTER TABLE payloads RENAME TO payloads_legacy")
+    op.execute("ALTER TABLE events RENAME TO events_legacy")
+    op.execute("ALTER INDEX payloads_pkey RENAME TO payloads_legacy_pkey")
+    op.execute("ALTER INDEX events_pkey RENAME TO events_legacy_pkey")
+    op.execute("ALTER SEQUENCE payloads_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE events_id_seq OWNED BY NONE")
+
+    op.execute(
+        """
+        CREATE TABLE events (
+            id integer NOT NULL DEFAULT nextval('events_id_seq'::regclass),
+            client_id integer NOT NULL
+                REFERENCES client_ids (id) ON DELETE CASCADE ON UPDATE CASCADE,
+            event_type_id integer NOT NULL
+                REFERENCES event_types (id) ON DELETE CASCADE ON UPDATE CASCADE,
+            trigger_time timestamp without time zone NOT NULL,
+            CONSTRAINT events_pkey PRIMARY KEY (id, trigger_time)
+        ) PARTITION BY RANGE (trigger_time)
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE payloads (
+            id integer NOT NULL DEFAULT nextval('payloads_id_seq'::regclass),
+            event_id integer NOT NULL,
+            type_id integer NOT NULL
+                REFERENCES payload_types (id) ON DELETE CASCADE ON UPDATE CASCADE,
+            value varchar(50) NOT NULL,
+            trigger_time timestamp without time zone NOT NULL,
+            CONSTRAINT payloads_pkey PRIMARY KEY (id, trigger_time),
+            CONSTRAINT payloads_event_id_fkey FOREIGN KEY (event_id, trigger_time)
+                REFERENCES events (id, trigger_time) ON DELETE CASCADE ON UPDATE CASCADE
+        ) PARTITION BY RANGE (trigger_time)
+        """
+    )
+    op.execute("ALTER SEQUENCE events_id_seq OWNED BY events.id")
+    op.execute("ALTER SEQUENCE payloads_id_seq OWNED BY payloads.id")
+
+    # DEFAULT-секции ловят строки вне созданных месяцев, чтобы вставка
+    # не падала, если задача обслуживания секций отстала
+    op.execute("CREATE TABLE events_default PARTITION OF events DEFAULT")
+    op.execute("CREATE TABLE payloads_default PARTITION OF payloads DEFAULT")
+
+    current_month = date.today().replace(day=1)
+    first_month = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT date_trunc('month', min(trigger_time))::date FROM events_legacy"
+            )
+        )
+        .scalar()
+    )
+    _create_month_partitions(
+        min(first_month or current_month, current_month),
+        _add_months(current_month, PREMAKE_MONTHS),
+    )
+
+    op.execute(
+        "INSERT INTO events (id, client_id, event_type_id, trigger_time) "
+        "SELECT id, client_id, event_type_id, trigger_time FROM events_legacy"
+    )
+    op.execute(
+        "INSERT INTO payloads (id, event_id, type_id, value, trigger_time) "
+        "SELECT p.id, p.event_id, p.type_id, p.value, e.trigger_time "
+        "FROM payloads_legacy p JOIN events_legacy e ON e.id = p.event_id"
+    )
+    op.execute("DROP TABLE payloads_legacy")
+    op.execute("DROP TABLE events_legacy")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("ALTER TABLE payloads RENAME TO payloads_partitioned")
+        op.execute("ALTER TABLE events RENAME TO events_partitioned")
+        op.execute("ALTER INDEX payloads_pkey RENAME TO payloads_partitioned_pkey")
+        op.execute("ALTER INDEX events_pkey RENAME TO events_partitioned_pkey")
+        op.execute("ALTER SEQUENCE payloads_id_seq OWNED BY NONE")
+        op.execute("ALTER SEQUENCE events_id_seq OWNED BY NONE")
+
+        op.execute(
+            """
+            CREATE TABLE events (
+                id integer NOT NULL DEFAULT nextval('events_id_seq'::regclass),
+                client_id integer NOT NULL
+                    REFERENCES client_ids (id) ON DELETE CASCADE ON UPDATE CASCADE,
+                event_type_id integer NOT NULL
+                    REFERENCES event_types (id) ON DELETE CASCADE ON UPDATE CASCADE,
+                trigger_time timestamp without time zone NOT NULL,
+                CONSTRAINT events_pkey PRIMARY KEY (id)
+            )
+            """
+        )
+        op.execute(
+            """
+            CREATE TABLE payloads (
+                id integer NOT NULL DEFAULT nextval('payloads_id_seq'::regclass),
+                event_id integer NOT NULL
+                    REFERENCES events (id) ON DELETE CASCADE ON UPDATE CASCADE,
+                type_id integer NOT NULL
+                    REFERENCES payload_types (id) ON DELETE CASCADE ON UPDATE CASCADE,
+                value varchar(50) NOT NULL,
+                CONSTRAINT payloads_pkey PRIMARY KEY (id)
+            )
+            """
+        )
+        op.execute("ALTER SEQUENCE events_id_seq OWNED BY events.id")
+        op.execute("ALTER SEQUENCE payloads_id_seq OWNED BY payloads.id")
+
+        op.execute(
+            "INSERT INTO events (id, client_id, event_type_id, trigger_time) "
+            "SELECT id, client_id, event_type_id, trigger_time FROM events_partitioned"
+        )
+        op.execute(
+            "INSERT INTO payloads (id, event_id, type_id, value) "
+            "SELECT id, event_id, type_id, value FROM payloads_partitioned"
+        )
+        # Секции удаляются вместе с родительскими таблицами
+        op.execute("DROP TABLE payloads_partitioned")
+        op.execute("DROP TABLE events_partitioned")
+        return
+
+    with op.batch_alter_table("payloads", schema=None) as batch_op:
+        batch_op.drop_column("trigger_time")
@@ -0,0 +1,54 @@
+"""add analytics indexes on events and payloads
+
+Revision ID: 3f1b7c9e5d20
+Revises: a4d8e2f61c95
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1b7c9e5d20"
+down_revision: Union[str, None] = "a4d8e2f61c95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # На секционированных таблицах PostgreSQL индекс родителя создаётся
+    # и на всех секциях, в том числе будущих
+    op.create_index(
+        "ix_events_trigger_time",
+        "events",
+        ["trigger_time"],
+        unique=False,
+        postgresql_include=["client_id"],
+    )
+    op.create_index(
+        "ix_events_event_type_id_trigger_time",
+        "events",
+        ["event_type_id", "trigger_time"],
+        unique=False,
+        postgresql_include=["client_id"],
+    )
+    op.create_index("ix_events_client_id", "events", ["client_id"], unique=False)
+    op.create_index("ix_payloads_event_id", "payloads", ["event_id"], unique=False)
+    op.create_index(
+        "ix_payloads_type_id_value",
+        "payloads",
+        ["type_id", "value"],
+        unique=False,
+        postgresql_include=["event_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payloads_type_id_value", table_name="payloads")
+    op.drop_index("ix_payloads_event_id", table_name="payloads")
+    op.drop_index("ix_events_client_id", table_name="events")
+    op.drop_index("ix_events_event_type_id_trigger_time", table_name="events")
+    op.drop_index("ix_events_trigger_time", table_name="events")
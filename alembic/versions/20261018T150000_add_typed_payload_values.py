@@ -0,0 +1,47 @@
+"""add typed payload value columns
+
+Revision ID: 8e6a2d4b1f07
+Revises: 3f1b7c9e5d20
+Create Date: 2026-10-18 15:00:00.000000
+
+Существующие пэйлоады заполняются командой `stat-api db backfill-payload-values`.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e6a2d4b1f07"
+down_revision: Union[str, None] = "3f1b7c9e5d20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("payloads", sa.Column("value_int", sa.BigInteger(), nullable=True))
+    op.add_column("payloads", sa.Column("value_bool", sa.Boolean(), nullable=True))
+    op.create_index(
+        "ix_payloads_type_id_value_int",
+        "payloads",
+        ["type_id", "value_int"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_payloads_type_id_value_bool",
+        "payloads",
+        ["type_id", "value_bool"],
+        unique=False,
+        postgresql_include=["event_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payloads_type_id_value_bool", table_name="payloads")
+    op.drop_index("ix_payloads_type_id_value_int", table_name="payloads")
+    with op.batch_alter_table("payloads", schema=None) as batch_op:
+        batch_op.drop_column("value_bool")
+        batch_op.drop_column("value_int")
@@ -0,0 +1,46 @@
+"""add daily event rollup
+
+Revision ID: 5b9c3e7a2d14
+Revises: 8e6a2d4b1f07
+Create Date: 2026-10-18 16:00:00.000000
+
+Сводка заполняется задачей refresh_stats_rollup, начиная с самого раннего дня событий.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b9c3e7a2d14"
+down_revision: Union[str, None] = "8e6a2d4b1f07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_event_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("event_type_id", sa.Integer(), nullable=False),
+        sa.Column("visits", sa.BigInteger(), nullable=False),
+        sa.Column("visitors", sa.Integer(), nullable=False),
+        sa.Column("new_visitors", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "event_type_id"),
+    )
+    op.create_table(
+        "stats_rollup_state",
+        sa.Column("name", sa.String(length=20), nullable=False),
+        sa.Column("rolled_until", sa.Date(), nullable=False),
+        sa.Column("last_event_id", sa.BigInteger(), nullable=False),
+        sa.Column("seen_event_id", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("stats_rollup_state")
+    op.drop_table("daily_event_stats")
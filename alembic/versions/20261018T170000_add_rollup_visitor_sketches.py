@@ -0,0 +1,44 @@
+"""add hyperloglog sketches to daily event stats
+
+Revision ID: c71e4a9d3b58
+Revises: 5b9c3e7a2d14
+Create Date: 2026-10-18 17:00:00.000000
+
+Сводка сбрасывается и заново строится задачей refresh_stats_rollup уже со скетчами.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c71e4a9d3b58"
+down_revision: Union[str, None] = "5b9c3e7a2d14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SKETCH_COLUMNS = (
+    "visitors_sketch",
+    "new_on_day_sketch",
+    "new_in_month_sketch",
+    "new_in_year_sketch",
+)
+
+
+def upgrade() -> None:
+    for name in SKETCH_COLUMNS:
+        op.add_column(
+            "daily_event_stats", sa.Column(name, sa.LargeBinary(), nullable=True)
+        )
+    # Без строки состояния запросы идут по events, пока сводка не построена заново
+    op.execute("DELETE FROM stats_rollup_state")
+    op.execute("DELETE FROM daily_event_stats")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("daily_event_stats", schema=None) as batch_op:
+        for name in reversed(SKETCH_COLUMNS):
+            batch_op.drop_column(name)
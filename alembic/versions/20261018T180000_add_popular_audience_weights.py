@@ -0,0 +1,45 @@
+"""add popular audience weights
+
+Revision ID: 2d8f6b1c9e43
+Revises: c71e4a9d3b58
+Create Date: 2026-10-18 18:00:00.000000
+
+Рейтинг строится задачей refresh_popular_audiences при первом запуске.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2d8f6b1c9e43"
+down_revision: Union[str, None] = "c71e4a9d3b58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "popular_audience_weights",
+        sa.Column("auditory_id", sa.String(length=50), nullable=False),
+        sa.Column("total_weight", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("auditory_id"),
+    )
+    op.create_index(
+        "ix_popular_audience_weights_total_weight",
+        "popular_audience_weights",
+        ["total_weight"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM stats_rollup_state WHERE name = 'popular_audiences'")
+    op.drop_index(
+        "ix_popular_audience_weights_total_weight",
+        table_name="popular_audience_weights",
+    )
+    op.drop_table("popular_audience_weights")
@@ -0,0 +1,55 @@
+"""add client first seen day to events
+
+Revision ID: 5b3e9d7a1f62
+Revises: 2d8f6b1c9e43
+Create Date: 2026-10-18 19:00:00.000000
+
+Колонка у существующих событий остаётся NULL: статистика до заполнения
+берёт день из client_ids. Заполнение — `stat-api db backfill-client-first-seen`.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b3e9d7a1f62"
+down_revision: Union[str, None] = "2d8f6b1c9e43"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recreate_event_indexes(include: list[str]) -> None:
+    # INCLUDE индекса не меняется на месте; на секционированной таблице
+    # индекс родителя пересоздаётся и на всех секциях
+    op.drop_index("ix_events_event_type_id_trigger_time", table_name="events")
+    op.drop_index("ix_events_trigger_time", table_name="events")
+    op.create_index(
+        "ix_events_trigger_time",
+        "events",
+        ["trigger_time"],
+        unique=False,
+        postgresql_include=include,
+    )
+    op.create_index(
+        "ix_events_event_type_id_trigger_time",
+        "events",
+        ["event_type_id", "trigger_time"],
+        unique=False,
+        postgresql_include=include,
+    )
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("client_first_seen", sa.Date(), nullable=True))
+    if op.get_bind().dialect.name == "postgresql":
+        _recreate_event_indexes(["client_id", "client_first_seen"])
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        _recreate_event_indexes(["client_id"])
+    op.drop_column("events", "client_first_seen")
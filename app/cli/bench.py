@@ -0,0 +1,485 @@
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Annotated, Awaitable, Callable
+
+import typer
+from sqlalchemy import (
+    DateTime,
+    String,
+    case,
+    cast,
+    column,
+    delete,
+    literal_column,
+    distinct,
+    func,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import models
+from app.cli import CONFIG_ENV_NOTE
+from app.config import load_settings
+from app.database import (
+    close_database,
+    get_session_maker,
+    init_database,
+    is_postgresql,
+)
+from app.handlers.event import (
+    InsertMethod,
+    PendingEvent,
+    get_event_schemas,
+    insert_events,
+)
+from app.handlers.period import PERIOD_PREFIX_LENGTHS, period_bucket
+
+bench_cli = typer.Typer(
+    name="bench",
+    help=f"⏱️ Замеры задержек горячих путей на реальной БД.{CONFIG_ENV_NOTE}",
+    add_completion=False,
+    no_args_is_help=True,
+)
+
+
+def _report(name: str, samples_ms: list[float]) -> None:
+    """Печатает p50/p95/p99 и среднее по замерам в миллисекундах."""
+    if len(samples_ms) < 2:
+        typer.echo(f"{name:<24} недостаточно замеров")
+        return
+    q = statistics.quantiles(samples_ms, n=100, method="inclusive")
+    typer.echo(
+        f"{name:<24} n={len(samples_ms):<6} "
+        f"p50={q[49]:8.3f}ms  p95={q[94]:8.3f}ms  p99={q[98]:8.3f}ms  "
+        f"mean={statistics.fmean(samples_ms):8.3f}ms"
+    )
+
+
+async def _measure(iterations: int, call: Callable[[], Awaitable[None]]) -> list[float]:
+    samples: list[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def _delete_events(
+    session_maker: async_sessionmaker[AsyncSession], event_ids: list[int]
+) -> None:
+    chunk = 5_000
+    async with session_maker.begin() as db:
+        for start in range(0, len(event_ids), chunk):
+            ids = event_ids[start : start + chunk]
+            await db.execute(
+                delete(models.Payload).where(models.Payload.event_id.in_(ids))
+            )
+            await db.execute(delete(models.Event).where(models.Event.id.in_(ids)))
+
+
+async def _bench_event_insert(iterations: int, batch_size: int, keep: bool) -> None:
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        client = (
+            await db.execute(
+                select(models.ClientId.id, models.ClientId.creation_date).limit(1)
+            )
+        ).one_or_none()
+        schemas = await get_event_schemas(db)
+        postgresql = is_postgresql(db)
+
+    event_type_id, allowed = next(
+        ((et_id, allowed) for et_id, allowed in schemas.items() if allowed),
+        (None, {}),
+    )
+    if client is None or event_type_id is None:
+        typer.echo("❌ В БД нет клиентов или типов событий с разрешёнными пэйлоадами")
+        raise typer.Exit(1)
+
+    sample_values = {"int": "1", "bool": "true"}
+    payloads = [
+        (payload_type_id, sample_values.get(data_type, "bench"))
+        for payload_type_id, data_type in allowed.items()
+    ]
+
+    paths: dict[str, InsertMethod] = {"orm (2 INSERT)": "orm"}
+    if postgresql:
+        paths["single statement (CTE)"] = "statement"
+        paths["copy"] = "copy"
+    else:
+        typer.echo("ℹ️ Не PostgreSQL: замеряется только ORM-путь")
+
+    typer.echo(
+        f"event_type_id={event_type_id}, payloads/event={len(payloads)}, "
+        f"batch={batch_size}, iterations={iterations}"
+    )
+    for name, method in paths.items():
+        inserted: list[int] = []
+
+        async def call() -> None:
+            events = [
+                # День создания клиента, как у ингеста из client_id_cache
+                PendingEvent(
+                    client_id=client.id,
+                    event_type_id=event_type_id,
+                    trigger_time=datetime.now(UTC),
+                    payloads=list(payloads),
+                    client_first_seen=client.creation_date.date(),
+                )
+                for _ in range(batch_size)
+            ]
+            async with session_maker() as db:
+                inserted.extend(await insert_events(db, events, method=method))
+
+        # Прогрев: соединение в пуле и подготовленные выражения
+        await _measure(min(10, iterations), call)
+        _report(name, await _measure(iterations, call))
+
+        if not keep:
+            await _delete_events(session_maker, inserted)
+
+
+@bench_cli.command(name="event-insert", help="📥 Задержка записи события с пэйлоадами")
+def event_insert_command(
+    iterations: Annotated[int, typer.Option(help="Количество замеров")] = 500,
+    batch_size: Annotated[int, typer.Option(help="Событий в одной транзакции")] = 1,
+    keep: Annotated[
+        bool, typer.Option(help="Не удалять записанные бенчмарком события")
+    ] = False,
+) -> None:
+    """
+    Сравнивает p50/p99 записи событий через insert_events: ORM-путь
+    (INSERT событий + INSERT пэйлоадов) и, на PostgreSQL, CTE-запрос и COPY.
+    """
+    settings = load_settings()
+    init_database(settings)
+
+    async def _run():
+        try:
+            await _bench_event_insert(iterations, batch_size, keep)
+        finally:
+            await close_database()
+
+    asyncio.run(_run())
+
+
+_BENCH_TABLE = "bench_period_events"
+_BENCH_CLIENTS = 100_000
+_BENCH_DAYS = 365
+
+
+def _legacy_period_bucket(period_type: str, value):
+    # Прежняя группировка: префикс текстового представления момента
+    return func.substr(cast(value, String), 1, PERIOD_PREFIX_LENGTHS[period_type])
+
+
+def _strftime_period_bucket(period_type: str, value):
+    formats = {"day": "%Y-%m-%d", "month": "%Y-%m-01", "year": "%Y-01-01"}
+    return func.strftime(literal_column(f"'{formats[period_type]}'"), value)
+
+
+async def _create_bench_events(db: AsyncSession, rows: int, start: datetime) -> None:
+    """Временная таблица с rows синтетическими событиями за _BENCH_DAYS дней."""
+    params = {
+        "rows": rows,
+        "start": start,
+        "seconds": _BENCH_DAYS * 86_400,
+        "clients": _BENCH_CLIENTS,
+    }
+    if is_postgresql(db):
+        await db.execute(
+            text(
+                f"CREATE TEMP TABLE {_BENCH_TABLE} AS SELECT "
+                "CAST(:start AS timestamp) + random() * interval '1 second' * :seconds "
+                "AS trigger_time, "
+                "CAST(:start AS timestamp) + random() * interval '1 second' * :seconds "
+                "AS created_at, "
+                "floor(random() * :clients)::int + 1 AS client_id "
+                "FROM generate_series(1, :rows)"
+            ),
+            params,
+        )
+    else:
+        await db.execute(
+            text(
+                f"CREATE TEMP TABLE {_BENCH_TABLE} (trigger_time TIMESTAMP NOT NULL, "
+                "created_at TIMESTAMP NOT NULL, client_id INTEGER NOT NULL)"
+            )
+        )
+        await db.execute(
+            text(
+                "WITH RECURSIVE seq(n) AS "
+                "(SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows) "
+                f"INSERT INTO {_BENCH_TABLE} SELECT "
+                "datetime(:start, '+' || (abs(random()) % :seconds) || ' seconds'), "
+                "datetime(:start, '+' || (abs(random()) % :seconds) || ' seconds'), "
+                "abs(random()) % :clients + 1 FROM seq"
+            ),
+            {**params, "start": start.isoformat(sep=" ")},
+        )
+    await db.execute(
+        text(
+            f"CREATE INDEX ix_{_BENCH_TABLE}_trigger_time ON {_BENCH_TABLE} (trigger_time)"
+        )
+    )
+    await db.execute(text(f"ANALYZE {_BENCH_TABLE}"))
+
+
+def _bucketing_statement(
+    bucket: Callable, period_type: str, start: datetime, end: datetime
+):
+    events = table(
+        _BENCH_TABLE, column("trigger_time"), column("created_at"), column("client_id")
+    )
+    period = bucket(period_type, events.c.trigger_time).label("period")
+    new_visitor = case(
+        (bucket(period_type, events.c.created_at) == period, events.c.client_id),
+        else_=None,
+    )
+    return (
+        select(
+            period,
+            func.count().label("all_visits"),
+            func.count(distinct(events.c.client_id)).label("visitor_count"),
+            func.count(distinct(new_visitor)).label("unique_visitors"),
+        )
+        .where(events.c.trigger_time >= start)
+        .where(events.c.trigger_time < end)
+        .group_by(period)
+        .order_by(period)
+    )
+
+
+async def _bench_period_bucketing(rows: int, iterations: int) -> None:
+    end = datetime.combine(datetime.now(UTC).date(), datetime.min.time())
+    start = end - timedelta(days=_BENCH_DAYS)
+    async with get_session_maker()() as db:
+        postgresql = is_postgresql(db)
+        typer.echo(f"Генерация {rows} синтетических событий…")
+        started = time.perf_counter()
+        await _create_bench_events(db, rows, start)
+        typer.echo(f"Готово за {time.perf_counter() - started:.1f}s")
+
+        approaches: dict[str, Callable] = {
+            "substr(cast)": _legacy_period_bucket,
+            "date_trunc" if postgresql else "substr": lambda period_type, value: (
+                period_bucket(period_type, value, postgresql)
+            ),
+        }
+        if not postgresql:
+            approaches["strftime"] = _strftime_period_bucket
+        for period_type in ("day", "month", "year"):
+            results = {}
+            for name, bucket in approaches.items():
+                statement = _bucketing_statement(bucket, period_type, start, end)
+
+                async def call() -> None:
+                    results[name] = (await db.execute(statement)).all()
+
+                _report(f"{period_type}: {name}", await _measure(iterations, call))
+
+            # Подписи периодов у подходов разные, порядок и счётчики совпадают
+            counts = [[tuple(row[1:]) for row in result] for result in results.values()]
+            if any(item != counts[0] for item in counts[1:]):
+                typer.echo(f"⚠️ {period_type}: результаты подходов расходятся")
+        await db.rollback()
+
+
+@bench_cli.command(
+    name="period-bucketing",
+    help="📅 Группировка по периодам: substr(cast) и date_trunc/substr",
+)
+def period_bucketing_command(
+    rows: Annotated[
+        int, typer.Option(help="Синтетических событий", min=1)
+    ] = 10_000_000,
+    iterations: Annotated[int, typer.Option(help="Замеров на запрос", min=2)] = 5,
+) -> None:
+    """
+    Сравнивает запрос статистики по периодам с прежней группировкой
+    substr(cast(trigger_time)) и с period_bucket (app/handlers/period.py):
+    date_trunc на PostgreSQL, префикс строки без CAST на SQLite (там же
+    для сравнения замеряется strftime). События синтетические и лежат
+    во временной таблице: данные БД не затрагиваются.
+    """
+    settings = load_settings()
+    init_database(settings)
+
+    async def _run():
+        try:
+            await _bench_period_bucketing(rows, iterations)
+        finally:
+            await close_database()
+
+    asyncio.run(_run())
+
+
+_BENCH_CLIENTS_TABLE = "bench_first_seen_clients"
+
+
+async def _create_bench_first_seen(db: AsyncSession, start: datetime) -> None:
+    """
+    Временная таблица клиентов и их день создания в bench_period_events —
+    как events.client_first_seen.
+    """
+    params = {"start": start, "seconds": _BENCH_DAYS * 86_400}
+    if is_postgresql(db):
+        await db.execute(
+            text(
+                f"CREATE TEMP TABLE {_BENCH_CLIENTS_TABLE} AS SELECT g AS id, "
+                "CAST(:start AS timestamp) + random() * interval '1 second' * :seconds "
+                "AS creation_date "
+                "FROM generate_series(1, :clients) AS g"
+            ),
+            {**params, "clients": _BENCH_CLIENTS},
+        )
+    else:
+        await db.execute(
+            text(
+                f"CREATE TEMP TABLE {_BENCH_CLIENTS_TABLE} "
+                "(id INTEGER NOT NULL, creation_date TIMESTAMP NOT NULL)"
+            )
+        )
+        await db.execute(
+            text(
+                "WITH RECURSIVE seq(n) AS "
+                "(SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :clients) "
+                f"INSERT INTO {_BENCH_CLIENTS_TABLE} SELECT n, "
+                "datetime(:start, '+' || (abs(random()) % :seconds) || ' seconds') "
+                "FROM seq"
+            ),
+            {
+                **params,
+                "start": start.isoformat(sep=" "),
+                "clients": _BENCH_CLIENTS,
+            },
+        )
+    await db.execute(
+        text(f"ALTER TABLE {_BENCH_CLIENTS_TABLE} ADD PRIMARY KEY (id)")
+        if is_postgresql(db)
+        else text(
+            f"CREATE UNIQUE INDEX ix_{_BENCH_CLIENTS_TABLE}_id "
+            f"ON {_BENCH_CLIENTS_TABLE} (id)"
+        )
+    )
+    await db.execute(
+        text(f"ALTER TABLE {_BENCH_TABLE} ADD COLUMN client_first_seen DATE")
+    )
+    await db.execute(
+        text(
+            f"UPDATE {_BENCH_TABLE} SET client_first_seen = "
+            f"(SELECT date(c.creation_date) FROM {_BENCH_CLIENTS_TABLE} c "
+            f"WHERE c.id = {_BENCH_TABLE}.client_id)"
+        )
+    )
+    await db.execute(text(f"ANALYZE {_BENCH_CLIENTS_TABLE}"))
+    await db.execute(text(f"ANALYZE {_BENCH_TABLE}"))
+
+
+def _first_seen_statement(
+    period_type: str, start: datetime, end: datetime, joined: bool, postgresql: bool
+):
+    events = table(
+        _BENCH_TABLE,
+        column("trigger_time"),
+        column("client_id"),
+        column("client_first_seen"),
+    )
+    clients = table(_BENCH_CLIENTS_TABLE, column("id"), column("creation_date"))
+    period = period_bucket(period_type, events.c.trigger_time, postgresql).label(
+        "period"
+    )
+    if joined:
+        # Прежний подсчёт: день создания берётся из client_ids через JOIN
+        client_period = period_bucket(period_type, clients.c.creation_date, postgresql)
+    else:
+        first_seen = events.c.client_first_seen
+        if postgresql:
+            first_seen = cast(first_seen, DateTime)
+        client_period = period_bucket(period_type, first_seen, postgresql)
+    new_visitor = case((client_period == period, events.c.client_id), else_=None)
+    statement = select(
+        period,
+        func.count().label("all_visits"),
+        func.count(distinct(events.c.client_id)).label("visitor_count"),
+        func.count(distinct(new_visitor)).label("unique_visitors"),
+    )
+    if joined:
+        statement = statement.select_from(
+            events.join(clients, clients.c.id == events.c.client_id)
+        )
+    return (
+        statement.where(events.c.trigger_time >= start)
+        .where(events.c.trigger_time < end)
+        .group_by(period)
+        .order_by(period)
+    )
+
+
+async def _bench_first_seen(rows: int, iterations: int) -> None:
+    end = datetime.combine(datetime.now(UTC).date(), datetime.min.time())
+    start = end - timedelta(days=_BENCH_DAYS)
+    async with get_session_maker()() as db:
+        postgresql = is_postgresql(db)
+        typer.echo(
+            f"Генерация {rows} синтетических событий и {_BENCH_CLIENTS} клиентов…"
+        )
+        started = time.perf_counter()
+        await _create_bench_events(db, rows, start)
+        await _create_bench_first_seen(db, start)
+        typer.echo(f"Готово за {time.perf_counter() - started:.1f}s")
+
+        for period_type in ("day", "month", "year"):
+            results = {}
+            for name, joined in (
+                ("join client_ids", True),
+                ("client_first_seen", False),
+            ):
+                statement = _first_seen_statement(
+                    period_type, start, end, joined, postgresql
+                )
+
+                async def call() -> None:
+                    results[name] = (await db.execute(statement)).all()
+
+                _report(f"{period_type}: {name}", await _measure(iterations, call))
+
+            joined_rows, single_rows = results.values()
+            if [tuple(row) for row in joined_rows] != [
+                tuple(row) for row in single_rows
+            ]:
+                typer.echo(f"⚠️ {period_type}: результаты подходов расходятся")
+        await db.rollback()
+
+
+@bench_cli.command(
+    name="first-seen",
+    help="🆕 Новые посетители: JOIN client_ids и events.client_first_seen",
+)
+def first_seen_command(
+    rows: Annotated[
+        int, typer.Option(help="Синтетических событий", min=1)
+    ] = 10_000_000,
+    iterations: Annotated[int, typer.Option(help="Замеров на запрос", min=2)] = 5,
+) -> None:
+    """
+    Сравнивает запрос статистики по периодам, где новые посетители
+    считаются через соединение с таблицей клиентов, и тот же запрос по
+    одной таблице событий с днём создания клиента в строке события
+    (events.client_first_seen). События и клиенты синтетические и лежат
+    во временных таблицах: данные БД не затрагиваются.
+    """
+    settings = load_settings()
+    init_database(settings)
+
+    async def _run():
+        try:
+            await _bench_first_seen(rows, iterations)
+        finally:
+            await close_database()
+
+    asyncio.run(_run())
@@ -3,6 +3,11 @@ from app.cli import CONFIG_ENV_NOTE
 from app.cli.db.migrate import migrate_cli
 from app.cli.db.seed import seed_cli
 from app.cli.db.admin import create_admin_command
+from app.cli.db.backfill import (
+    backfill_client_first_seen_command,
+    backfill_payload_values_command,
+)
+from app.cli.db.explain import explain_command
 
 db_cli = typer.Typer(
     name="db",
@@ -18,3 +23,14 @@ db_cli.add_typer(seed_cli, name="seed")
 db_cli.command(name="create-admin", help="👤 Создание или обновление администратора")(
     create_admin_command
 )
+db_cli.command(
+    name="explain", help="🔍 Планы запросов аналитики и ингеста, поиск Seq Scan"
+)(explain_command)
+db_cli.command(
+    name="backfill-payload-values",
+    help="🔢 Заполнение value_int/value_bool у старых пэйлоадов",
+)(backfill_payload_values_command)
+db_cli.command(
+    name="backfill-client-first-seen",
+    help="📅 Заполнение дня создания клиента у старых событий",
+)(backfill_client_first_seen_command)
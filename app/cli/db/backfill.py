@@ -0,0 +1,182 @@
+import asyncio
+from typing import Annotated
+
+import typer
+from sqlalchemy import Date, bindparam, func, select, update
+
+from app import models
+from app.config import load_settings
+from app.database import close_database, get_session_maker, init_database
+from app.handlers.event import get_payload_value_types, typed_payload_value
+
+# Типы значений, у которых есть типизированная колонка
+TYPED_VALUE_TYPES = ("int", "bool")
+
+
+async def _backfill_payload_values(batch_size: int) -> int:
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        value_types = await get_payload_value_types(db)
+    typed_ids = [
+        type_id
+        for type_id, data_type in value_types.items()
+        if data_type in TYPED_VALUE_TYPES
+    ]
+    if not typed_ids:
+        return 0
+
+    payload = models.Payload.__table__
+    statement = (
+        update(payload)
+        .where(payload.c.id == bindparam("b_id"))
+        .where(payload.c.trigger_time == bindparam("b_trigger_time"))
+        .values(
+            value_int=bindparam("b_value_int"), value_bool=bindparam("b_value_bool")
+        )
+    )
+
+    updated = 0
+    last_id = 0
+    while True:
+        async with session_maker() as db:
+            rows = (
+                await db.execute(
+                    select(
+                        payload.c.id,
+                        payload.c.type_id,
+                        payload.c.value,
+                        payload.c.trigger_time,
+                    )
+                    .where(payload.c.id > last_id)
+                    .where(payload.c.type_id.in_(typed_ids))
+                    .where(payload.c.value_int.is_(None))
+                    .where(payload.c.value_bool.is_(None))
+                    .order_by(payload.c.id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                return updated
+
+            params = []
+            for row in rows:
+                value_int, value_bool = typed_payload_value(
+                    value_types[row.type_id], row.value
+                )
+                if value_int is None and value_bool is None:
+                    continue
+                params.append(
+                    {
+                        "b_id": row.id,
+                        "b_trigger_time": row.trigger_time,
+                        "b_value_int": value_int,
+                        "b_value_bool": value_bool,
+                    }
+                )
+            if params:
+                # Core-UPDATE по bindparam уходит одним executemany
+                await (await db.connection()).execute(statement, params)
+            await db.commit()
+
+        updated += len(params)
+        last_id = rows[-1].id
+        typer.echo(f"… обработано до id={last_id}, заполнено {updated}")
+
+
+def backfill_payload_values_command(
+    batch_size: Annotated[
+        int, typer.Option(help="Пэйлоадов в одной транзакции", min=1)
+    ] = 5_000,
+) -> None:
+    """
+    Заполняет value_int/value_bool у пэйлоадов, записанных до появления
+    типизированных колонок. Повторный запуск продолжает с незаполненных строк.
+    """
+    settings = load_settings()
+    init_database(settings)
+
+    async def _run() -> int:
+        try:
+            return await _backfill_payload_values(batch_size)
+        finally:
+            await close_database()
+
+    try:
+        updated = asyncio.run(_run())
+    except Exception as e:
+        typer.echo(f"💥 Ошибка: {e}")
+        raise typer.Exit(1)
+    typer.echo(f"✅ Заполнено типизированных значений: {updated}")
+
+
+async def _backfill_client_first_seen(batch_size: int) -> int:
+    session_maker = get_session_maker()
+    event = models.Event.__table__
+    client = models.ClientId.__table__
+    async with session_maker() as db:
+        bounds = (
+            await db.execute(
+                select(func.min(event.c.id), func.max(event.c.id)).where(
+                    event.c.client_first_seen.is_(None)
+                )
+            )
+        ).one()
+    if bounds[0] is None:
+        return 0
+    first_id, last_id = bounds
+
+    # У UPDATE в PostgreSQL нет LIMIT, поэтому события обходятся диапазонами
+    # id; строки не читаются в приложение, день берётся подзапросом
+    statement = (
+        update(event)
+        .where(event.c.id >= bindparam("b_from"))
+        .where(event.c.id < bindparam("b_to"))
+        .where(event.c.client_first_seen.is_(None))
+        .values(
+            client_first_seen=select(func.date(client.c.creation_date, type_=Date))
+            .where(client.c.id == event.c.client_id)
+            .scalar_subquery()
+        )
+    )
+
+    updated = 0
+    for batch_start in range(first_id, last_id + 1, batch_size):
+        async with session_maker() as db:
+            result = await db.execute(
+                statement, {"b_from": batch_start, "b_to": batch_start + batch_size}
+            )
+            await db.commit()
+        updated += result.rowcount
+        typer.echo(
+            f"… обработано до id={min(batch_start + batch_size - 1, last_id)}, "
+            f"заполнено {updated}"
+        )
+    return updated
+
+
+def backfill_client_first_seen_command(
+    batch_size: Annotated[
+        int, typer.Option(help="Диапазон id событий в одной транзакции", min=1)
+    ] = 50_000,
+) -> None:
+    """
+    Заполняет events.client_first_seen у событий, записанных до появления
+    колонки. До заполнения статистика берёт день создания клиента из
+    client_ids подзапросом на каждую такую строку. Повторный запуск
+    продолжает с незаполненных строк.
+    """
+    settings = load_settings()
+    init_database(settings)
+
+    async def _run() -> int:
+        try:
+            return await _backfill_client_first_seen(batch_size)
+        finally:
+            await close_database()
+
+    try:
+        updated = asyncio.run(_run())
+    except Exception as e:
+        typer.echo(f"💥 Ошибка: {e}")
+        raise typer.Exit(1)
+    typer.echo(f"✅ Заполнено дней первого визита: {updated}")
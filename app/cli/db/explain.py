@@ -0,0 +1,307 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, UTC
+from typing import Annotated, Any, Awaitable, Callable, Sequence
+from uuid import uuid4
+
+import typer
+from sqlalchemy import event, func, select, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app import models
+from app.config import load_settings
+from app.constants import EVENT_TYPE_SITE_ID
+from app.database import (
+    close_database,
+    get_session_maker,
+    init_database,
+    is_postgresql,
+)
+from app.handlers.event import (
+    PendingEvent,
+    get_event_schemas,
+    resolve_client_ids,
+    write_events,
+)
+from app.handlers.get import (
+    get_aggregated_stats,
+    get_period_stats,
+    get_popular_audiences,
+)
+from app.services.event_partitions import PARTITIONED_TABLES
+
+
+@dataclass
+class CapturedStatement:
+    name: str
+    statement: str
+    parameters: Any
+
+
+@dataclass
+class QueryPlan:
+    name: str
+    statement: str
+    lines: list[str]
+    seq_scans: list[str] = field(default_factory=list)
+
+
+type Scenario = Callable[[AsyncSession], Awaitable[Any]]
+
+
+def _analytics_scenarios(days: int) -> dict[str, Scenario]:
+    end = datetime.now()
+    start = end - timedelta(days=days)
+    return {
+        "get_popular_audiences": lambda db: get_popular_audiences(db),
+        "get_period_stats": lambda db: get_period_stats(db, "day", start, end),
+        "get_period_stats(event_type_id)": lambda db: get_period_stats(
+            db, "day", start, end, event_type_id=EVENT_TYPE_SITE_ID
+        ),
+        "get_aggregated_stats": lambda db: get_aggregated_stats(db, "day", start, end),
+    }
+
+
+async def _write_sample_event(db: AsyncSession) -> None:
+    client_id = (
+        await db.execute(select(models.ClientId.id).limit(1))
+    ).scalar_one_or_none()
+    schemas = await get_event_schemas(db)
+    event_type_id, allowed = next(
+        ((et_id, allowed) for et_id, allowed in schemas.items() if allowed),
+        (None, {}),
+    )
+    if client_id is None or event_type_id is None:
+        return
+    await write_events(
+        db,
+        [
+            PendingEvent(
+                client_id=client_id,
+                event_type_id=event_type_id,
+                trigger_time=datetime.now(UTC),
+                payloads=[(payload_type_id, "1") for payload_type_id in allowed],
+            )
+        ],
+    )
+
+
+def _ingestion_scenarios() -> dict[str, Scenario]:
+    return {
+        "resolve_client_ids": lambda db: resolve_client_ids(db, [str(uuid4())]),
+        "get_event_schemas": lambda db: get_event_schemas(db),
+        "write_events": _write_sample_event,
+    }
+
+
+async def collect_statements(
+    db: AsyncSession, days: int = 30
+) -> list[CapturedStatement]:
+    """
+    Выполняет запросы аналитики и ингеста и запоминает отправленный в БД SQL.
+
+    Записи ингеста остаются в транзакции сессии: вызывающий код откатывает её.
+    """
+    conn = (await db.connection()).sync_connection
+    captured: list[CapturedStatement] = []
+    current = ""
+
+    def record(_conn, _cursor, statement, parameters, _context, executemany):
+        if executemany:
+            # Для плана достаточно первого набора параметров
+            parameters = parameters[0] if parameters else ()
+        captured.append(CapturedStatement(current, statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", record)
+    try:
+        scenarios = _analytics_scenarios(days) | _ingestion_scenarios()
+        for name, scenario in scenarios.items():
+            current = name
+            await scenario(db)
+    finally:
+        event.remove(conn, "before_cursor_execute", record)
+
+    counts: dict[str, int] = {}
+    for item in captured:
+        counts[item.name] = counts.get(item.name, 0) + 1
+    seen: dict[str, int] = {}
+    for item in captured:
+        if counts[item.name] > 1:
+            seen[item.name] = seen.get(item.name, 0) + 1
+            item.name = f"{item.name} #{seen[item.name]}"
+    return captured
+
+
+def _is_table(name: str) -> bool:
+    if name in models.Base.metadata.tables:
+        return True
+    # Секции events/payloads называются <table>_pYYYY_MM и <table>_default
+    return any(name.startswith(f"{parent}_") for parent in PARTITIONED_TABLES)
+
+
+def render_pg_plan(plan: dict[str, Any], depth: int = 0) -> list[str]:
+    node = plan["Node Type"]
+    if "Relation Name" in plan:
+        node += f" on {plan['Relation Name']}"
+    if "Index Name" in plan:
+        node += f" using {plan['Index Name']}"
+    line = (
+        f"{'  ' * depth}-> {node}  "
+        f"(cost={plan.get('Total Cost')} rows={plan.get('Plan Rows')})"
+    )
+    if "Actual Total Time" in plan:
+        line += (
+            f"  (actual time={plan['Actual Total Time']}ms "
+            f"rows={plan.get('Actual Rows')})"
+        )
+    lines = [line]
+    for child in plan.get("Plans", []):
+        lines.extend(render_pg_plan(child, depth + 1))
+    return lines
+
+
+def pg_seq_scans(plan: dict[str, Any]) -> list[str]:
+    scans = []
+    if plan["Node Type"] == "Seq Scan" and _is_table(plan.get("Relation Name", "")):
+        scans.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        scans.extend(pg_seq_scans(child))
+    return scans
+
+
+def sqlite_seq_scans(details: Sequence[str]) -> list[str]:
+    """Таблицы, которые SQLite читает целиком: «SCAN <table>» без индекса."""
+    scans = []
+    for detail in details:
+        parts = detail.split()
+        if len(parts) < 2 or parts[0] != "SCAN" or "USING" in parts:
+            continue
+        if _is_table(parts[1]):
+            scans.append(parts[1])
+    return scans
+
+
+async def _relation_rows(conn: AsyncConnection, name: str) -> float:
+    if conn.dialect.name == "postgresql":
+        rows = (
+            await conn.execute(
+                text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"),
+                {"name": name},
+            )
+        ).scalar_one_or_none()
+        return float(rows or 0)
+    return float(
+        (await conn.execute(select(func.count()).select_from(table(name)))).scalar_one()
+    )
+
+
+async def explain_statements(
+    conn: AsyncConnection,
+    statements: Sequence[CapturedStatement],
+    analyze: bool = False,
+    min_rows: int = 0,
+) -> list[QueryPlan]:
+    """
+    Строит план каждого запроса и отмечает последовательные сканирования
+    таблиц, в которых не меньше min_rows строк.
+    """
+    postgresql = conn.dialect.name == "postgresql"
+    plans: list[QueryPlan] = []
+    for item in statements:
+        if postgresql:
+            options = "FORMAT JSON, ANALYZE" if analyze else "FORMAT JSON"
+            raw = (
+                await conn.exec_driver_sql(
+                    f"EXPLAIN ({options}) {item.statement}", item.parameters
+                )
+            ).scalar_one()
+            root = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            lines, scans = render_pg_plan(root), pg_seq_scans(root)
+        else:
+            rows = (
+                await conn.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {item.statement}", item.parameters
+                )
+            ).all()
+            details = [str(row[-1]) for row in rows]
+            lines, scans = (
+                [f"-> {detail}" for detail in details],
+                sqlite_seq_scans(details),
+            )
+
+        flagged = [
+            name
+            for name in dict.fromkeys(scans)
+            if await _relation_rows(conn, name) >= min_rows
+        ]
+        plans.append(QueryPlan(item.name, item.statement, lines, flagged))
+    return plans
+
+
+async def _explain(days: int, analyze: bool, min_rows: int, verbose: bool) -> int:
+    async with get_session_maker()() as db:
+        if analyze and not is_postgresql(db):
+            typer.echo("ℹ️ ANALYZE поддерживается только на PostgreSQL, строятся планы")
+            analyze = False
+        try:
+            statements = await collect_statements(db, days)
+            plans = await explain_statements(
+                await db.connection(), statements, analyze, min_rows
+            )
+        finally:
+            # Пробная запись ингеста не должна остаться в БД
+            await db.rollback()
+
+    flagged = 0
+    for plan in plans:
+        typer.echo(f"\n── {plan.name}")
+        if verbose:
+            typer.echo(plan.statement.strip())
+        for line in plan.lines:
+            typer.echo(f"   {line}")
+        if plan.seq_scans:
+            flagged += 1
+            typer.echo(f"⚠️ Последовательное сканирование: {', '.join(plan.seq_scans)}")
+    typer.echo(f"\nЗапросов: {len(plans)}, с последовательным сканированием: {flagged}")
+    return flagged
+
+
+def explain_command(
+    days: Annotated[
+        int,
+        typer.Option(help="Период аналитических запросов, дней до текущего момента"),
+    ] = 30,
+    analyze: Annotated[
+        bool,
+        typer.Option(help="EXPLAIN ANALYZE: выполнить запросы (только PostgreSQL)"),
+    ] = False,
+    min_rows: Annotated[
+        int,
+        typer.Option(help="Не отмечать сканирование таблиц меньше этого числа строк"),
+    ] = 10_000,
+    verbose: Annotated[bool, typer.Option(help="Печатать SQL запросов")] = False,
+    fail_on_seq_scan: Annotated[
+        bool,
+        typer.Option(help="Код выхода 1, если найдено последовательное сканирование"),
+    ] = False,
+) -> None:
+    """
+    Планы запросов аналитики (app/handlers/get.py) и ингеста на настроенной БД.
+
+    Запросы выполняются настоящими обработчиками в транзакции, которая
+    затем откатывается. Последовательное сканирование больших таблиц
+    обычно означает отсутствующий или неиспользуемый индекс.
+    """
+    settings = load_settings()
+    init_database(settings)
+
+    async def _run() -> int:
+        try:
+            return await _explain(days, analyze, min_rows, verbose)
+        finally:
+            await close_database()
+
+    flagged = asyncio.run(_run())
+    if fail_on_seq_scan and flagged:
+        raise typer.Exit(1)
@@ -1,5 +1,5 @@
 import asyncio
-from collections.abc import Sequence
+from collections.abc import Iterable, Iterator, Sequence
 from datetime import datetime, UTC
 from typing import Annotated, Any
 
@@ -8,6 +8,13 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
 
 from app.config import load_settings
+from app.database import is_postgresql
+from app.handlers.event import (
+    COPY_CHUNK_SIZE,
+    PendingEvent,
+    copy_events,
+    insert_event_rows,
+)
 
 EVENT_CODES = ("site", "auds", "ways", "plans")
 PAYLOAD_CODES = ("endpoint", "auditory_id", "start_id", "end_id", "success", "plan_id")
@@ -27,6 +34,13 @@ def _to_async_dsn(dsn: str) -> str:
     return dsn
 
 
+def _to_datetime(value: Any) -> datetime:
+    # SQLite отдаёт DATETIME из text()-запроса строкой
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
 def _to_str_value(value: Any) -> str:
     if isinstance(value, bool):
         return "true" if value else "false"
@@ -114,7 +128,7 @@ async def _insert_client_ids(
     )
 
     mapping: dict[str, int] = {}
-    next_id = 1
+    rows: list[dict[str, Any]] = []
 
     for row in user_rows:
         ident = str(row["user_id"])
@@ -124,6 +138,11 @@ async def _insert_client_ids(
         if ident in mapping:
             continue
 
+        client_id = len(mapping) + 1
+        mapping[ident] = client_id
+        rows.append({"id": client_id, "ident": ident, "creation_date": creation_date})
+
+    if rows:
         await new_conn.execute(
             text(
                 """
@@ -131,10 +150,8 @@ async def _insert_client_ids(
                 VALUES (:id, :ident, :creation_date)
                 """
             ),
-            {"id": next_id, "ident": ident, "creation_date": creation_date},
+            rows,
         )
-        mapping[ident] = next_id
-        next_id += 1
 
     return mapping
 
@@ -147,8 +164,6 @@ async def _migrate_events(
     event_type_map = await _fetch_mapping(new_conn, "event_types")
     payload_type_map = await _fetch_mapping(new_conn, "payload_types")
 
-    event_id = 1
-    payload_id = 1
     stats = {
         "site_events": 0,
         "auds_events": 0,
@@ -158,62 +173,56 @@ async def _migrate_events(
         "skipped_rows": 0,
     }
 
-    async def migrate_dataset(
-        query: str,
-        event_code: str,
+    def to_pending_events(
+        rows: Iterable[Any],
+        event_type_id: int,
         payload_keys: Sequence[str],
         stats_key: str,
-    ) -> None:
-        nonlocal event_id, payload_id
-        rows = (await old_conn.execute(text(query))).mappings().all()
-        event_type_id = event_type_map[event_code]
-
+    ) -> Iterator[PendingEvent]:
         for row in rows:
-            old_user_id = str(row["user_id"])
-            client_id = client_map.get(old_user_id)
+            client_id = client_map.get(str(row["user_id"]))
             if client_id is None:
                 stats["skipped_rows"] += 1
                 continue
 
-            await new_conn.execute(
-                text(
-                    """
-                    INSERT INTO events (id, client_id, event_type_id, trigger_time)
-                    VALUES (:id, :client_id, :event_type_id, :trigger_time)
-                    """
-                ),
-                {
-                    "id": event_id,
-                    "client_id": client_id,
-                    "event_type_id": event_type_id,
-                    "trigger_time": row["trigger_time"],
-                },
+            payloads = [
+                (payload_type_map[payload_key], _to_str_value(value)[:50])
+                for payload_key in payload_keys
+                if (value := row.get(payload_key)) is not None
+            ]
+            stats["payloads"] += len(payloads)
+            stats[stats_key] += 1
+            yield PendingEvent(
+                client_id=client_id,
+                event_type_id=event_type_id,
+                trigger_time=_to_datetime(row["trigger_time"]),
+                payloads=payloads,
             )
 
-            for payload_key in payload_keys:
-                value = row.get(payload_key)
-                if value is None:
-                    continue
-
-                await new_conn.execute(
-                    text(
-                        """
-                        INSERT INTO payloads (id, event_id, type_id, value)
-                        VALUES (:id, :event_id, :type_id, :value)
-                        """
-                    ),
-                    {
-                        "id": payload_id,
-                        "event_id": event_id,
-                        "type_id": payload_type_map[payload_key],
-                        "value": _to_str_value(value)[:50],
-                    },
-                )
-                payload_id += 1
-                stats["payloads"] += 1
+    async def migrate_dataset(
+        query: str,
+        event_code: str,
+        payload_keys: Sequence[str],
+        stats_key: str,
+    ) -> None:
+        rows = (await old_conn.execute(text(query))).mappings().all()
+        events = to_pending_events(
+            rows, event_type_map[event_code], payload_keys, stats_key
+        )
 
-            event_id += 1
-            stats[stats_key] += 1
+        # На PostgreSQL — COPY с резервированием id событий из sequence,
+        # на SQLite — многострочные INSERT теми же пачками.
+        if is_postgresql(new_conn):
+            await copy_events(new_conn, events)
+            return
+        chunk: list[PendingEvent] = []
+        for event in events:
+            chunk.append(event)
+            if len(chunk) >= COPY_CHUNK_SIZE:
+                await insert_event_rows(new_conn, chunk)
+                chunk = []
+        if chunk:
+            await insert_event_rows(new_conn, chunk)
 
     await migrate_dataset(
         query="""
@@ -288,12 +297,27 @@ async def _migrate_reviews(
     )
 
     stats = {"reviews": 0, "skipped_reviews": 0}
+    review_rows: list[dict[str, Any]] = []
     for row in rows:
         client_id = client_map.get(str(row["user_id"]))
         if client_id is None:
             stats["skipped_reviews"] += 1
             continue
 
+        review_rows.append(
+            {
+                "id": row["id"],
+                "client_id": client_id,
+                "text": row["text"],
+                "problem_id": row["problem_id"],
+                "image_name": row["image_name"],
+                "creation_date": row["creation_date"],
+                "review_status_id": row["review_status_id"] or 1,
+            }
+        )
+        stats["reviews"] += 1
+
+    if review_rows:
         await new_conn.execute(
             text(
                 """
@@ -317,21 +341,25 @@ async def _migrate_reviews(
                 )
                 """
             ),
-            {
-                "id": row["id"],
-                "client_id": client_id,
-                "text": row["text"],
-                "problem_id": row["problem_id"],
-                "image_name": row["image_name"],
-                "creation_date": row["creation_date"],
-                "review_status_id": row["review_status_id"] or 1,
-            },
+            review_rows,
         )
-        stats["reviews"] += 1
 
     return stats
 
 
+async def _sync_sequences(conn: AsyncConnection) -> None:
+    """client_ids и reviews пишутся с явными id — догоняем их sequence на PostgreSQL."""
+    if not is_postgresql(conn):
+        return
+    for table in ("client_ids", "reviews"):
+        await conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+            )
+        )
+
+
 async def _run_migration(old_db_url: str, new_db_url: str) -> None:
     old_async_url = _to_async_dsn(old_db_url)
     new_async_url = _to_async_dsn(new_db_url)
@@ -346,6 +374,7 @@ async def _run_migration(old_db_url: str, new_db_url: str) -> None:
             client_map = await _insert_client_ids(old_conn, new_conn)
             stats = await _migrate_events(old_conn, new_conn, client_map)
             review_stats = await _migrate_reviews(old_conn, new_conn, client_map)
+            await _sync_sequences(new_conn)
 
         typer.echo("✅ Migration completed.")
         typer.echo(f"Inserted client_ids: {len(client_map)}")
@@ -4,6 +4,7 @@ import uvicorn
 from app.default_hooks import DefaultHooks
 from app.logging import setup_logging
 from app.factory import AppFactory
+from app.cli.bench import bench_cli
 from app.cli.db import db_cli
 from . import CONFIG_ENV_NOTE
 
@@ -24,6 +25,7 @@ def root_callback() -> None:
 
 # 🔌 Подключаем группу db
 app_cli.add_typer(db_cli, name="db")
+app_cli.add_typer(bench_cli, name="bench")
 
 
 @app_cli.command(
@@ -156,9 +156,20 @@ class ServerConfig(BaseModel):
     compression: CompressionConfig | None = None
 
 
+class EventPartitionsConfig(BaseModel):
+    # Сколько будущих месячных секций events/payloads держать созданными заранее
+    premake_months: int = Field(default=3, ge=1)
+    # Сколько полных месяцев до текущего хранить; None — хранить всё
+    retention_months: Optional[int] = Field(default=None, ge=1)
+    # detach оставляет просроченные секции отдельными таблицами, drop удаляет их
+    retention_action: Literal["detach", "drop"] = "detach"
+
+
 class DatabaseConfig(BaseModel):
     uri: SqliteDsn | PostgresDsn
     auto_seed: bool = False
+    # Секционирование events/payloads по месяцам (только PostgreSQL)
+    partitions: EventPartitionsConfig = EventPartitionsConfig()
 
 
 class JwtTokenConfig(BaseModel):
@@ -177,11 +188,80 @@ class JwtConfig(BaseModel):
     refresh: JwtRefreshConfig = JwtRefreshConfig()
 
 
+class EventBufferConfig(BaseModel):
+    # Выключен по умолчанию: без буфера каждое событие пишется синхронно в запросе
+    enabled: bool = False
+    flush_interval_ms: int = Field(default=200, gt=0)
+    max_batch_size: int = Field(default=500, gt=0)
+    capacity: int = Field(default=10_000, gt=0)
+
+
+class EventSpoolConfig(BaseModel):
+    # Локальный журнал событий на время недоступности БД
+    enabled: bool = False
+    # Путь к SQLite-файлу спула относительно static_files (или абсолютный)
+    path: str = "spool/events.db"
+    replay_batch_size: int = Field(default=1_000, gt=0)
+
+
+class ClientPoolConfig(BaseModel):
+    # Пул заранее созданных client_ids для всплесков первых визитов
+    enabled: bool = False
+    size: int = Field(default=500, gt=0)
+    # Пополнение запускается, когда в пуле остаётся меньше low_watermark записей
+    low_watermark: int = Field(default=100, ge=0)
+    # Записи старше max_age_seconds не выдаются: их creation_date устарела
+    max_age_seconds: float = Field(default=300.0, gt=0)
+
+
+class IngestConfig(BaseModel):
+    buffer: EventBufferConfig = EventBufferConfig()
+    spool: EventSpoolConfig = EventSpoolConfig()
+    client_pool: ClientPoolConfig = ClientPoolConfig()
+
+
+class EventCubeConfig(BaseModel):
+    # Колоночная копия событий за последние window_days дней в памяти
+    # процесса; нужен numpy, без него статистика считается по БД
+    enabled: bool = False
+    window_days: int = Field(default=90, gt=0)
+    sync_interval_seconds: float = Field(default=10.0, gt=0)
+
+
+class AnalyticsPoolConfig(BaseModel):
+    # Отдельный пул соединений для статистики и выгрузок (только PostgreSQL):
+    # тяжёлые запросы не занимают соединения, нужные записи событий
+    enabled: bool = True
+    size: int = Field(default=3, gt=0)
+    max_overflow: int = Field(default=0, ge=0)
+    # Ожидание свободного соединения, после — ошибка вместо бесконечной очереди
+    timeout_seconds: float = Field(default=10.0, gt=0)
+    # statement_timeout соединений пула; 0 — без ограничения
+    statement_timeout_ms: int = Field(default=30_000, ge=0)
+
+
+class CostGuardConfig(BaseModel):
+    # Окно, которое пришлось бы считать по сырым events (без дневной сводки
+    # и колоночной копии), длиннее max_raw_days отклоняется
+    max_raw_days: int = Field(default=366, gt=0)
+    # Точные различные посетители окна, покрытого сводкой, считаются по events:
+    # окно длиннее max_exact_days считается приближённо по скетчам сводки
+    max_exact_days: int = Field(default=366, gt=0)
+
+
+class AnalyticsConfig(BaseModel):
+    cube: EventCubeConfig = EventCubeConfig()
+    pool: AnalyticsPoolConfig = AnalyticsPoolConfig()
+    guard: CostGuardConfig = CostGuardConfig()
+
+
 class Settings(BaseModel):
     server: ServerConfig = ServerConfig()
     database: DatabaseConfig
     jwt: JwtConfig = JwtConfig()
     jobs: JobsConfig = JobsConfig()
+    ingest: IngestConfig = IngestConfig()
+    analytics: AnalyticsConfig = AnalyticsConfig()
 
     # ── Свойства для обратной совместимости ───────────────────────────────────
 
@@ -1,6 +1,7 @@
 from typing import AsyncGenerator, Optional
 
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
@@ -15,41 +16,75 @@ from app.config import Settings
 # и позволяет тестам подменять источник сессий без патчинга sys.modules.
 _engine: Optional[AsyncEngine] = None
 _session_maker: Optional[async_sessionmaker[AsyncSession]] = None
+# Отдельный engine аналитики (analytics.pool, только PostgreSQL); без него
+# аналитика идёт через основной session_maker
+_analytics_engine: Optional[AsyncEngine] = None
+_analytics_session_maker: Optional[async_sessionmaker[AsyncSession]] = None
 
 
-def init_database(settings: Settings) -> None:
-    """Создаёт engine и session_maker из настроек. Вызывается в on_startup хука."""
-    global _engine, _session_maker
-    _engine = create_async_engine(str(settings.sqlalchemy_database_url), future=True)
-    _session_maker = async_sessionmaker(
+def _make_session_maker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
         autoflush=True,
         autocommit=False,
-        bind=_engine,
+        bind=engine,
         class_=AsyncSession,
         expire_on_commit=False,
     )
 
 
+def init_database(settings: Settings) -> None:
+    """Создаёт engine и session_maker из настроек. Вызывается в on_startup хука."""
+    global _engine, _session_maker, _analytics_engine, _analytics_session_maker
+    url = str(settings.sqlalchemy_database_url)
+    _engine = create_async_engine(url, future=True)
+    _session_maker = _make_session_maker(_engine)
+
+    _analytics_engine = _analytics_session_maker = None
+    pool = settings.analytics.pool
+    if pool.enabled and _engine.dialect.name == "postgresql":
+        connect_args = {}
+        if pool.statement_timeout_ms:
+            # Ограничение каждого запроса на соединениях пула (asyncpg)
+            connect_args["server_settings"] = {
+                "statement_timeout": str(pool.statement_timeout_ms)
+            }
+        _analytics_engine = create_async_engine(
+            url,
+            future=True,
+            pool_size=pool.size,
+            max_overflow=pool.max_overflow,
+            pool_timeout=pool.timeout_seconds,
+            connect_args=connect_args,
+        )
+        _analytics_session_maker = _make_session_maker(_analytics_engine)
+
+
 async def close_database() -> None:
     """Закрывает engine и сбрасывает модульные переменные. Вызывается в on_shutdown."""
-    global _engine, _session_maker
-    if _engine is not None:
-        await _engine.dispose()
+    global _engine, _session_maker, _analytics_engine, _analytics_session_maker
+    for engine in (_analytics_engine, _engine):
+        if engine is not None:
+            await engine.dispose()
     _engine = None
     _session_maker = None
+    _analytics_engine = None
+    _analytics_session_maker = None
 
 
 def override_database(session_maker: async_sessionmaker[AsyncSession]) -> None:
     """Подменяет session_maker. Используется только в тестах для подключения тестовой БД."""
-    global _session_maker
+    global _session_maker, _analytics_session_maker
     _session_maker = session_maker
+    _analytics_session_maker = None
 
 
 def reset_database() -> None:
     """Сбрасывает модульное состояние без вызова dispose. Используется в тестах."""
-    global _engine, _session_maker
+    global _engine, _session_maker, _analytics_engine, _analytics_session_maker
     _engine = None
     _session_maker = None
+    _analytics_engine = None
+    _analytics_session_maker = None
 
 
 def get_session_maker() -> async_sessionmaker[AsyncSession]:
@@ -62,6 +97,19 @@ def get_session_maker() -> async_sessionmaker[AsyncSession]:
     return _session_maker
 
 
+def get_analytics_session_maker() -> async_sessionmaker[AsyncSession]:
+    """session_maker пула аналитики или основной, если отдельного пула нет."""
+    if _analytics_session_maker is not None:
+        return _analytics_session_maker
+    return get_session_maker()
+
+
+def is_postgresql(db: AsyncSession | AsyncConnection) -> bool:
+    """Работает ли сессия/соединение поверх PostgreSQL — для выбора специализированных запросов."""
+    bind = db.get_bind() if isinstance(db, AsyncSession) else db
+    return bind.dialect.name == "postgresql"
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     FastAPI-зависимость для получения сессии БД.
@@ -72,3 +120,14 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     session_maker = get_session_maker()
     async with session_maker() as db:
         yield db
+
+
+async def get_analytics_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI-зависимость для сессии запросов статистики.
+
+    Yields:
+        AsyncSession: сессия пула аналитики (см. get_analytics_session_maker).
+    """
+    async with get_analytics_session_maker()() as db:
+        yield db
@@ -11,7 +11,7 @@ from fastapi.staticfiles import StaticFiles
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.config import JobsConfig, Settings
-from app.database import close_database, init_database
+from app.database import close_database, get_session_maker, init_database
 from app.guards.governor import stat_rate_limiter
 from app.guards.review_governor import review_rate_limiter
 from app.helpers.errors import LookupException
@@ -26,6 +26,16 @@ from app.jobs.refresh_token import (
     revoke_expired_refresh_tokens,
 )
 from app.graphql.schema import graphql_router
+from app.services.client_pool import close_client_pool, init_client_pool
+from app.services.event_buffer import (
+    EventBufferFullError,
+    close_event_buffer,
+    init_event_buffer,
+)
+from app.services.analytics_guard import init_cost_guard
+from app.services.event_cube import close_event_cube, init_event_cube
+from app.services.event_catalog import event_catalog
+from app.services.event_spool import close_event_spool, init_event_spool
 from app.routes import (
     admin,
     auth,
@@ -194,16 +204,40 @@ class DefaultHooks(BaseHooks):
         async def lookup_exception_handler(_, exc: LookupException):
             return JSONResponse(status_code=404, content={"status": str(exc)})
 
+        @app.exception_handler(EventBufferFullError)
+        async def event_buffer_full_handler(_, exc: EventBufferFullError):
+            return JSONResponse(
+                status_code=503,
+                content={"status": str(exc)},
+                headers={"Retry-After": "1"},
+            )
+
         @app.exception_handler(HTTPException)
         async def http_exception_handler(_: Request, exc: HTTPException):
             return JSONResponse(
-                status_code=exc.status_code, content={"detail": exc.detail}
+                status_code=exc.status_code,
+                content={"detail": exc.detail},
+                headers=exc.headers,
             )
 
     # ── Lifespan ─────────────────────────────────────────────────────────────
 
     async def on_startup(self, app: FastAPI, settings: Settings) -> AppLifespanState:
         init_database(settings)
+        init_event_buffer(settings.ingest.buffer)
+        await init_event_spool(settings.ingest.spool, settings.static_files)
+        init_client_pool(settings.ingest.client_pool)
+        # Копия событий строится в фоне; до готовности статистика идёт в БД
+        init_event_cube(settings.analytics.cube)
+        init_cost_guard(settings.analytics.guard)
+
+        # Прогреваем каталог схемы событий, чтобы первый /api/stat/event
+        # не платил за его загрузку. При ошибке каталог загрузится лениво.
+        try:
+            async with get_session_maker()() as db:
+                await event_catalog.load(db)
+        except Exception as e:
+            logger.warning("Could not preload event catalog: %s", e)
 
         state: AppState = app.state.app_state
 
@@ -287,6 +321,11 @@ class DefaultHooks(BaseHooks):
             logger.error("Error saving banned users: %s", e)
 
         state["job_manager"].shutdown()
+        # Буфер дописывает очередь через сессии БД, поэтому закрывается раньше неё
+        await close_event_buffer()
+        close_event_spool()
+        await close_client_pool()
+        await close_event_cube()
         await close_database()
 
     # ── Внутреннее ───────────────────────────────────────────────────────────
@@ -12,6 +12,8 @@ from app.services.user_logger_service import UserLoggerService
 @dataclass
 class GraphQLContext(BaseContext):
     db: AsyncSession
+    # Сессия пула аналитики для запросов статистики (см. get_analytics_db)
+    analytics_db: AsyncSession
     current_user: User
     loaders: Loaders
     permission_service: PermissionService
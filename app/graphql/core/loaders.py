@@ -1,9 +1,13 @@
-from typing import Type, TypeVar, Dict, List, Optional
+import asyncio
+from datetime import datetime
+from typing import NamedTuple, Type, TypeVar, Dict, List, Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 from strawberry.dataloader import DataLoader
 
+from app.handlers.get import WindowStats, get_window_stats
+
 from app.models import (
     ValueType,
     PayloadType,
@@ -88,6 +92,52 @@ class ForeignKeyLoader(DataLoader[int, List[M]]):
         return [grouped.get(key, []) for key in keys]
 
 
+class StatsRequest(NamedTuple):
+    period_type: str
+    start: datetime
+    end: datetime
+    event_type_id: Optional[int]
+    approximate: bool = False
+
+
+class StatsLoader(DataLoader[StatsRequest, WindowStats]):
+    """
+    Лоадер статистики посещений за окно.
+
+    Все поля статистики одной GraphQL-операции (по нескольким типам событий,
+    по периодам и сводные) попадают в один батч: на каждое окно —
+    один get_window_stats, то есть одно чтение events вместо чтения на поле.
+    Батч держит lock сессии: соседние резолверы работают с той же
+    AsyncSession одновременно, а она не допускает параллельных запросов.
+    """
+
+    def __init__(self, session: AsyncSession, lock: asyncio.Lock):
+        super().__init__(load_fn=self._batch_load)
+        self.session = session
+        self.lock = lock
+
+    async def _batch_load(self, keys: List[StatsRequest]) -> List[WindowStats]:
+        async with self.lock:
+            return await self._load_windows(keys)
+
+    async def _load_windows(self, keys: List[StatsRequest]) -> List[WindowStats]:
+        windows: Dict[tuple, set[Optional[int]]] = {}
+        for key in keys:
+            window = (key.period_type, key.start, key.end, key.approximate)
+            windows.setdefault(window, set()).add(key.event_type_id)
+
+        results: Dict[StatsRequest, WindowStats] = {}
+        for (period_type, start, end, approximate), type_ids in windows.items():
+            by_type = await get_window_stats(
+                self.session, period_type, start, end, type_ids, approximate
+            )
+            for event_type_id, stats in by_type.items():
+                results[
+                    StatsRequest(period_type, start, end, event_type_id, approximate)
+                ] = stats
+        return [results[key] for key in keys]
+
+
 # =============================================================================
 # Типизированный контейнер лоадеров
 # =============================================================================
@@ -99,7 +149,9 @@ class Loaders:
         - Через атрибуты: ctx.loaders.user.load(1)
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self, session: AsyncSession, analytics_session: Optional[AsyncSession] = None
+    ):
         # === event_system ===
         self.value_type: DataLoader[int, ValueType] = SQLAlchemyLoader(
             session, ValueType
@@ -125,6 +177,14 @@ class Loaders:
             session, Review, "review_status_id"
         )
 
+        # === stat ===
+        # Статистика читается через пул аналитики, если он передан. Все, кто
+        # обращается к этой сессии в резолверах статистики, берут analytics_lock
+        self.analytics_lock = asyncio.Lock()
+        self.stats: DataLoader[StatsRequest, WindowStats] = StatsLoader(
+            analytics_session or session, self.analytics_lock
+        )
+
         # === navigation ===
         self.nav_location: DataLoader[int, Location] = SQLAlchemyLoader(
             session, Location
@@ -34,6 +34,10 @@ class ResourceConfig(Generic[M, T, F]):
     # Валидация
     validators: Dict[str, Callable[[Any], bool | str]] = field(default_factory=dict)
 
+    # 🔹 Вызывается после успешного commit в create/update/delete
+    # (например, для сброса in-memory кэшей, построенных по таблице ресурса)
+    on_change: Optional[Callable[[], None]] = None
+
     # 🔹 Глобальный флаг логирования (по умолчанию выключено)
     enable_logging: bool = False
 
@@ -19,6 +19,17 @@ from .context import GraphQLContext
 from .logging import GraphQLLoggingExtension, should_skip_graphql_logging
 
 
+async def _get_by_id(db, model, id):
+    """
+    Поиск по id. У секционированных таблиц ключ составной (id, trigger_time),
+    и db.get() по одному id к ним неприменим.
+    """
+    primary_key = model.__table__.primary_key.columns
+    if len(primary_key) == 1:
+        return await db.get(model, id)
+    return await db.scalar(select(model).where(primary_key["id"] == id))
+
+
 def _make_base_name(name: str) -> str:
     base = name.removesuffix("Type").removesuffix("Model")
     return re.sub(r"(?<!^)(?=[A-Z])", "_", base).lower()
@@ -115,7 +126,7 @@ def create_query_resource(
             if config.permissions.view:
                 await require_permissions(info, config.permissions.view)
             ctx: GraphQLContext = info.context
-            model_instance = await ctx.db.get(config.model, id)
+            model_instance = await _get_by_id(ctx.db, config.model, id)
             return config.convert(model_instance) if model_instance else None
 
         _get_resolver.__annotations__ = {
@@ -205,6 +216,8 @@ def create_mutation_resource(
             )
             ctx.db.add(instance)
             await ctx.db.commit()
+            if config.on_change:
+                config.on_change()
             await ctx.db.refresh(instance)
             return config.convert(instance)
 
@@ -232,7 +245,7 @@ def create_mutation_resource(
             ctx: GraphQLContext = info.context
 
             # 🔹 Прямой поиск по PK без decode/resolve_node
-            model = await ctx.db.get(config.model, id)
+            model = await _get_by_id(ctx.db, config.model, id)
             if not model:
                 raise GraphQLError(f"{config.model.__name__} {id} not found")
 
@@ -250,6 +263,8 @@ def create_mutation_resource(
                     setattr(model, k, v)
 
             await ctx.db.commit()
+            if config.on_change:
+                config.on_change()
             await ctx.db.refresh(model)
             return config.convert(model)
 
@@ -278,10 +293,12 @@ def create_mutation_resource(
             ctx: GraphQLContext = info.context
 
             # 🔹 Прямой поиск и удаление по PK
-            model = await ctx.db.get(config.model, id)
+            model = await _get_by_id(ctx.db, config.model, id)
             if model:
                 await ctx.db.delete(model)
                 await ctx.db.commit()
+                if config.on_change:
+                    config.on_change()
             return True
 
         _delete_resolver.__annotations__ = {
@@ -5,7 +5,7 @@ from strawberry.fastapi import GraphQLRouter
 from strawberry.http import GraphQLHTTPResponse
 from strawberry.types import ExecutionResult
 
-from app.database import get_db
+from app.database import get_analytics_db, get_db
 from app.helpers.auth_utils import get_current_active_user
 from app.models import User
 from app.services.permission_service import PermissionService
@@ -23,6 +23,7 @@ async def get_context(
     request: Request,
     background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
+    analytics_db: AsyncSession = Depends(get_analytics_db),
     current_user: User = Depends(get_current_active_user),
 ) -> GraphQLContext:
     user_logger = UserLoggerService(db, background_tasks)
@@ -31,14 +32,16 @@ async def get_context(
     request.state.current_user = current_user
     request.state.user_logger = user_logger
     request.state.graphql_error_logs = []
+    request.state.graphql_warnings = []
 
     return GraphQLContext(
         db=db,
+        analytics_db=analytics_db,
         current_user=current_user,
         permission_service=PermissionService(db),
         user_logger=user_logger,
         request=request,
-        loaders=Loaders(db),
+        loaders=Loaders(db, analytics_db),
     )
 
 
@@ -59,6 +62,11 @@ class StatAPIGraphQLRouter(GraphQLRouter):
 
         response: GraphQLHTTPResponse = {"data": result.data}
 
+        # Предупреждения резолверов, например о переходе на approximate
+        warnings = getattr(request.state, "graphql_warnings", [])
+        if warnings:
+            response["extensions"] = {"warnings": warnings}
+
         if result.errors:
             formatted_errors = []
             for error in result.errors:
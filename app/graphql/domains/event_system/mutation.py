@@ -8,6 +8,7 @@ from app.graphql.core.resource_factory import create_mutation_resource
 from app.graphql.core.context import GraphQLContext
 from app.graphql.core.permissions import require_permissions, P
 from app.graphql.core.logging import GraphQLLoggingExtension
+from app.services.event_catalog import event_catalog
 
 from app.graphql.domains.event_system.resources import (
     EventTypeResource,
@@ -101,6 +102,7 @@ class AllowedPayloadRuleMutation:
         )
         ctx.db.add(item)
         await ctx.db.commit()
+        event_catalog.invalidate()
 
         return AllowedPayloadRuleType(
             event_type_id=item.event_type_id,  # type: ignore[call-arg]
@@ -154,6 +156,7 @@ class AllowedPayloadRuleMutation:
         )
         ctx.db.add(new_rule)
         await ctx.db.commit()
+        event_catalog.invalidate()
 
         return AllowedPayloadRuleType(
             event_type_id=new_rule.event_type_id,  # type: ignore[call-arg]
@@ -180,6 +183,7 @@ class AllowedPayloadRuleMutation:
 
         await ctx.db.delete(rule_model)
         await ctx.db.commit()
+        event_catalog.invalidate()
         return True
 
 
@@ -1,5 +1,6 @@
 from app.graphql.core.resource import ResourceConfig, ResourcePermissions
 from app.graphql.core.permissions import P
+from app.services.event_catalog import event_catalog
 from app.models import (
     EventType as ETModel,
     PayloadType as PTModel,
@@ -89,6 +90,7 @@ EventTypeResource = ResourceConfig(
             not v or len(v) <= 100 or "Описание не должно превышать 100 символов"
         ),
     },
+    on_change=event_catalog.invalidate,
 )
 
 PayloadTypeResource = ResourceConfig(
@@ -115,6 +117,7 @@ PayloadTypeResource = ResourceConfig(
             len(v) <= 20 or "code_name не должен превышать 20 символов"
         ),
     },
+    on_change=event_catalog.invalidate,
 )
 
 ValueTypeResource = ResourceConfig(
@@ -133,6 +136,7 @@ ValueTypeResource = ResourceConfig(
     validators={
         "name": lambda v: len(v) <= 20 or "name не должен превышать 20 символов",
     },
+    on_change=event_catalog.invalidate,
 )
 
 ClientIdResource = ResourceConfig(
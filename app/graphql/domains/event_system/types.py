@@ -1,6 +1,7 @@
 from typing import Optional, cast
 from datetime import datetime
 import strawberry
+from sqlalchemy import select
 
 from app.graphql.core.list_ops import process_list
 from app.graphql.core.pagination import (
@@ -312,8 +313,12 @@ class Payload:
     @strawberry.field  # type: ignore[unresolved-reference]
     async def event(self, info: strawberry.Info) -> Optional[Event]:
         ctx: GraphQLContext = info.context
+        # Ключ events составной (id, trigger_time), db.get() по id не подходит
         ev_model = cast(
-            Optional[EventModel], await ctx.db.get(EventModel, self.event_id)
+            Optional[EventModel],
+            await ctx.db.scalar(
+                select(EventModel).where(EventModel.id == self.event_id)
+            ),
         )
         return _event_from_model(ev_model) if ev_model else None
 
@@ -1,12 +1,16 @@
 from datetime import date, datetime, time, timedelta
-from typing import Optional, List
+from typing import Annotated, Optional, List
 import strawberry
 from strawberry import Info
 
 from app.constants import EVENT_TYPE_IDS_BY_CODE
 from app.graphql.core.context import GraphQLContext
 from app.graphql.core.permissions import require_permissions, P
-from app.handlers import get_aggregated_stats, get_period_stats
+from app.graphql.core.loaders import StatsRequest
+from app.helpers.hll import HLL_STANDARD_ERROR
+from app.services.analytics_guard import get_cost_guard
+from app.services.dashboard_data import get_dashboard_data
+from app.services.stats_cache import get_cached_period_stats
 
 from app.graphql.domains.stat.inputs import (
     EndpointStatisticsByDateInput,
@@ -16,12 +20,26 @@ from app.graphql.domains.stat.inputs import (
 from app.graphql.domains.stat.types import (
     EndpointStatistics,
     AggregatedEndpointStatistics,
+    DashboardWidget,
+    _to_dashboard_widget,
     _to_endpoint_statistics,
     _to_aggregated_endpoint_statistics,
     _fill_missing_dates,
 )
 
 
+APPROXIMATE_ARGUMENT = Annotated[
+    bool,
+    strawberry.argument(
+        description=(
+            "Оценивать различных посетителей по HyperLogLog-скетчам дневной "
+            f"сводки: стандартная ошибка ≈{HLL_STANDARD_ERROR:.1%}. Посещения "
+            "и дневные значения остаются точными; без сводки ответ точный"
+        )
+    ),
+]
+
+
 # =============================================================================
 # Валидация и резолвинг параметров окна
 # =============================================================================
@@ -108,6 +126,35 @@ def _resolve_window(
     )
 
 
+async def _guard_window(
+    ctx: GraphQLContext,
+    period_type: str,
+    start: datetime,
+    end: datetime,
+    approximate: bool,
+) -> bool:
+    """
+    approximate, с которым окно будет посчитано.
+
+    Слишком дорогое окно отклоняется AnalyticsCostError; переход на
+    приближённый подсчёт попадает в extensions.warnings ответа.
+    """
+    guard = get_cost_guard()
+    async with ctx.loaders.analytics_lock:
+        decision = await guard.check(
+            ctx.analytics_db, period_type, start, end, approximate
+        )
+    if decision.downgraded:
+        warning = (
+            f"Окно в {decision.days} дн. посчитано приближённо (approximate): "
+            f"точный подсчёт доступен для окон до {guard.max_exact_days} дн."
+        )
+        warnings = ctx.request.state.graphql_warnings
+        if warning not in warnings:
+            warnings.append(warning)
+    return decision.approximate
+
+
 # =============================================================================
 # Query Type
 # =============================================================================
@@ -122,6 +169,7 @@ class Query:
         by_date: Optional[EndpointStatisticsByDateInput] = None,
         by_month: Optional[EndpointStatisticsByMonthInput] = None,
         by_year: Optional[EndpointStatisticsByYearInput] = None,
+        approximate: APPROXIMATE_ARGUMENT = False,
     ) -> List[EndpointStatistics]:
         await require_permissions(info, P.STATS_VIEW)
         ctx: GraphQLContext = info.context
@@ -129,13 +177,28 @@ class Query:
             by_date, by_month, by_year
         )
 
-        stats = await get_period_stats(
-            ctx.db,
-            period_type=period_type,
-            start=start,
-            end=end,
-            event_type_id=_resolve_event_type_id(endpoint, event_type_id),
-        )
+        event_type = _resolve_event_type_id(endpoint, event_type_id)
+
+        with get_cost_guard().limits():
+            approximate = await _guard_window(ctx, period_type, start, end, approximate)
+
+            async def fetch(fetch_start: datetime, fetch_end: datetime):
+                stats = await ctx.loaders.stats.load(
+                    StatsRequest(
+                        period_type, fetch_start, fetch_end, event_type, approximate
+                    )
+                )
+                return stats.periods
+
+            stats = await get_cached_period_stats(
+                ctx.analytics_db,
+                period_type=period_type,
+                start=start,
+                end=end,
+                event_type_id=event_type,
+                approximate=approximate,
+                fetch=fetch,
+            )
 
         if fill_start is not None and fill_end is not None:
             stats = _fill_missing_dates(stats, fill_start, fill_end)
@@ -151,17 +214,41 @@ class Query:
         by_date: Optional[EndpointStatisticsByDateInput] = None,
         by_month: Optional[EndpointStatisticsByMonthInput] = None,
         by_year: Optional[EndpointStatisticsByYearInput] = None,
+        approximate: APPROXIMATE_ARGUMENT = False,
     ) -> AggregatedEndpointStatistics:
         await require_permissions(info, P.STATS_VIEW)
         ctx: GraphQLContext = info.context
         period_type, start, end, _, _ = _resolve_window(by_date, by_month, by_year)
+        event_type = _resolve_event_type_id(endpoint, event_type_id)
+
+        with get_cost_guard().limits():
+            approximate = await _guard_window(ctx, period_type, start, end, approximate)
+            window_stats = await ctx.loaders.stats.load(
+                StatsRequest(period_type, start, end, event_type, approximate)
+            )
 
-        aggregated_stats = await get_aggregated_stats(
-            ctx.db,
-            period_type=period_type,
-            start=start,
-            end=end,
-            event_type_id=_resolve_event_type_id(endpoint, event_type_id),
+        return _to_aggregated_endpoint_statistics(window_stats.aggregated)
+
+    @strawberry.field  # type: ignore[unresolved-reference]
+    async def dashboard_data(
+        self,
+        info: Info,
+        by_date: Optional[EndpointStatisticsByDateInput] = None,
+        by_month: Optional[EndpointStatisticsByMonthInput] = None,
+        by_year: Optional[EndpointStatisticsByYearInput] = None,
+        approximate: APPROXIMATE_ARGUMENT = False,
+    ) -> List[DashboardWidget]:
+        await require_permissions(info, P.STATS_VIEW)
+        ctx: GraphQLContext = info.context
+        period_type, start, end, fill_start, fill_end = _resolve_window(
+            by_date, by_month, by_year
         )
 
-        return _to_aggregated_endpoint_statistics(aggregated_stats)
+        with get_cost_guard().limits():
+            approximate = await _guard_window(ctx, period_type, start, end, approximate)
+            async with ctx.loaders.analytics_lock:
+                dashboards = await get_dashboard_data(
+                    ctx.analytics_db, period_type, start, end, approximate
+                )
+
+        return [_to_dashboard_widget(data, fill_start, fill_end) for data in dashboards]
@@ -1,7 +1,8 @@
 from datetime import date, timedelta
-from typing import List
+from typing import List, Optional
 import strawberry
 from app.schemas import Statistics, AggregatedStatistics
+from app.services.dashboard_data import DashboardData
 
 
 # =============================================================================
@@ -30,6 +31,31 @@ def _to_aggregated_endpoint_statistics(
     )
 
 
+def _to_dashboard_widget(
+    data: DashboardData, fill_start: Optional[date], fill_end: Optional[date]
+) -> "DashboardWidget":
+    periods = data.stats.periods
+    if periods is not None and fill_start is not None and fill_end is not None:
+        periods = _fill_missing_dates(periods, fill_start, fill_end)
+    return DashboardWidget(
+        id=data.dashboard.id,
+        display_order=data.dashboard.display_order,
+        title_text=data.dashboard.title_text,
+        event_type_id=data.dashboard.event_type_id,
+        dashboard_type_id=data.dashboard.dashboard_type_id,
+        series=(
+            [_to_endpoint_statistics(stat) for stat in periods]
+            if periods is not None
+            else None
+        ),
+        aggregated=(
+            _to_aggregated_endpoint_statistics(data.stats.aggregated)
+            if data.stats.aggregated is not None
+            else None
+        ),
+    )
+
+
 def _fill_missing_dates(
     stats: List[Statistics], start_date: date, end_date: date
 ) -> List[Statistics]:
@@ -73,3 +99,16 @@ class AggregatedEndpointStatistics:
     avg_unique: float
     avg_visitor_count: float
     entries_count: int
+
+
+@strawberry.type
+class DashboardWidget:
+    """Дашборд с данными за окно: series для графика, aggregated для avg."""
+
+    id: int
+    display_order: int
+    title_text: str
+    event_type_id: int
+    dashboard_type_id: int
+    series: Optional[List[EndpointStatistics]]
+    aggregated: Optional[AggregatedEndpointStatistics]
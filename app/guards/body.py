@@ -0,0 +1,92 @@
+from typing import Any, Generic, Optional, TypeVar
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+from app.schemas import EventCreateRequest
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class JsonBody(Generic[ModelT]):
+    """
+    Зависимость, которая разбирает и валидирует JSON-тело запроса один раз.
+
+    Результат (модель или ошибка валидации) кладётся в request.state, поэтому
+    guard и эндпоинт, объявившие одно и то же тело, получают один и тот же
+    экземпляр модели без повторного json.loads и model_validate.
+
+    Эндпоинт принимает тело через Depends(body), а не как Body-параметр:
+    иначе FastAPI провалидирует его ещё раз сам. Схему тела для OpenAPI
+    в этом случае нужно передать через openapi_extra.
+    """
+
+    def __init__(self, model: type[ModelT]):
+        self.model = model
+        self._state_key = f"json_body_{model.__name__}"
+
+    async def __call__(self, request: Request) -> ModelT:
+        result = await self._parse(request)
+        if isinstance(result, RequestValidationError):
+            raise result
+        return result
+
+    async def optional(self, request: Request) -> Optional[ModelT]:
+        """Модель тела или None, если тело не проходит валидацию — для guard-ов."""
+        result = await self._parse(request)
+        if isinstance(result, RequestValidationError):
+            return None
+        return result
+
+    def openapi_extra(self) -> dict[str, Any]:
+        # Схема модели попадает в components сама, если модель используется
+        # в каком-либо Body-параметре или response_model приложения.
+        return {
+            "requestBody": {
+                "required": True,
+                "content": {
+                    "application/json": {
+                        "schema": {
+                            "$ref": f"#/components/schemas/{self.model.__name__}"
+                        }
+                    }
+                },
+            }
+        }
+
+    async def _parse(self, request: Request) -> ModelT | RequestValidationError:
+        cached = getattr(request.state, self._state_key, None)
+        if cached is not None:
+            return cached
+
+        result: ModelT | RequestValidationError
+        try:
+            body = await request.json()
+        except ValueError as exc:
+            result = RequestValidationError(
+                [
+                    {
+                        "type": "json_invalid",
+                        "loc": ("body", getattr(exc, "pos", 0)),
+                        "msg": "JSON decode error",
+                        "input": {},
+                        "ctx": {"error": getattr(exc, "msg", str(exc))},
+                    }
+                ]
+            )
+        else:
+            try:
+                result = self.model.model_validate(body)
+            except ValidationError as exc:
+                result = RequestValidationError(
+                    [
+                        {**error, "loc": ("body", *error["loc"])}
+                        for error in exc.errors(include_url=False)
+                    ]
+                )
+        setattr(request.state, self._state_key, result)
+        return result
+
+
+event_create_body = JsonBody(EventCreateRequest)
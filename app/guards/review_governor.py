@@ -160,7 +160,13 @@ class ReviewRateLimiter:
 
     @staticmethod
     async def _extract_user_id(request: Request) -> Optional[str]:
-        """Извлекает client_id из multipart/form-data или JSON."""
+        """
+        Извлекает client_id из multipart/form-data или JSON.
+
+        request.form() и request.json() кэшируются на объекте запроса, и FastAPI
+        читает тело эндпоинта через тот же кэш, поэтому повторного разбора
+        multipart здесь нет. Модель из полей формы не строится — нужен один client_id.
+        """
         try:
             content_type = request.headers.get("content-type", "")
 
@@ -1,7 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import Select
 from app.schemas import ClientIdCheck, Status
-from app.models import ClientId
+from app.handlers.event import resolve_client_ids
 from app.helpers.errors import LookupException
 from app.schemas.old_events import UserIdCheck
 
@@ -15,9 +14,7 @@ async def check_user_id(db: AsyncSession, data: UserIdCheck) -> Status:
 
 
 async def check_client_id(db: AsyncSession, data: ClientIdCheck) -> Status:
-    client = (
-        await db.execute(Select(ClientId).filter_by(ident=data.client_id))
-    ).scalar_one_or_none()
-    if client is None:
+    client_ids = await resolve_client_ids(db, [data.client_id])
+    if data.client_id not in client_ids:
         raise LookupException("Client")
     return Status()
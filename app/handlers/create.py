@@ -1,6 +1,9 @@
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app import schemas, models
 from app.schemas.old_events import UserId
+from app.services.client_cache import client_id_cache
+from app.services.client_pool import get_client_pool
 
 
 # TODO: Удалить, как фронты перейдут на новую схему событий
@@ -25,11 +28,39 @@ async def create_user_id(db: AsyncSession) -> UserId:
 
 
 async def create_client_id(db: AsyncSession) -> schemas.ClientIdentResponse:
-    item = models.ClientId()
-    db.add(item)
+    """
+    Выдаёт новый идентификатор клиента.
+
+    Если включён пул client_ids, запись берётся из него без обращения к БД.
+    Иначе создаётся одним INSERT ... RETURNING вместо add/commit/refresh.
+
+    Args:
+        db: Сессия базы данных.
+
+    Returns:
+        Идентификатор клиента и дата его создания.
+    """
+    pool = get_client_pool()
+    pooled = pool.take() if pool is not None else None
+    if pooled is not None:
+        client_id_cache.put(pooled.ident, pooled.id, pooled.creation_date.date())
+        return schemas.ClientIdentResponse(
+            ident=pooled.ident,
+            creation_date=pooled.creation_date,
+        )
+
+    row = (
+        await db.execute(
+            insert(models.ClientId).returning(
+                models.ClientId.id,
+                models.ClientId.ident,
+                models.ClientId.creation_date,
+            )
+        )
+    ).one()
     await db.commit()
-    await db.refresh(item)
+    client_id_cache.put(row.ident, row.id, row.creation_date.date())
     return schemas.ClientIdentResponse(
-        ident=item.ident,
-        creation_date=item.creation_date,
+        ident=row.ident,
+        creation_date=row.creation_date,
     )
@@ -0,0 +1,594 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, UTC
+from typing import Callable, Iterable, Literal, Mapping, Optional, Sequence
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    Integer,
+    String,
+    bindparam,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app import models, schemas
+from app.database import is_postgresql
+from app.handlers.first_seen import get_client_first_seen
+from app.services.client_cache import CachedClient, client_id_cache
+
+
+class EventValidationError(ValueError):
+    """
+    Ошибка валидации входящего события.
+
+    Хендлеры ингеста не знают про HTTP: роут сам решает, превратить ли ошибку
+    в 400 для одиночного события или в статус элемента батча.
+    """
+
+
+@dataclass(slots=True)
+class PendingEvent:
+    """Событие, прошедшее валидацию и готовое к записи в БД."""
+
+    client_id: int
+    event_type_id: int
+    trigger_time: datetime
+    payloads: list[tuple[int, str]] = field(default_factory=list)
+    # День создания клиента из client_id_cache; None — записи берут его из БД
+    client_first_seen: Optional[date] = None
+
+
+def _normalize_string(_payload_type_id: int) -> Callable[[str], str]:
+    return lambda value: value
+
+
+def _normalize_int(payload_type_id: int) -> Callable[[str], str]:
+    def normalize(value: str) -> str:
+        try:
+            return str(int(value))
+        except ValueError as exc:
+            raise EventValidationError(
+                f"Invalid int value for payload_type_id={payload_type_id}"
+            ) from exc
+
+    return normalize
+
+
+def _normalize_bool(payload_type_id: int) -> Callable[[str], str]:
+    def normalize(value: str) -> str:
+        normalized = value.lower()
+        if normalized not in {"true", "false"}:
+            raise EventValidationError(
+                f"Invalid bool value for payload_type_id={payload_type_id}"
+            )
+        return normalized
+
+    return normalize
+
+
+_NORMALIZER_FACTORIES: dict[str, Callable[[int], Callable[[str], str]]] = {
+    "string": _normalize_string,
+    "int": _normalize_int,
+    "bool": _normalize_bool,
+}
+
+
+def _compile_normalizer(data_type: str, payload_type_id: int) -> Callable[[str], str]:
+    factory = _NORMALIZER_FACTORIES.get(data_type)
+    if factory is not None:
+        return factory(payload_type_id)
+
+    def unsupported(_value: str) -> str:
+        raise EventValidationError(
+            f"Unsupported payload data type '{data_type}' "
+            f"for payload_type_id={payload_type_id}"
+        )
+
+    return unsupported
+
+
+class EventValidator:
+    """
+    Скомпилированный валидатор пэйлоадов одного типа события.
+
+    Нормализатор под ValueType каждого разрешённого payload_type выбирается
+    один раз при компиляции, поэтому проверка события — это поиск в словаре
+    и вызов функции на каждый пэйлоад, без ветвления по имени типа.
+    """
+
+    __slots__ = ("event_type_id", "_normalizers")
+
+    def __init__(self, event_type_id: int, allowed_payload_types: dict[int, str]):
+        self.event_type_id = event_type_id
+        self._normalizers = {
+            payload_type_id: _compile_normalizer(data_type, payload_type_id)
+            for payload_type_id, data_type in allowed_payload_types.items()
+        }
+
+    def validate(self, payloads: dict[int, str]) -> list[tuple[int, str]]:
+        normalized_payloads: list[tuple[int, str]] = []
+        for payload_type_id, value in payloads.items():
+            normalize = self._normalizers.get(payload_type_id)
+            if normalize is None:
+                raise EventValidationError(
+                    f"Payload type {payload_type_id} is not allowed "
+                    f"for event_type_id={self.event_type_id}"
+                )
+            normalized_payloads.append((payload_type_id, normalize(value)))
+        return normalized_payloads
+
+
+def compile_event_validators(
+    event_schemas: dict[int, dict[int, str]],
+) -> dict[int, EventValidator]:
+    return {
+        event_type_id: EventValidator(event_type_id, allowed_payload_types)
+        for event_type_id, allowed_payload_types in event_schemas.items()
+    }
+
+
+async def resolve_client_ids(
+    db: AsyncSession, idents: Iterable[str]
+) -> dict[str, CachedClient]:
+    """
+    Переводит строковые ident клиентов в их id и день создания.
+
+    Сначала смотрит в client_id_cache, оставшиеся ident добирает одним
+    SELECT ... IN и запоминает результат — и найденные, и отсутствующие.
+    """
+    result, unresolved = client_id_cache.lookup(set(idents))
+    if not unresolved:
+        return result
+    rows = (
+        await db.execute(
+            select(
+                models.ClientId.ident,
+                models.ClientId.id,
+                models.ClientId.creation_date,
+            ).where(models.ClientId.ident.in_(unresolved))
+        )
+    ).all()
+    for row in rows:
+        client = CachedClient(int(row.id), row.creation_date.date())
+        client_id_cache.put(str(row.ident), *client)
+        result[str(row.ident)] = client
+    for ident in unresolved.difference(result):
+        client_id_cache.put_missing(ident)
+    return result
+
+
+async def get_event_schemas(
+    db: AsyncSession, event_type_ids: Optional[Iterable[int]] = None
+) -> dict[int, dict[int, str]]:
+    """
+    Возвращает схему разрешённых пэйлоадов для каждого существующего типа события.
+
+    Args:
+        db: Сессия базы данных;
+        event_type_ids: Ограничить выборку этими типами. None — загрузить все.
+
+    Returns:
+        {event_type_id: {payload_type_id: value_type_name}}. Типы событий,
+        которых нет в БД, в словарь не попадают.
+    """
+    statement = select(models.EventType.id)
+    if event_type_ids is not None:
+        unique_ids = set(event_type_ids)
+        if not unique_ids:
+            return {}
+        statement = statement.where(models.EventType.id.in_(unique_ids))
+
+    existing = (await db.execute(statement)).scalars()
+    result: dict[int, dict[int, str]] = {int(et_id): {} for et_id in existing}
+    if not result:
+        return result
+
+    allowed_rows = (
+        await db.execute(
+            select(
+                models.AllowedPayload.event_type_id,
+                models.PayloadType.id,
+                models.ValueType.name,
+            )
+            .join(
+                models.AllowedPayload,
+                models.AllowedPayload.payload_type_id == models.PayloadType.id,
+            )
+            .join(
+                models.ValueType,
+                models.ValueType.id == models.PayloadType.value_type_id,
+            )
+            .where(models.AllowedPayload.event_type_id.in_(result.keys()))
+        )
+    ).all()
+    for row in allowed_rows:
+        result[int(row.event_type_id)][int(row.id)] = str(row.name)
+    return result
+
+
+def build_pending_event(
+    data: schemas.EventCreateRequest,
+    client_ids: dict[str, CachedClient],
+    validators: Mapping[int, EventValidator],
+    trigger_time: datetime,
+) -> PendingEvent:
+    """Проверяет событие по заранее загруженным справочникам и нормализует пэйлоады."""
+    client = client_ids.get(data.ident)
+    if client is None:
+        raise EventValidationError(f"Unknown client ident={data.ident}")
+
+    validator = validators.get(data.event_type_id)
+    if validator is None:
+        raise EventValidationError(f"Unknown event_type_id={data.event_type_id}")
+
+    return PendingEvent(
+        client_id=client.id,
+        event_type_id=data.event_type_id,
+        trigger_time=trigger_time,
+        payloads=validator.validate(data.payloads),
+        client_first_seen=client.first_seen,
+    )
+
+
+# payload_type_id -> имя ValueType для типизированных колонок пэйлоадов.
+# Загружается при первой записи и сбрасывается вместе с каталогом схемы событий.
+_payload_value_types: dict[int, str] = {}
+
+
+async def get_payload_value_types(
+    db: AsyncSession | AsyncConnection,
+    payload_type_ids: Iterable[int] = (),
+) -> dict[int, str]:
+    """
+    Типы значений пэйлоадов; перечитывает справочник, если какого-то
+    из payload_type_ids в нём ещё нет.
+    """
+    global _payload_value_types
+    if _payload_value_types and _payload_value_types.keys() >= set(payload_type_ids):
+        return _payload_value_types
+    rows = await db.execute(
+        select(models.PayloadType.id, models.ValueType.name).join(
+            models.ValueType,
+            models.ValueType.id == models.PayloadType.value_type_id,
+        )
+    )
+    _payload_value_types = {int(row.id): str(row.name) for row in rows}
+    return _payload_value_types
+
+
+def reset_payload_value_types() -> None:
+    _payload_value_types.clear()
+
+
+_BOOL_VALUES = {"true": True, "1": True, "false": False, "0": False}
+
+
+def typed_payload_value(
+    data_type: Optional[str], value: str
+) -> tuple[Optional[int], Optional[bool]]:
+    """
+    Значения колонок value_int и value_bool для пэйлоада.
+
+    Нераспознанное значение даёт NULL: в value всегда остаётся исходная строка.
+    """
+    if data_type == "int":
+        try:
+            return int(value), None
+        except ValueError:
+            return None, None
+    if data_type == "bool":
+        return None, _BOOL_VALUES.get(value.strip().lower())
+    return None, None
+
+
+def _payload_type_ids(events: Iterable[PendingEvent]) -> set[int]:
+    return {type_id for event in events for type_id, _ in event.payloads}
+
+
+async def _client_first_seen(
+    db: AsyncSession | AsyncConnection, events: Sequence[PendingEvent]
+) -> list[Optional[date]]:
+    """
+    events.client_first_seen для каждого события.
+
+    Ингест получает день из client_id_cache вместе с id клиента; в БД
+    запрашиваются только события без него (спул, миграции, CLI).
+    """
+    unknown = {event.client_id for event in events if event.client_first_seen is None}
+    known = await get_client_first_seen(db, unknown) if unknown else {}
+    return [event.client_first_seen or known.get(event.client_id) for event in events]
+
+
+# orm — INSERT событий и INSERT пэйлоадов (любая СУБД);
+# statement — один CTE-запрос (PostgreSQL); copy — COPY (PostgreSQL).
+type InsertMethod = Literal["orm", "statement", "copy"]
+
+# Событие и все его пэйлоады за один запрос: id событий берутся из sequence
+# заранее, поэтому пэйлоады связываются с событием по порядковому номеру
+# во входных массивах, а не по порядку RETURNING (он не гарантирован).
+_PG_INSERT_EVENTS = text(
+    """
+    WITH input AS MATERIALIZED (
+        SELECT
+            nextval('events_id_seq') AS id,
+            e.ord,
+            e.client_id,
+            e.event_type_id,
+            e.trigger_time,
+            e.client_first_seen
+        FROM unnest(:client_ids, :event_type_ids, :trigger_times, :client_first_seen) WITH ORDINALITY AS e(client_id, event_type_id, trigger_time, client_first_seen, ord)
+    ),
+    inserted_events AS (
+        INSERT INTO events (id, client_id, event_type_id, trigger_time, client_first_seen)
+        SELECT id, client_id, event_type_id, trigger_time, client_first_seen FROM input
+        RETURNING id
+    ),
+    inserted_payloads AS (
+        INSERT INTO payloads (event_id, type_id, value, value_int, value_bool, trigger_time)
+        SELECT input.id, p.type_id, p.value, p.value_int, p.value_bool, input.trigger_time
+        FROM unnest(:payload_event_ords, :payload_type_ids, :payload_values, :payload_value_ints, :payload_value_bools)
+            AS p(event_ord, type_id, value, value_int, value_bool)
+        JOIN input ON input.ord = p.event_ord
+        RETURNING 1
+    )
+    SELECT id FROM input ORDER BY ord
+    """
+).bindparams(
+    bindparam("client_ids", type_=ARRAY(Integer)),
+    bindparam("event_type_ids", type_=ARRAY(Integer)),
+    bindparam("trigger_times", type_=ARRAY(DateTime)),
+    bindparam("client_first_seen", type_=ARRAY(Date)),
+    bindparam("payload_event_ords", type_=ARRAY(Integer)),
+    bindparam("payload_type_ids", type_=ARRAY(Integer)),
+    bindparam("payload_values", type_=ARRAY(String)),
+    bindparam("payload_value_ints", type_=ARRAY(BigInteger)),
+    bindparam("payload_value_bools", type_=ARRAY(Boolean)),
+)
+
+
+def _as_naive_utc(value: datetime) -> datetime:
+    """events.trigger_time — timestamp without time zone: храним UTC без tzinfo."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+async def _insert_events_pg(
+    db: AsyncSession, events: Sequence[PendingEvent]
+) -> list[int]:
+    value_types = await get_payload_value_types(db, _payload_type_ids(events))
+    payload_event_ords: list[int] = []
+    payload_type_ids: list[int] = []
+    payload_values: list[str] = []
+    payload_value_ints: list[Optional[int]] = []
+    payload_value_bools: list[Optional[bool]] = []
+    for ord_, event in enumerate(events, start=1):
+        for type_id, value in event.payloads:
+            value_int, value_bool = typed_payload_value(value_types.get(type_id), value)
+            payload_event_ords.append(ord_)
+            payload_type_ids.append(type_id)
+            payload_values.append(value)
+            payload_value_ints.append(value_int)
+            payload_value_bools.append(value_bool)
+
+    result = await db.execute(
+        _PG_INSERT_EVENTS,
+        {
+            "client_ids": [event.client_id for event in events],
+            "event_type_ids": [event.event_type_id for event in events],
+            "trigger_times": [_as_naive_utc(event.trigger_time) for event in events],
+            "client_first_seen": await _client_first_seen(db, events),
+            "payload_event_ords": payload_event_ords,
+            "payload_type_ids": payload_type_ids,
+            "payload_values": payload_values,
+            "payload_value_ints": payload_value_ints,
+            "payload_value_bools": payload_value_bools,
+        },
+    )
+    return [int(event_id) for event_id in result.scalars()]
+
+
+async def insert_event_rows(
+    db: AsyncSession | AsyncConnection, events: Sequence[PendingEvent]
+) -> list[int]:
+    """Два многострочных INSERT (события, затем пэйлоады) без commit. Работает на любой СУБД."""
+    first_seen = await _client_first_seen(db, events)
+    event_ids = list(
+        (
+            await db.execute(
+                insert(models.Event).returning(
+                    models.Event.id, sort_by_parameter_order=True
+                ),
+                [
+                    {
+                        "client_id": event.client_id,
+                        "event_type_id": event.event_type_id,
+                        "trigger_time": _as_naive_utc(event.trigger_time),
+                        "client_first_seen": event_first_seen,
+                    }
+                    for event, event_first_seen in zip(events, first_seen)
+                ],
+            )
+        ).scalars()
+    )
+
+    value_types = await get_payload_value_types(db, _payload_type_ids(events))
+    payload_rows = []
+    for event_id, event in zip(event_ids, events):
+        for type_id, value in event.payloads:
+            value_int, value_bool = typed_payload_value(value_types.get(type_id), value)
+            payload_rows.append(
+                {
+                    "event_id": event_id,
+                    "type_id": type_id,
+                    "value": value,
+                    "value_int": value_int,
+                    "value_bool": value_bool,
+                    "trigger_time": _as_naive_utc(event.trigger_time),
+                }
+            )
+    if payload_rows:
+        await db.execute(insert(models.Payload), payload_rows)
+    return event_ids
+
+
+# Сколько событий за раз проводить через COPY: ограничивает память под
+# зарезервированные id и размер одного COPY.
+COPY_CHUNK_SIZE = 50_000
+
+# Начиная с этого размера пачки на PostgreSQL выгоднее COPY, чем CTE-запрос
+COPY_MIN_EVENTS = 1_000
+
+_PG_RESERVE_EVENT_IDS = text(
+    "SELECT nextval('events_id_seq') FROM generate_series(1, :count)"
+)
+
+
+async def copy_events(
+    conn: AsyncConnection,
+    events: Iterable[PendingEvent],
+    chunk_size: int = COPY_CHUNK_SIZE,
+) -> list[int]:
+    """
+    Пишет события и пэйлоады через COPY (asyncpg copy_records_to_table). Только PostgreSQL.
+
+    Для каждой пачки сначала резервируются id событий из sequence — так
+    пэйлоады ссылаются на события без RETURNING, а конкурентные INSERT
+    не пересекаются с загрузкой. id пэйлоадов проставляет DEFAULT колонки.
+    Транзакцией управляет вызывающий код.
+
+    Returns:
+        id записанных событий в порядке входной последовательности.
+    """
+    event_ids: list[int] = []
+    chunk: list[PendingEvent] = []
+    for event in events:
+        chunk.append(event)
+        if len(chunk) >= chunk_size:
+            event_ids.extend(await _copy_events_chunk(conn, chunk))
+            chunk = []
+    if chunk:
+        event_ids.extend(await _copy_events_chunk(conn, chunk))
+    return event_ids
+
+
+async def _copy_events_chunk(
+    conn: AsyncConnection, events: Sequence[PendingEvent]
+) -> list[int]:
+    # Резервирование идёт через SQLAlchemy: оно же открывает транзакцию
+    # на соединении, внутри которой затем выполняется COPY драйвера.
+    event_ids = [
+        int(event_id)
+        for event_id in (
+            await conn.execute(_PG_RESERVE_EVENT_IDS, {"count": len(events)})
+        ).scalars()
+    ]
+    value_types = await get_payload_value_types(conn, _payload_type_ids(events))
+    first_seen = await _client_first_seen(conn, events)
+    raw = (await conn.get_raw_connection()).driver_connection
+
+    await raw.copy_records_to_table(
+        models.Event.__tablename__,
+        records=[
+            (
+                event_id,
+                event.client_id,
+                event.event_type_id,
+                _as_naive_utc(event.trigger_time),
+                event_first_seen,
+            )
+            for event_id, event, event_first_seen in zip(event_ids, events, first_seen)
+        ],
+        columns=[
+            "id",
+            "client_id",
+            "event_type_id",
+            "trigger_time",
+            "client_first_seen",
+        ],
+    )
+    payload_records = [
+        (
+            event_id,
+            type_id,
+            value,
+            *typed_payload_value(value_types.get(type_id), value),
+            _as_naive_utc(event.trigger_time),
+        )
+        for event_id, event in zip(event_ids, events)
+        for type_id, value in event.payloads
+    ]
+    if payload_records:
+        await raw.copy_records_to_table(
+            models.Payload.__tablename__,
+            records=payload_records,
+            columns=[
+                "event_id",
+                "type_id",
+                "value",
+                "value_int",
+                "value_bool",
+                "trigger_time",
+            ],
+        )
+    return event_ids
+
+
+def choose_insert_method(db: AsyncSession, count: int) -> InsertMethod:
+    if not is_postgresql(db):
+        return "orm"
+    return "copy" if count >= COPY_MIN_EVENTS else "statement"
+
+
+async def write_events(
+    db: AsyncSession,
+    events: Sequence[PendingEvent],
+    method: Optional[InsertMethod] = None,
+) -> list[int]:
+    """
+    Пишет события и пэйлоады в текущей транзакции сессии, без commit.
+
+    На PostgreSQL небольшие пачки уходят одним запросом (CTE с INSERT),
+    крупные — через COPY; на остальных СУБД — двумя многострочными INSERT.
+
+    Args:
+        db: Сессия базы данных;
+        events: Провалидированные события;
+        method: Принудительно выбрать путь записи. None — по диалекту и размеру пачки.
+
+    Returns:
+        id вставленных событий в порядке входной последовательности.
+    """
+    if not events:
+        return []
+    if method is None:
+        method = choose_insert_method(db, len(events))
+
+    if method == "copy":
+        return await copy_events(await db.connection(), events)
+    if method == "statement":
+        return await _insert_events_pg(db, events)
+    return await insert_event_rows(db, events)
+
+
+async def insert_events(
+    db: AsyncSession,
+    events: Sequence[PendingEvent],
+    method: Optional[InsertMethod] = None,
+) -> list[int]:
+    """Записывает события через write_events и фиксирует транзакцию."""
+    if not events:
+        return []
+    try:
+        event_ids = await write_events(db, events, method)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return event_ids
@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Literal, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+ExportFormat = Literal["ndjson", "csv"]
+
+# Строк курсора за одно обращение к БД и событий в одном чанке ответа
+EXPORT_FETCH_SIZE = 2_000
+EXPORT_CHUNK_EVENTS = 500
+EXPORT_CSV_COLUMNS = ("id", "trigger_time", "event_type", "client", "payloads")
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@dataclass
+class ExportedEvent:
+    id: int
+    trigger_time: datetime
+    event_type: str
+    client: str
+    payloads: dict[str, str] = field(default_factory=dict)
+
+
+async def iter_export_events(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    event_type_id: Optional[int] = None,
+) -> AsyncIterator[ExportedEvent]:
+    """
+    События за [start, end) вместе с пэйлоадами в порядке trigger_time, id.
+
+    Строки читаются серверным курсором по EXPORT_FETCH_SIZE, поэтому
+    в памяти держится одна пачка независимо от размера окна. Пэйлоады
+    присоединяются LEFT JOIN: строки одного события идут подряд и
+    собираются в одно ExportedEvent.
+    """
+    filters = [
+        models.Event.trigger_time >= start,
+        models.Event.trigger_time < end,
+    ]
+    if event_type_id is not None:
+        filters.append(models.Event.event_type_id == event_type_id)
+    statement = (
+        select(
+            models.Event.id,
+            models.Event.trigger_time,
+            models.EventType.code_name.label("event_type"),
+            models.ClientId.ident.label("client"),
+            models.PayloadType.code_name.label("payload_type"),
+            models.Payload.value,
+        )
+        .join(models.EventType, models.EventType.id == models.Event.event_type_id)
+        .join(models.ClientId, models.ClientId.id == models.Event.client_id)
+        .outerjoin(models.Payload, models.Payload.event_id == models.Event.id)
+        .outerjoin(models.PayloadType, models.PayloadType.id == models.Payload.type_id)
+        .where(*filters)
+        .order_by(models.Event.trigger_time, models.Event.id, models.Payload.id)
+        .execution_options(yield_per=EXPORT_FETCH_SIZE)
+    )
+
+    current: Optional[ExportedEvent] = None
+    result = await db.stream(statement)
+    async for row in result:
+        if current is None or current.id != row.id:
+            if current is not None:
+                yield current
+            current = ExportedEvent(
+                row.id, row.trigger_time, row.event_type, row.client
+            )
+        if row.payload_type is not None:
+            current.payloads[row.payload_type] = row.value
+    if current is not None:
+        yield current
+
+
+def _ndjson_line(event: ExportedEvent) -> str:
+    return json.dumps(
+        {
+            "id": event.id,
+            "trigger_time": event.trigger_time.isoformat(),
+            "event_type": event.event_type,
+            "client": event.client,
+            "payloads": event.payloads,
+        },
+        ensure_ascii=False,
+    )
+
+
+async def export_chunks(
+    events: AsyncIterator[ExportedEvent], export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """
+    Сериализует события в NDJSON или CSV чанками по EXPORT_CHUNK_EVENTS.
+
+    В CSV пэйлоады события лежат одной колонкой JSON-объектом: набор
+    пэйлоадов зависит от типа события.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if export_format == "csv":
+        writer.writerow(EXPORT_CSV_COLUMNS)
+
+    pending = 0
+    async for event in events:
+        if export_format == "csv":
+            writer.writerow(
+                (
+                    event.id,
+                    event.trigger_time.isoformat(),
+                    event.event_type,
+                    event.client,
+                    json.dumps(event.payloads, ensure_ascii=False),
+                )
+            )
+        else:
+            buffer.write(_ndjson_line(event))
+            buffer.write("\n")
+        pending += 1
+        if pending >= EXPORT_CHUNK_EVENTS:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,45 @@
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import Date, func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app import models
+
+# Размер списка client_id в одном IN (...)
+_CLIENT_CHUNK = 5_000
+
+
+def client_first_seen_day():
+    """
+    День создания клиента события для подсчёта новых посетителей.
+
+    Берётся из events.client_first_seen, поэтому запрос статистики читает
+    одну таблицу. У событий, записанных до появления колонки и ещё не
+    заполненных `stat-api db backfill-client-first-seen`, день считается
+    коррелированным подзапросом к client_ids: COALESCE вычисляет его только
+    для таких строк.
+    """
+    return func.coalesce(
+        models.Event.client_first_seen,
+        select(func.date(models.ClientId.creation_date, type_=Date))
+        .where(models.ClientId.id == models.Event.client_id)
+        .scalar_subquery(),
+    )
+
+
+async def get_client_first_seen(
+    db: AsyncSession | AsyncConnection, client_ids: Iterable[int]
+) -> dict[int, date]:
+    """День создания для каждого из client_ids (один запрос на _CLIENT_CHUNK клиентов)."""
+    ids = sorted(set(client_ids))
+    result: dict[int, date] = {}
+    for offset in range(0, len(ids), _CLIENT_CHUNK):
+        rows = await db.execute(
+            select(
+                models.ClientId.id,
+                func.date(models.ClientId.creation_date, type_=Date).label("day"),
+            ).where(models.ClientId.id.in_(ids[offset : offset + _CLIENT_CHUNK]))
+        )
+        result.update({row.id: row.day for row in rows})
+    return result
@@ -1,49 +1,50 @@
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
 
-from sqlalchemy import String, bindparam, case, cast, distinct, func, select, true
+from sqlalchemy import (
+    distinct,
+    func,
+    null,
+    select,
+    true,
+    tuple_,
+    union_all,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
-from app.constants import (
-    PAYLOAD_TYPE_AUDITORY_ID,
-    PAYLOAD_TYPE_END_ID,
-    PAYLOAD_TYPE_START_ID,
-    PAYLOAD_TYPE_SUCCESS_ID,
+from app.database import is_postgresql
+from app.handlers.period import (
+    event_filters,
+    period_bucket,
+    unique_visitor_expression,
 )
+from app.handlers.popular import audience_weights_statement
+from app.handlers.rollup import (
+    RollupStats,
+    aggregate_rollup_stats,
+    get_rollup_stats,
+    rollup_split,
+)
+from app.services.event_cube import get_event_cube
 
 
-def _period_expression(period_type: str):
-    trigger_time = cast(models.Event.trigger_time, String)
-    if period_type == "day":
-        return func.substr(trigger_time, 1, 10)
-    if period_type == "month":
-        return func.substr(trigger_time, 1, 7)
-    if period_type == "year":
-        return func.substr(trigger_time, 1, 4)
-    raise ValueError("period_type должен быть одним из: day, month, year")
-
-
-def _unique_visitor_expression(period_type: str, period):
-    client_creation = cast(models.ClientId.creation_date, String)
-    if period_type == "day":
-        client_period = func.substr(client_creation, 1, 10)
-    elif period_type == "month":
-        client_period = func.substr(client_creation, 1, 7)
-    elif period_type == "year":
-        client_period = func.substr(client_creation, 1, 4)
-    else:
-        raise ValueError("period_type должен быть одним из: day, month, year")
-    return case(
-        (
-            client_period == period,
-            models.Event.client_id,
-        ),
-        else_=None,
-    )
+def _cube_stats(
+    period_type: str, start: datetime, end: datetime, event_type_id: Optional[int]
+) -> Optional[RollupStats]:
+    # Окна внутри колоночной копии событий считаются в памяти, без БД
+    cube = get_event_cube()
+    if cube is None:
+        return None
+    stats = cube.window_stats(period_type, start, end, event_type_id)
+    return RollupStats(*stats) if stats is not None else None
 
 
-def _format_period(period_type: str, period: str) -> str:
+def _format_period(period_type: str, period: str | datetime) -> str:
+    # date_trunc возвращает timestamp, на SQLite период — префикс строки
+    if not isinstance(period, str):
+        return period.strftime("%Y-%m-%d")
     if period_type == "day":
         return period
     if period_type == "month":
@@ -57,34 +58,11 @@ async def get_popular_audiences(
     db: AsyncSession,
     limit: int = 100,
 ) -> list[schemas.PopularAudience]:
-    success_event_ids = (
-        select(models.Payload.event_id)
-        .where(models.Payload.type_id == PAYLOAD_TYPE_SUCCESS_ID)
-        .where(func.lower(models.Payload.value) == "true")
-    )
-    weight = case(
-        (models.Payload.type_id == PAYLOAD_TYPE_AUDITORY_ID, 1),
-        (models.Payload.type_id.in_([PAYLOAD_TYPE_START_ID, PAYLOAD_TYPE_END_ID]), 3),
-        else_=0,
-    )
+    weights = audience_weights_statement().subquery()
     rows = (
         await db.execute(
-            select(
-                models.Payload.value.label("auditory_id"),
-                func.sum(weight).label("total_weight"),
-            )
-            .where(
-                models.Payload.type_id.in_(
-                    [
-                        PAYLOAD_TYPE_AUDITORY_ID,
-                        PAYLOAD_TYPE_START_ID,
-                        PAYLOAD_TYPE_END_ID,
-                    ]
-                )
-            )
-            .where(models.Payload.event_id.in_(success_event_ids))
-            .group_by(models.Payload.value)
-            .order_by(func.sum(weight).desc())
+            select(weights.c.auditory_id, weights.c.total_weight)
+            .order_by(weights.c.total_weight.desc(), weights.c.auditory_id)
             .limit(limit)
         )
     ).all()
@@ -104,32 +82,46 @@ async def get_period_stats(
     start: datetime,
     end: datetime,
     event_type_id: Optional[int] = None,
+    approximate: bool = False,
 ) -> list[schemas.Statistics]:
-    period = _period_expression(period_type).label("period")
-    event_type_id_param = bindparam("event_type_id", value=event_type_id)
-    unique_visitor = _unique_visitor_expression(period_type, period)
+    cube_stats = _cube_stats(period_type, start, end, event_type_id)
+    if cube_stats is not None:
+        return cube_stats.periods
 
-    statement = (
-        select(
-            period,
-            func.count().label("all_visits"),
-            func.count(distinct(models.Event.client_id)).label("visitor_count"),
-            func.count(distinct(unique_visitor)).label("unique_visitors"),
-        )
-        .join(models.ClientId, models.ClientId.id == models.Event.client_id)
-        .where(models.Event.trigger_time >= start)
-        .where(models.Event.trigger_time < end)
-        .where(
-            (event_type_id_param.is_(None))
-            | (models.Event.event_type_id == event_type_id_param)
+    # Закрытые дни окна считаются по дневной сводке, по events — только остаток.
+    # approximate без сводки игнорируется: запрос по events и так точный
+    split = await rollup_split(db, start, end)
+    if split is not None:
+        stats = await get_rollup_stats(
+            db,
+            period_type,
+            start,
+            split,
+            end,
+            event_type_id,
+            approximate,
+            with_totals=False,
         )
+        return stats.periods
+
+    postgresql = is_postgresql(db)
+    period = period_bucket(period_type, models.Event.trigger_time, postgresql).label(
+        "period"
     )
+    unique_visitor = unique_visitor_expression(period_type, period, postgresql)
+
+    statement = select(
+        period,
+        func.count().label("all_visits"),
+        func.count(distinct(models.Event.client_id)).label("visitor_count"),
+        func.count(distinct(unique_visitor)).label("unique_visitors"),
+    ).where(*event_filters(start, end, event_type_id))
     statement = statement.group_by(period).order_by(period)
 
     rows = (await db.execute(statement)).all()
     return [
         schemas.Statistics(
-            period=_format_period(period_type, str(row.period)),
+            period=_format_period(period_type, row.period),
             all_visits=int(row.all_visits or 0),
             visitor_count=int(row.visitor_count or 0),
             unique_visitors=int(row.unique_visitors or 0),
@@ -144,17 +136,26 @@ async def get_aggregated_stats(
     start: datetime,
     end: datetime,
     event_type_id: Optional[int] = None,
+    approximate: bool = False,
 ) -> schemas.AggregatedStatistics:
-    period = _period_expression(period_type).label("period")
-    event_type_id_param = bindparam("event_type_id", value=event_type_id)
+    cube_stats = _cube_stats(period_type, start, end, event_type_id)
+    if cube_stats is not None:
+        return aggregate_rollup_stats(cube_stats)
 
-    base_filters = (
-        models.Event.trigger_time >= start,
-        models.Event.trigger_time < end,
-        (event_type_id_param.is_(None))
-        | (models.Event.event_type_id == event_type_id_param),
+    split = await rollup_split(db, start, end)
+    if split is not None:
+        return aggregate_rollup_stats(
+            await get_rollup_stats(
+                db, period_type, start, split, end, event_type_id, approximate
+            )
+        )
+
+    postgresql = is_postgresql(db)
+    period = period_bucket(period_type, models.Event.trigger_time, postgresql).label(
+        "period"
     )
-    unique_visitor = _unique_visitor_expression(period_type, period)
+    base_filters = event_filters(start, end, event_type_id)
+    unique_visitor = unique_visitor_expression(period_type, period, postgresql)
 
     period_stats = (
         select(
@@ -163,7 +164,6 @@ async def get_aggregated_stats(
             func.count(distinct(models.Event.client_id)).label("visitor_count"),
             func.count(distinct(unique_visitor)).label("unique_visitors"),
         )
-        .join(models.ClientId, models.ClientId.id == models.Event.client_id)
         .where(*base_filters)
         .group_by(period)
         .cte("period_stats")
@@ -173,7 +173,6 @@ async def get_aggregated_stats(
             func.count(distinct(models.Event.client_id)).label("total_visitor_count"),
             func.count(distinct(unique_visitor)).label("total_unique_visitors"),
         )
-        .join(models.ClientId, models.ClientId.id == models.Event.client_id)
         .where(*base_filters)
         .cte("global_stats")
     )
@@ -220,3 +219,146 @@ async def get_aggregated_stats(
         avg_unique_visitors_per_day=float(row.avg_unique_visitors_per_period or 0),
         entries_analized=int(row.entries_analyzed or 0),
     )
+
+
+@dataclass
+class WindowStats:
+    """Статистика окна по периодам вместе со сводными показателями."""
+
+    periods: list[schemas.Statistics]
+    aggregated: schemas.AggregatedStatistics
+
+
+async def get_window_stats(
+    db: AsyncSession,
+    period_type: str,
+    start: datetime,
+    end: datetime,
+    event_type_ids: Iterable[Optional[int]],
+    approximate: bool = False,
+) -> dict[Optional[int], WindowStats]:
+    """
+    Статистика окна сразу для нескольких типов событий (None — все типы).
+
+    Окно внутри колоночной копии событий или покрытое дневной сводкой
+    считается по ним для каждого типа.
+    Иначе различных посетителей считает сама БД одним запросом: по типу
+    и периоду, по типу за всё окно и то же без типа для None. На PostgreSQL
+    это GROUPING SETS за одно чтение events, на SQLite — UNION ALL
+    группировок. Совпадает с get_period_stats и get_aggregated_stats
+    по каждому типу.
+    """
+    requested = set(event_type_ids)
+    cube_stats = {
+        event_type_id: _cube_stats(period_type, start, end, event_type_id)
+        for event_type_id in requested
+    }
+    if all(stats is not None for stats in cube_stats.values()):
+        return {
+            event_type_id: WindowStats(stats.periods, aggregate_rollup_stats(stats))
+            for event_type_id, stats in cube_stats.items()
+        }
+
+    split = await rollup_split(db, start, end)
+    if split is not None:
+        result = {}
+        for event_type_id in requested:
+            stats = await get_rollup_stats(
+                db, period_type, start, split, end, event_type_id, approximate
+            )
+            result[event_type_id] = WindowStats(
+                stats.periods, aggregate_rollup_stats(stats)
+            )
+        return result
+
+    postgresql = is_postgresql(db)
+    period = period_bucket(period_type, models.Event.trigger_time, postgresql).label(
+        "period"
+    )
+    event_type = models.Event.event_type_id
+    unique_visitor = unique_visitor_expression(period_type, period, postgresql)
+    counts = (
+        func.count().label("all_visits"),
+        func.count(distinct(models.Event.client_id)).label("visitor_count"),
+        func.count(distinct(unique_visitor)).label("unique_visitors"),
+    )
+    filters = [
+        models.Event.trigger_time >= start,
+        models.Event.trigger_time < end,
+    ]
+    if None not in requested:
+        filters.append(event_type.in_(requested))
+
+    # Группировки (по типу, по периоду): строка без периода — итог окна,
+    # строка без типа — все типы
+    groupings = []
+    if requested - {None}:
+        groupings += [(True, True), (True, False)]
+    if None in requested:
+        groupings += [(False, True), (False, False)]
+    if postgresql:
+        # Без группировок по типу тип в SELECT не входит в GROUP BY
+        type_column = event_type if groupings[0][0] else null().label("event_type_id")
+        statement = (
+            select(type_column, period, *counts)
+            .where(*filters)
+            .group_by(
+                func.grouping_sets(
+                    *(
+                        tuple_(
+                            *([event_type] if by_type else []),
+                            *([period] if by_period else []),
+                        )
+                        for by_type, by_period in groupings
+                    )
+                )
+            )
+        )
+    else:
+        statement = union_all(
+            *(
+                select(
+                    event_type if by_type else null().label("event_type_id"),
+                    period if by_period else null().label("period"),
+                    *counts,
+                )
+                .where(*filters)
+                .group_by(
+                    *([event_type] if by_type else []),
+                    *([period] if by_period else []),
+                )
+                for by_type, by_period in groupings
+            )
+        )
+
+    periods: dict[Optional[int], dict] = {
+        event_type_id: {} for event_type_id in requested
+    }
+    totals: dict[Optional[int], tuple[int, int]] = {}
+    for row in await db.execute(statement):
+        by_period = periods.get(row.event_type_id)
+        if by_period is None:
+            continue
+        if row.period is None:
+            totals[row.event_type_id] = (
+                int(row.visitor_count or 0),
+                int(row.unique_visitors or 0),
+            )
+        else:
+            by_period[row.period] = schemas.Statistics(
+                period=_format_period(period_type, row.period),
+                all_visits=int(row.all_visits),
+                visitor_count=int(row.visitor_count),
+                unique_visitors=int(row.unique_visitors),
+            )
+
+    result = {}
+    for event_type_id, by_period in periods.items():
+        stats = RollupStats(
+            [by_period[key] for key in sorted(by_period)],
+            *totals.get(event_type_id, (0, 0)),
+        )
+        result[event_type_id] = WindowStats(
+            stats.periods, aggregate_rollup_stats(stats)
+        )
+    return result
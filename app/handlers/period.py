@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, case, cast, func, literal_column
+
+from app import models
+from app.handlers.first_seen import client_first_seen_day
+
+
+# Длина префикса момента в ISO-формате, задающего период
+PERIOD_PREFIX_LENGTHS = {"day": 10, "month": 7, "year": 4}
+
+
+def period_bucket(period_type: str, column, postgresql: bool):
+    """
+    Период (день, месяц, год), в который попадает момент column.
+
+    На PostgreSQL — date_trunc по timestamp без приведения каждой строки
+    к тексту. SQLite хранит DateTime строкой ISO, поэтому период — префикс
+    этой строки без CAST: strftime там медленнее (см. stat-api bench
+    period-bucketing). Единица периода подставляется литералом: с
+    bind-параметром PostgreSQL не сочтёт выражения в SELECT и GROUP BY одинаковыми.
+    """
+    if period_type not in PERIOD_PREFIX_LENGTHS:
+        raise ValueError("period_type должен быть одним из: day, month, year")
+    if postgresql:
+        return func.date_trunc(literal_column(f"'{period_type}'"), column)
+    return func.substr(
+        column,
+        literal_column("1"),
+        literal_column(str(PERIOD_PREFIX_LENGTHS[period_type])),
+    )
+
+
+def client_period(period_type: str, postgresql: bool):
+    """Период дня создания клиента события, сравнимый с периодом trigger_time."""
+    first_seen = client_first_seen_day()
+    if postgresql:
+        # date_trunc от date вернул бы timestamptz, а период события — timestamp
+        first_seen = cast(first_seen, DateTime)
+    return period_bucket(period_type, first_seen, postgresql)
+
+
+def unique_visitor_expression(period_type: str, period, postgresql: bool):
+    return case(
+        (
+            client_period(period_type, postgresql) == period,
+            models.Event.client_id,
+        ),
+        else_=None,
+    )
+
+
+def event_filters(start: datetime, end: datetime, event_type_id: Optional[int]):
+    # Условие на тип добавляется только при заданном типе: выражение вида
+    # ":id IS NULL OR event_type_id = :id" не даёт использовать индекс
+    # (event_type_id, trigger_time)
+    filters = [
+        models.Event.trigger_time >= start,
+        models.Event.trigger_time < end,
+    ]
+    if event_type_id is not None:
+        filters.append(models.Event.event_type_id == event_type_id)
+    return filters
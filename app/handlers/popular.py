@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import case, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.constants import (
+    PAYLOAD_TYPE_AUDITORY_ID,
+    PAYLOAD_TYPE_END_ID,
+    PAYLOAD_TYPE_START_ID,
+    PAYLOAD_TYPE_SUCCESS_ID,
+)
+
+# Имя строки stats_rollup_state для рейтинга популярных аудиторий
+POPULAR_AUDIENCES = "popular_audiences"
+
+_AUDITORY_TYPE_IDS = [
+    PAYLOAD_TYPE_AUDITORY_ID,
+    PAYLOAD_TYPE_START_ID,
+    PAYLOAD_TYPE_END_ID,
+]
+
+
+@dataclass
+class PopularRefresh:
+    """Итог обновления рейтинга: диапазон событий и изменённые аудитории."""
+
+    after_event_id: int
+    until_event_id: int
+    updated: int
+
+
+def audience_weights_statement(
+    after_event_id: Optional[int] = None, until_event_id: Optional[int] = None
+):
+    """
+    Вес аудиторий по успешным событиям: 1 за аудиторию, 3 за начало/конец маршрута.
+
+    Границы (after_event_id, until_event_id] ограничивают события, по которым
+    считается вес, — для инкрементального обновления рейтинга.
+    """
+    event_range = []
+    if after_event_id is not None:
+        event_range.append(models.Payload.event_id > after_event_id)
+    if until_event_id is not None:
+        event_range.append(models.Payload.event_id <= until_event_id)
+
+    success_event_ids = (
+        select(models.Payload.event_id)
+        .where(models.Payload.type_id == PAYLOAD_TYPE_SUCCESS_ID)
+        .where(models.Payload.value_bool == true())
+        .where(*event_range)
+    )
+    weight = case(
+        (models.Payload.type_id == PAYLOAD_TYPE_AUDITORY_ID, 1),
+        (models.Payload.type_id.in_([PAYLOAD_TYPE_START_ID, PAYLOAD_TYPE_END_ID]), 3),
+        else_=0,
+    )
+    return (
+        select(
+            models.Payload.value.label("auditory_id"),
+            func.sum(weight).label("total_weight"),
+        )
+        .where(models.Payload.type_id.in_(_AUDITORY_TYPE_IDS))
+        .where(*event_range)
+        .where(models.Payload.event_id.in_(success_event_ids))
+        .group_by(models.Payload.value)
+    )
+
+
+async def refresh_popular_audiences(db: AsyncSession, today: date) -> PopularRefresh:
+    """
+    Добавляет к рейтингу вес событий после водяного знака.
+
+    Вес аддитивен, и событие нельзя учесть дважды, поэтому каждый запуск
+    берёт события до максимального id предыдущего запуска: транзакции,
+    получившие такие id, к этому времени уже закоммичены. При первом запуске
+    рейтинг строится по всем событиям.
+    """
+    current_max = (await db.execute(select(func.max(models.Event.id)))).scalar() or 0
+    state = await db.get(models.StatsRollupState, POPULAR_AUDIENCES)
+    if state is None:
+        state = models.StatsRollupState(
+            name=POPULAR_AUDIENCES,
+            rolled_until=today,
+            last_event_id=0,
+            seen_event_id=current_max,
+        )
+        db.add(state)
+    after, until = state.last_event_id, state.seen_event_id
+
+    rows = []
+    if until > after:
+        rows = (await db.execute(audience_weights_statement(after, until))).all()
+    weights = {str(row.auditory_id): int(row.total_weight or 0) for row in rows}
+    existing = {
+        item.auditory_id: item
+        for item in (
+            await db.execute(
+                select(models.PopularAudienceWeight).where(
+                    models.PopularAudienceWeight.auditory_id.in_(list(weights))
+                )
+            )
+        ).scalars()
+    }
+    for auditory_id, weight in weights.items():
+        if auditory_id in existing:
+            existing[auditory_id].total_weight += weight
+        else:
+            db.add(
+                models.PopularAudienceWeight(
+                    auditory_id=auditory_id, total_weight=weight
+                )
+            )
+
+    state.rolled_until = today
+    state.last_event_id, state.seen_event_id = until, current_max
+    await db.commit()
+    return PopularRefresh(after, until, len(weights))
+
+
+async def read_popular_audiences(
+    db: AsyncSession, limit: int = 100
+) -> Optional[list[schemas.PopularAudience]]:
+    """
+    Рейтинг из popular_audience_weights или None, пока он ни разу не построен.
+    """
+    state = await db.get(models.StatsRollupState, POPULAR_AUDIENCES)
+    if state is None or state.last_event_id == 0:
+        return None
+    weight = models.PopularAudienceWeight
+    rows = (
+        await db.execute(
+            select(weight.auditory_id, weight.total_weight)
+            .where(weight.total_weight > 0)
+            .order_by(weight.total_weight.desc(), weight.auditory_id)
+            .limit(limit)
+        )
+    ).all()
+    return [
+        schemas.PopularAudience(
+            auditory_id=row.auditory_id, total_weight=row.total_weight
+        )
+        for row in rows
+    ]
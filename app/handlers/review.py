@@ -1,8 +1,8 @@
 from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import Select
 from app import schemas, models
+from app.handlers.event import resolve_client_ids
 from app.helpers.errors import LookupException
 
 
@@ -13,13 +13,14 @@ async def insert_review(
     problem: schemas.Problem,
     text: str,
 ) -> schemas.Status:
-    client = (
-        await db.execute(Select(models.ClientId).filter_by(ident=client_id))
-    ).scalar_one_or_none()
-    if client is None:
+    client_ids = await resolve_client_ids(db, [client_id])
+    if client_id not in client_ids:
         raise LookupException("Client")
     item = models.Review(
-        image_name=image_name, client=client, problem_id=problem.__str__(), text=text
+        image_name=image_name,
+        client_id=client_ids[client_id].id,
+        problem_id=problem.__str__(),
+        text=text,
     )
     db.add(item)
     await db.commit()
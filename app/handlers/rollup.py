@@ -0,0 +1,512 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, distinct, func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.database import is_postgresql
+from app.handlers.first_seen import client_first_seen_day
+from app.handlers.period import (
+    event_filters,
+    period_bucket,
+    unique_visitor_expression,
+)
+from app.helpers.hll import HyperLogLog
+
+# event_type_id строк daily_event_stats, которые считают все типы вместе
+ROLLUP_ALL_EVENT_TYPES = 0
+# Имя строки stats_rollup_state для дневной сводки
+DAILY_ROLLUP = "daily"
+# Сколько новых дней задача досчитывает за один запуск (первичное заполнение
+# растягивается на несколько запусков вместо одной длинной транзакции)
+ROLLUP_MAX_DAYS_PER_RUN = 31
+# Сколько дней после конца сводки можно досчитать по сырым событиям;
+# при большем отставании запрос целиком идёт по events
+ROLLUP_MAX_RAW_DAYS = 2
+
+_PERIOD_TYPES = ("day", "month", "year")
+_NEW_SKETCHES = {
+    "day": models.DailyEventStats.new_on_day_sketch,
+    "month": models.DailyEventStats.new_in_month_sketch,
+    "year": models.DailyEventStats.new_in_year_sketch,
+}
+
+
+@dataclass
+class RollupRefresh:
+    """Итог обновления сводки: досчитанные новые дни и пересчитанные старые."""
+
+    rolled_days: list[date] = field(default_factory=list)
+    refreshed_days: list[date] = field(default_factory=list)
+
+
+@dataclass
+class RollupStats:
+    """Статистика по сводке: периоды и различные посетители за всё окно."""
+
+    periods: list[schemas.Statistics]
+    # None, если итоги окна не запрашивались (with_totals=False)
+    total_visitor_count: Optional[int]
+    total_unique_visitors: Optional[int]
+
+
+@dataclass
+class _Bucket:
+    visits: int = 0
+    visitors: int = 0
+    unique_visitors: int = 0
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def period_key(period_type: str, day: date) -> date | int:
+    """Ключ периода дня: сам день, первый день месяца или год."""
+    if period_type == "day":
+        return day
+    if period_type == "month":
+        return day.replace(day=1)
+    if period_type == "year":
+        return day.year
+    raise ValueError("period_type должен быть одним из: day, month, year")
+
+
+def _format_key(period_type: str, key: date | int) -> str:
+    if period_type == "year":
+        return f"{key}-01-01"
+    return key.isoformat()
+
+
+def _round(value: float) -> float:
+    # Как ROUND(x, 1) в SQL: половина округляется от нуля
+    return float(Decimal(str(value)).quantize(Decimal("0.1"), rounding=ROUND_HALF_UP))
+
+
+def _bucket_key(period_type: str, value: str | datetime) -> date | int:
+    # period_bucket на PostgreSQL — timestamp, на SQLite — префикс ISO-строки
+    if isinstance(value, str):
+        value = datetime.fromisoformat(f"{value}-01-01"[:10])
+    return period_key(period_type, value.date())
+
+
+async def _raw_day_visitors(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    event_type_id: Optional[int] = None,
+    by_type: bool = True,
+):
+    """События клиентов за [start, end), сгруппированные по клиенту (и типу)."""
+    columns = [models.Event.client_id]
+    if by_type:
+        columns.insert(0, models.Event.event_type_id)
+    statement = (
+        select(
+            *columns,
+            # День создания одинаков у всех событий клиента
+            func.max(client_first_seen_day()).label("first_seen"),
+            func.count().label("visits"),
+        )
+        .where(models.Event.trigger_time >= start)
+        .where(models.Event.trigger_time < end)
+        .group_by(*columns)
+    )
+    if event_type_id is not None:
+        statement = statement.where(models.Event.event_type_id == event_type_id)
+    return (await db.execute(statement)).all()
+
+
+@dataclass
+class _DayClients:
+    visits: int = 0
+    clients: set[int] = field(default_factory=set)
+    new_on_day: set[int] = field(default_factory=set)
+    new_in_month: set[int] = field(default_factory=set)
+    new_in_year: set[int] = field(default_factory=set)
+
+    def add(self, client_id: int, visits: int, flags: dict[str, bool]) -> None:
+        self.visits += visits
+        self.clients.add(client_id)
+        for name, value in flags.items():
+            if value:
+                getattr(self, name).add(client_id)
+
+    def stats_row(self, day: date, event_type_id: int) -> dict:
+        return {
+            "day": day,
+            "event_type_id": event_type_id,
+            "visits": self.visits,
+            "visitors": len(self.clients),
+            "new_visitors": len(self.new_on_day),
+            "visitors_sketch": _sketch(self.clients),
+            "new_on_day_sketch": _sketch(self.new_on_day),
+            "new_in_month_sketch": _sketch(self.new_in_month),
+            "new_in_year_sketch": _sketch(self.new_in_year),
+        }
+
+
+def _sketch(client_ids: set[int]) -> bytes:
+    return HyperLogLog().update(client_ids).to_bytes()
+
+
+async def rebuild_day(db: AsyncSession, day: date) -> None:
+    """Пересчитывает сводку за день по сырым событиям."""
+    rows = await _raw_day_visitors(db, _day_start(day), _day_start(day + timedelta(1)))
+
+    by_type: dict[int, _DayClients] = {}
+    all_types = _DayClients()
+    for row in rows:
+        created = row.first_seen
+        flags = {
+            "new_on_day": created == day,
+            "new_in_month": (created.year, created.month) == (day.year, day.month),
+            "new_in_year": created.year == day.year,
+        }
+        by_type.setdefault(row.event_type_id, _DayClients()).add(
+            row.client_id, row.visits, flags
+        )
+        all_types.add(row.client_id, row.visits, flags)
+    if rows:
+        by_type[ROLLUP_ALL_EVENT_TYPES] = all_types
+
+    await db.execute(
+        delete(models.DailyEventStats).where(models.DailyEventStats.day == day)
+    )
+    if by_type:
+        await db.execute(
+            insert(models.DailyEventStats),
+            [
+                clients.stats_row(day, event_type_id)
+                for event_type_id, clients in by_type.items()
+            ],
+        )
+
+
+async def refresh_daily_rollup(
+    db: AsyncSession,
+    today: date,
+    max_days: int = ROLLUP_MAX_DAYS_PER_RUN,
+) -> RollupRefresh:
+    """
+    Досчитывает закрытые дни (раньше today) и пересчитывает дни, в которые
+    после прошлого обновления пришли опоздавшие события.
+
+    Опоздавшие события ищутся по id выше last_event_id. Граница сдвигается
+    с отставанием на один запуск: событие из транзакции, которая
+    ещё не была закоммичена при прошлом запуске, найдётся в следующем.
+    """
+    current_max = (await db.execute(select(func.max(models.Event.id)))).scalar() or 0
+    state = await db.get(models.StatsRollupState, DAILY_ROLLUP)
+    if state is None:
+        first = (await db.execute(select(func.min(models.Event.trigger_time)))).scalar()
+        state = models.StatsRollupState(
+            name=DAILY_ROLLUP,
+            rolled_until=min(first.date(), today) if first else today,
+            last_event_id=current_max,
+            seen_event_id=current_max,
+        )
+        db.add(state)
+
+    late_times = (
+        await db.execute(
+            select(models.Event.trigger_time)
+            .where(models.Event.id > state.last_event_id)
+            .where(models.Event.trigger_time < _day_start(state.rolled_until))
+        )
+    ).scalars()
+    refresh = RollupRefresh(
+        refreshed_days=sorted({value.date() for value in late_times})
+    )
+
+    rolled_until = state.rolled_until
+    while rolled_until < today and len(refresh.rolled_days) < max_days:
+        refresh.rolled_days.append(rolled_until)
+        rolled_until += timedelta(days=1)
+
+    for day in refresh.refreshed_days + refresh.rolled_days:
+        await rebuild_day(db, day)
+
+    state.rolled_until = rolled_until
+    state.last_event_id, state.seen_event_id = state.seen_event_id, current_max
+    await db.commit()
+    return refresh
+
+
+async def rollup_split(
+    db: AsyncSession, start: datetime, end: datetime
+) -> Optional[datetime]:
+    """
+    Граница, до которой окно [start, end) можно считать по сводке.
+
+    None, если сводка не покрывает начало окна или после неё остаётся
+    больше ROLLUP_MAX_RAW_DAYS дней сырых событий.
+    """
+    if start.time() != time.min:
+        return None
+    state = await db.get(models.StatsRollupState, DAILY_ROLLUP)
+    if state is None:
+        return None
+    split = min(_day_start(state.rolled_until), _day_start(end.date()))
+    if split <= start or end - split > timedelta(days=ROLLUP_MAX_RAW_DAYS):
+        return None
+    return split
+
+
+def _stats_filters(start: date, split: date, event_type_id: Optional[int]):
+    stats = models.DailyEventStats
+    return [
+        stats.day >= start,
+        stats.day < split,
+        stats.event_type_id
+        == (ROLLUP_ALL_EVENT_TYPES if event_type_id is None else event_type_id),
+    ]
+
+
+async def _event_visitors(
+    db: AsyncSession,
+    period_type: str,
+    start: datetime,
+    end: datetime,
+    event_type_id: Optional[int],
+    with_totals: bool,
+) -> tuple[dict[date | int, tuple[int, int]], Optional[tuple[int, int]]]:
+    """
+    Точные различные посетители и новые посетители окна по events.
+
+    Дни берутся из сводки, поэтому по периодам events читается только
+    для месяцев и лет, а за всё окно — только с with_totals. Когда нужно
+    и то и другое, на PostgreSQL это один проход (GROUPING SETS).
+
+    Returns:
+        Значения по периодам и за всё окно (None без with_totals).
+    """
+    by_period = period_type != "day"
+    if not by_period and not with_totals:
+        return {}, None
+    postgresql = is_postgresql(db)
+    filters = event_filters(start, end, event_type_id)
+    period = period_bucket(period_type, models.Event.trigger_time, postgresql).label(
+        "period"
+    )
+    visitors = func.count(distinct(models.Event.client_id))
+    new_visitors = func.count(
+        distinct(unique_visitor_expression(period_type, period, postgresql))
+    )
+
+    periods: dict[date | int, tuple[int, int]] = {}
+    totals: Optional[tuple[int, int]] = None
+    if by_period:
+        statement = select(period, visitors, new_visitors).where(*filters)
+        if with_totals and postgresql:
+            # Строка с period IS NULL — итог за всё окно
+            statement = statement.group_by(func.grouping_sets(tuple_(period), tuple_()))
+            totals = (0, 0)
+        else:
+            statement = statement.group_by(period)
+        for row in await db.execute(statement):
+            if row.period is None:
+                totals = (int(row[1]), int(row[2]))
+            else:
+                periods[_bucket_key(period_type, row.period)] = (
+                    int(row[1]),
+                    int(row[2]),
+                )
+    if with_totals and totals is None:
+        row = (await db.execute(select(visitors, new_visitors).where(*filters))).one()
+        totals = (int(row[0] or 0), int(row[1] or 0))
+    return periods, totals
+
+
+async def _raw_tail(
+    db: AsyncSession,
+    period_type: str,
+    split: datetime,
+    end: datetime,
+    event_type_id: Optional[int],
+) -> tuple[dict, dict[date | int, set[int]], dict[date | int, set[int]]]:
+    """Остаток окна после сводки: события, посетители и новые посетители по периодам."""
+    visits: dict[date | int, int] = {}
+    clients: dict[date | int, set[int]] = {}
+    new: dict[date | int, set[int]] = {}
+    piece_start = split
+    while piece_start < end:
+        piece_end = min(piece_start + timedelta(days=1), end)
+        key = period_key(period_type, piece_start.date())
+        for row in await _raw_day_visitors(
+            db, piece_start, piece_end, event_type_id, by_type=False
+        ):
+            visits[key] = visits.get(key, 0) + row.visits
+            clients.setdefault(key, set()).add(row.client_id)
+            if period_key(period_type, row.first_seen) == key:
+                new.setdefault(key, set()).add(row.client_id)
+        piece_start = piece_end
+    return visits, clients, new
+
+
+async def get_rollup_stats(
+    db: AsyncSession,
+    period_type: str,
+    start: datetime,
+    split: datetime,
+    end: datetime,
+    event_type_id: Optional[int] = None,
+    approximate: bool = False,
+    with_totals: bool = True,
+) -> RollupStats:
+    """
+    Статистика окна [start, end): дни до split берутся из сводки,
+    остаток (обычно незакрытый текущий день) считается по сырым событиям.
+
+    Посещения и дневные значения читаются из сводки. Различных посетителей
+    за месяц, год и всё окно нельзя сложить из дневных, поэтому точно они
+    считаются по events (индекс (event_type_id, trigger_time) покрывает
+    запрос), а с approximate — слиянием дневных HyperLogLog-скетчей сводки
+    (ошибка ≈1.6%) без чтения events. Для дней без with_totals events
+    не читается вовсе.
+    """
+    if period_type not in _PERIOD_TYPES:
+        raise ValueError("period_type должен быть одним из: day, month, year")
+    if approximate:
+        return await _approximate_rollup_stats(
+            db, period_type, start, split, end, event_type_id
+        )
+    stats = models.DailyEventStats
+    rows = await db.execute(
+        select(stats.day, stats.visits, stats.visitors, stats.new_visitors).where(
+            *_stats_filters(start.date(), split.date(), event_type_id)
+        )
+    )
+    buckets: dict[date | int, _Bucket] = {}
+    for row in rows:
+        bucket = buckets.setdefault(period_key(period_type, row.day), _Bucket())
+        bucket.visits += row.visits
+        if period_type == "day":
+            bucket.visitors, bucket.unique_visitors = row.visitors, row.new_visitors
+
+    raw_visits, raw_clients, raw_new = await _raw_tail(
+        db, period_type, split, end, event_type_id
+    )
+    for key, visits in raw_visits.items():
+        bucket = buckets.setdefault(key, _Bucket())
+        bucket.visits += visits
+        if period_type == "day":
+            # Дни остатка в сводку не попадают
+            bucket.visitors = len(raw_clients[key])
+            bucket.unique_visitors = len(raw_new.get(key, set()))
+
+    periods, totals = await _event_visitors(
+        db, period_type, start, end, event_type_id, with_totals
+    )
+    for key, (visitors, new_visitors) in periods.items():
+        if key in buckets:
+            buckets[key].visitors = visitors
+            buckets[key].unique_visitors = new_visitors
+
+    total_visitors, total_new = totals or (None, None)
+    return RollupStats(
+        periods=_periods(period_type, buckets),
+        total_visitor_count=total_visitors,
+        total_unique_visitors=total_new,
+    )
+
+
+async def _approximate_rollup_stats(
+    db: AsyncSession,
+    period_type: str,
+    start: datetime,
+    split: datetime,
+    end: datetime,
+    event_type_id: Optional[int],
+) -> RollupStats:
+    stats = models.DailyEventStats
+    rows = (
+        await db.execute(
+            select(
+                stats.day,
+                stats.visits,
+                stats.visitors,
+                stats.new_visitors,
+                stats.visitors_sketch,
+                _NEW_SKETCHES[period_type].label("new_sketch"),
+            ).where(*_stats_filters(start.date(), split.date(), event_type_id))
+        )
+    ).all()
+    raw_visits, raw_clients, raw_new = await _raw_tail(
+        db, period_type, split, end, event_type_id
+    )
+
+    visits: dict[date | int, int] = dict(raw_visits)
+    visitor_sketches: dict[date | int, list[bytes]] = {}
+    new_sketches: dict[date | int, list[bytes]] = {}
+    buckets: dict[date | int, _Bucket] = {}
+    for row in rows:
+        key = period_key(period_type, row.day)
+        visits[key] = visits.get(key, 0) + row.visits
+        visitor_sketches.setdefault(key, []).append(row.visitors_sketch)
+        new_sketches.setdefault(key, []).append(row.new_sketch)
+        if period_type == "day":
+            # Дневные значения в сводке точные
+            buckets[key] = _Bucket(row.visits, row.visitors, row.new_visitors)
+
+    for key, bucket_visits in visits.items():
+        if period_type == "day" and key in buckets:
+            continue
+        clients = raw_clients.get(key, set())
+        new = raw_new.get(key, set())
+        buckets[key] = _Bucket(
+            visits=bucket_visits,
+            visitors=HyperLogLog.union(visitor_sketches.get(key, []))
+            .update(clients)
+            .count(),
+            unique_visitors=HyperLogLog.union(new_sketches.get(key, []))
+            .update(new)
+            .count(),
+        )
+
+    all_visitors = HyperLogLog.union(row.visitors_sketch for row in rows)
+    all_new = HyperLogLog.union(row.new_sketch for row in rows)
+    return RollupStats(
+        periods=_periods(period_type, buckets),
+        total_visitor_count=all_visitors.update(
+            set().union(*raw_clients.values())
+        ).count(),
+        total_unique_visitors=all_new.update(set().union(*raw_new.values())).count(),
+    )
+
+
+def _periods(
+    period_type: str, buckets: dict[date | int, _Bucket]
+) -> list[schemas.Statistics]:
+    return [
+        schemas.Statistics(
+            period=_format_key(period_type, key),
+            all_visits=bucket.visits,
+            visitor_count=bucket.visitors,
+            unique_visitors=bucket.unique_visitors,
+        )
+        for key, bucket in sorted(buckets.items())
+        if bucket.visits
+    ]
+
+
+def aggregate_rollup_stats(stats: RollupStats) -> schemas.AggregatedStatistics:
+    """Сводные показатели по периодам, как в get_aggregated_stats."""
+    periods = stats.periods
+    count = len(periods)
+
+    def average(values: Iterable[int]) -> float:
+        return _round(sum(values) / count) if count else 0.0
+
+    return schemas.AggregatedStatistics(
+        total_all_visits=sum(item.all_visits for item in periods),
+        total_visitor_count=stats.total_visitor_count,
+        total_unique_visitors=stats.total_unique_visitors,
+        avg_all_visits_per_day=average(item.all_visits for item in periods),
+        avg_visitor_count_per_day=average(item.visitor_count for item in periods),
+        avg_unique_visitors_per_day=average(item.unique_visitors for item in periods),
+        entries_analized=count,
+    )
@@ -0,0 +1,48 @@
+from typing import AsyncIterable, AsyncIterator, Optional
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int
+) -> AsyncIterator[tuple[int, Optional[bytes]]]:
+    """
+    Режет поток байтов на строки NDJSON по мере поступления чанков.
+
+    В памяти держится только текущая незавершённая строка. Строка длиннее
+    max_line_bytes отдаётся как None и дочитывается до перевода строки
+    без накопления. Пустые строки пропускаются, но номера строк учитывают их.
+
+    Yields:
+        (номер строки с 1, байты строки без перевода строки или None).
+    """
+    line_no = 0
+    pending = bytearray()
+    overflow = False
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                if not overflow:
+                    pending += chunk[start:]
+                    if len(pending) > max_line_bytes:
+                        overflow = True
+                        pending.clear()
+                break
+
+            line_no += 1
+            if overflow or len(pending) + end - start > max_line_bytes:
+                yield line_no, None
+            else:
+                pending += chunk[start:end]
+                line = bytes(pending).strip()
+                if line:
+                    yield line_no, line
+            pending.clear()
+            overflow = False
+            start = end + 1
+
+    if overflow:
+        yield line_no + 1, None
+    elif pending.strip():
+        yield line_no + 1, bytes(pending).strip()
@@ -0,0 +1,59 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class TTLCache[K, V]:
+    """
+    Ограниченный LRU-кэш в памяти процесса со сроком жизни записей.
+
+    Запись живёт ttl_seconds с момента put() (по умолчанию бессрочно),
+    при переполнении вытесняется самая давно использованная. Значение
+    None хранится как обычное, поэтому get() возвращает и признак
+    попадания. Счётчики hits/misses ведёт сам кэш.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> tuple[bool, Optional[V]]:
+        """(найдена ли живая запись, её значение)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key: K, value: V, ttl_seconds: float = math.inf) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+    def evict(self, predicate: Callable[[K], bool]) -> int:
+        """Удаляет записи, ключи которых подходят под predicate."""
+        stale = [key for key in self._entries if predicate(key)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> dict[str, Any]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -5,8 +5,12 @@ from app.jobs.manager import JobManager
 # Импорт воркеров, чтобы @scheduled_task отработал при импорте модуля
 # и заполнил приватный реестр. Без этих импортов JobManager.setup_from_config
 # не найдёт задачу по имени и пропустит её с warning'ом.
+from app.jobs.event_partitions.worker import maintain_event_partitions  # noqa: F401
+from app.jobs.event_spool.worker import replay_event_spool  # noqa: F401
 from app.jobs.location_data.worker import fetch_location_data  # noqa: F401
+from app.jobs.popular_audiences.worker import refresh_popular_audiences  # noqa: F401
 from app.jobs.rasp import fetch_cur_rasp  # noqa: F401
+from app.jobs.stats_rollup.worker import refresh_stats_rollup  # noqa: F401
 
 
 class AppLifespanState(TypedDict):
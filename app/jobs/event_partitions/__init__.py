@@ -0,0 +1,3 @@
+from .worker import maintain_event_partitions
+
+__all__ = ["maintain_event_partitions"]
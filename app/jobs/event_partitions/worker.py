@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from datetime import datetime, UTC
+
+from app.config import get_settings
+from app.database import get_session_maker, is_postgresql
+from app.jobs.manager import scheduled_task
+from app.services.event_partitions import is_partitioned, maintain_partitions
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+
+@scheduled_task(name="maintain_event_partitions")
+async def maintain_event_partitions() -> None:
+    """
+    Создаёт месячные секции events/payloads наперёд и применяет retention.
+
+    Ничего не делает, если БД не PostgreSQL или миграция секционирования
+    ещё не применена.
+    """
+    config = get_settings().database.partitions
+    try:
+        async with get_session_maker()() as db:
+            if not is_postgresql(db):
+                return
+            conn = await db.connection()
+            if not await is_partitioned(conn):
+                logger.warning(
+                    "[EventPartitions] events is not partitioned, skipping maintenance"
+                )
+                return
+            created, expired = await maintain_partitions(
+                conn,
+                datetime.now(UTC).date(),
+                premake_months=config.premake_months,
+                retention_months=config.retention_months,
+                retention_action=config.retention_action,
+            )
+            await db.commit()
+    except asyncio.CancelledError:
+        logger.info("[EventPartitions] Maintenance job cancelled gracefully")
+        raise
+
+    if created:
+        logger.info("[EventPartitions] Created partitions: %s", ", ".join(created))
+    if expired:
+        logger.info(
+            "[EventPartitions] %s expired partitions: %s",
+            "Dropped" if config.retention_action == "drop" else "Detached",
+            ", ".join(expired),
+        )
@@ -0,0 +1,3 @@
+from .worker import replay_event_spool
+
+__all__ = ["replay_event_spool"]
@@ -0,0 +1,23 @@
+import asyncio
+import logging
+
+from app.database import get_session_maker
+from app.jobs.manager import scheduled_task
+from app.services.event_spool import get_event_spool
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+
+@scheduled_task(name="replay_event_spool")
+async def replay_event_spool() -> None:
+    """Переносит события из локального спула в БД. Ничего не делает, если спул выключен."""
+    spool = get_event_spool()
+    if spool is None:
+        return
+    try:
+        replayed = await spool.replay(get_session_maker())
+        if replayed:
+            logger.info("[EventSpool] Replayed %d event(s) into DB", replayed)
+    except asyncio.CancelledError:
+        logger.info("[EventSpool] Replay job cancelled gracefully")
+        raise
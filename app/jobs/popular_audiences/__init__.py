@@ -0,0 +1,3 @@
+from .worker import refresh_popular_audiences
+
+__all__ = ["refresh_popular_audiences"]
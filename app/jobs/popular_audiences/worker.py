@@ -0,0 +1,30 @@
+import asyncio
+import logging
+from datetime import datetime, UTC
+
+from app.database import get_session_maker
+from app.handlers.popular import refresh_popular_audiences as refresh_ranking
+from app.jobs.manager import scheduled_task
+from app.services.popular_audiences import popular_audiences_cache
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+
+@scheduled_task(name="refresh_popular_audiences")
+async def refresh_popular_audiences() -> None:
+    """Добавляет к рейтингу популярных аудиторий вес новых событий."""
+    try:
+        async with get_session_maker()() as db:
+            refresh = await refresh_ranking(db, datetime.now(UTC).date())
+    except asyncio.CancelledError:
+        logger.info("[PopularAudiences] Refresh job cancelled gracefully")
+        raise
+
+    if refresh.updated:
+        popular_audiences_cache.invalidate()
+        logger.info(
+            "[PopularAudiences] Events %d..%d updated %d auditories",
+            refresh.after_event_id + 1,
+            refresh.until_event_id,
+            refresh.updated,
+        )
@@ -0,0 +1,3 @@
+from .worker import refresh_stats_rollup
+
+__all__ = ["refresh_stats_rollup"]
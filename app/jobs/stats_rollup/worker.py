@@ -0,0 +1,41 @@
+import asyncio
+import logging
+from datetime import datetime, UTC
+
+from app.database import get_session_maker
+from app.handlers.rollup import refresh_daily_rollup
+from app.jobs.manager import scheduled_task
+from app.services.dashboard_data import dashboard_data_cache
+from app.services.stats_cache import period_stats_cache
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+
+@scheduled_task(name="refresh_stats_rollup")
+async def refresh_stats_rollup() -> None:
+    """
+    Досчитывает дневную сводку статистики до вчерашнего дня (UTC)
+    и пересчитывает дни, в которые пришли опоздавшие события.
+    """
+    try:
+        async with get_session_maker()() as db:
+            refresh = await refresh_daily_rollup(db, datetime.now(UTC).date())
+    except asyncio.CancelledError:
+        logger.info("[StatsRollup] Refresh job cancelled gracefully")
+        raise
+
+    if refresh.rolled_days:
+        logger.info(
+            "[StatsRollup] Rolled up %d days: %s..%s",
+            len(refresh.rolled_days),
+            refresh.rolled_days[0],
+            refresh.rolled_days[-1],
+        )
+    if refresh.refreshed_days:
+        # Опоздавшие события поменяли уже закрытые и закэшированные периоды
+        period_stats_cache.invalidate_days(refresh.refreshed_days)
+        dashboard_data_cache.invalidate_days(refresh.refreshed_days)
+        logger.info(
+            "[StatsRollup] Recomputed days with late events: %s",
+            ", ".join(day.isoformat() for day in refresh.refreshed_days),
+        )
@@ -32,6 +32,10 @@ from .event import (
     ReviewStatus,
     Dashboard,
     DashboardType,
+    SpoolCheckpoint,
+    DailyEventStats,
+    StatsRollupState,
+    PopularAudienceWeight,
 )
 
 __all__ = [
@@ -41,6 +45,7 @@ __all__ = [
     "Base",
     "ClientId",
     "Corpus",
+    "DailyEventStats",
     "Dashboard",
     "DashboardType",
     "Event",
@@ -49,6 +54,7 @@ __all__ = [
     "Goal",
     "Location",
     "Payload",
+    "PopularAudienceWeight",
     "PayloadType",
     "Plan",
     "Problem",
@@ -58,7 +64,9 @@ __all__ = [
     "Right",
     "Role",
     "RoleRightGoal",
+    "SpoolCheckpoint",
     "Static",
+    "StatsRollupState",
     "Type",
     "User",
     "UserLog",
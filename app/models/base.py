@@ -1,5 +1,47 @@
+from sqlalchemy import ForeignKeyConstraint, Integer, PrimaryKeyConstraint
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import DeclarativeBase
 
 
 class Base(DeclarativeBase):
     pass
+
+
+def _sqlite_rowid(constraint: PrimaryKeyConstraint):
+    """Колонка id, к которой на SQLite сводится составной первичный ключ."""
+    rowid = constraint.columns.get("id")
+    if rowid is not None and isinstance(rowid.type, Integer) and len(constraint) > 1:
+        return rowid
+    return None
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _sqlite_rowid_primary_key(constraint, compiler, **kw):
+    """
+    На SQLite id выдаётся автоматически, только если первичный ключ состоит
+    из него одного. Составной ключ (id, trigger_time) секционированных
+    на PostgreSQL таблиц здесь сводится к id — как и в миграциях для SQLite.
+    """
+    rowid = _sqlite_rowid(constraint)
+    if rowid is not None:
+        return f"PRIMARY KEY ({compiler.preparer.format_column(rowid)})"
+    return compiler.visit_primary_key_constraint(constraint, **kw)
+
+
+@compiles(ForeignKeyConstraint, "sqlite")
+def _sqlite_rowid_foreign_key(constraint, compiler, **kw):
+    """Составной FK на такую таблицу ссылается на SQLite только на её id."""
+    rowid = _sqlite_rowid(constraint.referred_table.primary_key)
+    if rowid is None or len(constraint.elements) < 2:
+        return compiler.visit_foreign_key_constraint(constraint, **kw)
+    (element,) = [e for e in constraint.elements if e.column is rowid]
+    preparer = compiler.preparer
+    sql = ""
+    if constraint.name is not None:
+        sql += f"CONSTRAINT {preparer.format_constraint(constraint)} "
+    sql += (
+        f"FOREIGN KEY({preparer.quote(element.parent.name)}) "
+        f"REFERENCES {preparer.format_table(constraint.referred_table)} "
+        f"({preparer.quote(rowid.name)})"
+    )
+    return sql + compiler.define_constraint_cascades(constraint)
@@ -1,14 +1,23 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 from uuid import uuid4
 
 from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Boolean,
     Column,
+    Date,
     DateTime,
     ForeignKey,
+    ForeignKeyConstraint,
+    Index,
     Integer,
+    LargeBinary,
+    Sequence,
     String,
     Text,
+    event as sa_event,
     text as text_,
 )
 from sqlalchemy.orm import Mapped, relationship
@@ -66,7 +75,9 @@ class ClientId(Base):
 class Event(Base):
     __tablename__ = "events"
 
-    id: int = Column(Integer, primary_key=True)
+    # На PostgreSQL events секционирована по trigger_time, и ключ секции
+    # входит в первичный ключ; id по-прежнему выдаёт sequence
+    id: int = Column(Integer, Sequence("events_id_seq"), primary_key=True)
     client_id: int = Column(
         ForeignKey("client_ids.id", ondelete="CASCADE", onupdate="CASCADE"),
         nullable=False,
@@ -75,7 +86,29 @@ class Event(Base):
         ForeignKey("event_types.id", ondelete="CASCADE", onupdate="CASCADE"),
         nullable=False,
     )
-    trigger_time: datetime = Column(DateTime, nullable=False)
+    trigger_time: datetime = Column(DateTime, primary_key=True)
+    # Копия дня client_ids.creation_date: новые посетители считаются без
+    # соединения с client_ids. NULL у событий, записанных до появления колонки
+    # и ещё не заполненных `stat-api db backfill-client-first-seen`
+    client_first_seen: date | None = Column(Date, nullable=True)
+
+    # Аналитика фильтрует по периоду и, опционально, по типу события и считает
+    # клиентов и новых посетителей: INCLUDE (только PostgreSQL) позволяет
+    # обойтись index-only scan. client_id нужен каскадному удалению клиентов.
+    __table_args__ = (
+        Index(
+            "ix_events_trigger_time",
+            "trigger_time",
+            postgresql_include=["client_id", "client_first_seen"],
+        ),
+        Index(
+            "ix_events_event_type_id_trigger_time",
+            "event_type_id",
+            "trigger_time",
+            postgresql_include=["client_id", "client_first_seen"],
+        ),
+        Index("ix_events_client_id", "client_id"),
+    )
 
     client: Mapped["ClientId"] = relationship(
         "ClientId",
@@ -132,16 +165,48 @@ class PayloadType(Base):
 class Payload(Base):
     __tablename__ = "payloads"
 
-    id: int = Column(Integer, primary_key=True)
-    event_id: int = Column(
-        ForeignKey("events.id", ondelete="CASCADE", onupdate="CASCADE"),
-        nullable=False,
-    )
+    id: int = Column(Integer, Sequence("payloads_id_seq"), primary_key=True)
+    # Пэйлоад ссылается на событие составным FK (event_id, trigger_time):
+    # так строки события и его пэйлоадов лежат в секциях одного месяца
+    event_id: int = Column(Integer, nullable=False)
     type_id: int = Column(
         ForeignKey("payload_types.id", ondelete="CASCADE", onupdate="CASCADE"),
         nullable=False,
     )
     value: str = Column(String(50), nullable=False)
+    # Типизированные копии value по ValueType типа пэйлоада; NULL для
+    # остальных типов и нераспознанных значений
+    value_int: int | None = Column(BigInteger, nullable=True)
+    value_bool: bool | None = Column(Boolean, nullable=True)
+    # Копия events.trigger_time — ключ секционирования payloads
+    trigger_time: datetime = Column(DateTime, primary_key=True)
+
+    # event_id — загрузка пэйлоадов события и каскадное удаление;
+    # (type_id, value) — отбор и группировка по значению пэйлоада;
+    # (type_id, value_int|value_bool) — сравнения и диапазоны по типизированным значениям
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["event_id", "trigger_time"],
+            ["events.id", "events.trigger_time"],
+            name="payloads_event_id_fkey",
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+        ),
+        Index("ix_payloads_event_id", "event_id"),
+        Index(
+            "ix_payloads_type_id_value",
+            "type_id",
+            "value",
+            postgresql_include=["event_id"],
+        ),
+        Index("ix_payloads_type_id_value_int", "type_id", "value_int"),
+        Index(
+            "ix_payloads_type_id_value_bool",
+            "type_id",
+            "value_bool",
+            postgresql_include=["event_id"],
+        ),
+    )
 
     event: Mapped["Event"] = relationship(
         "Event",
@@ -153,6 +218,20 @@ class Payload(Base):
     )
 
 
+# Как в миграции секционирования: id по умолчанию берётся из sequence, которой
+# владеет колонка, — так его выдают и INSERT ... SELECT, и COPY без id
+for _table in (Event.__table__, Payload.__table__):
+    for _statement in (
+        "ALTER SEQUENCE %(table)s_id_seq OWNED BY %(table)s.id",
+        "ALTER TABLE %(table)s ALTER COLUMN id SET DEFAULT nextval('%(table)s_id_seq')",
+    ):
+        sa_event.listen(
+            _table,
+            "after_create",
+            DDL(_statement).execute_if(dialect="postgresql"),
+        )
+
+
 class AllowedPayload(Base):
     __tablename__ = "allowed_payloads"
 
@@ -287,3 +366,98 @@ class Review(Base):
         "ReviewStatus",
         back_populates="reviews",
     )
+
+
+class SpoolCheckpoint(Base):
+    """
+    Последний перенесённый в БД номер записи локального спула событий.
+
+    Обновляется в той же транзакции, что и вставка событий из спула, поэтому
+    повторный прогон после сбоя пропускает уже записанные события.
+
+    Attributes:
+        spool_id: Идентификатор файла спула (генерируется при его создании).
+        last_seq: Номер последней перенесённой записи спула.
+    """
+
+    __tablename__ = "spool_checkpoints"
+
+    spool_id: str = Column(String(36), primary_key=True)
+    last_seq: int = Column(BigInteger, nullable=False, default=0)
+
+
+class DailyEventStats(Base):
+    """
+    Дневная сводка событий для статистики посещений.
+
+    Строки с event_type_id = 0 (ROLLUP_ALL_EVENT_TYPES) считают все типы
+    событий вместе: посетители разных типов за день не суммируются.
+
+    Attributes:
+        day: День (UTC) событий.
+        event_type_id: Тип события или 0 для всех типов.
+        visits: Количество событий.
+        visitors: Количество различных клиентов.
+        new_visitors: Количество клиентов, созданных в этот же день.
+        visitors_sketch: HyperLogLog-скетч клиентов дня.
+        new_on_day_sketch: Скетч клиентов, созданных в этот день.
+        new_in_month_sketch: Скетч клиентов, созданных в месяце этого дня.
+        new_in_year_sketch: Скетч клиентов, созданных в году этого дня.
+    """
+
+    __tablename__ = "daily_event_stats"
+
+    day: date = Column(Date, primary_key=True)
+    event_type_id: int = Column(Integer, primary_key=True)
+    visits: int = Column(BigInteger, nullable=False)
+    visitors: int = Column(Integer, nullable=False)
+    new_visitors: int = Column(Integer, nullable=False)
+    # Скетчи сливаются для приближённого подсчёта различных посетителей
+    # за любое окно (см. app/helpers/hll.py)
+    visitors_sketch: bytes = Column(LargeBinary, nullable=True)
+    new_on_day_sketch: bytes = Column(LargeBinary, nullable=True)
+    new_in_month_sketch: bytes = Column(LargeBinary, nullable=True)
+    new_in_year_sketch: bytes = Column(LargeBinary, nullable=True)
+
+
+class StatsRollupState(Base):
+    """
+    Положение сводок статистики.
+
+    Attributes:
+        name: Имя сводки.
+        rolled_until: Дневная сводка — первый день, которого ещё нет в сводке,
+            все дни раньше посчитаны; остальные сводки — день последнего обновления.
+        last_event_id: События с id больше этого проверяются на опоздавшие
+            в уже посчитанные дни.
+        seen_event_id: Максимальный id события при предыдущем обновлении.
+    """
+
+    __tablename__ = "stats_rollup_state"
+
+    name: str = Column(String(20), primary_key=True)
+    rolled_until: date = Column(Date, nullable=False)
+    last_event_id: int = Column(BigInteger, nullable=False, default=0)
+    seen_event_id: int = Column(BigInteger, nullable=False, default=0)
+
+
+class PopularAudienceWeight(Base):
+    """
+    Накопленный вес аудитории в рейтинге популярных аудиторий.
+
+    Обновляется задачей refresh_popular_audiences по событиям после
+    водяного знака в stats_rollup_state (name = "popular_audiences").
+
+    Attributes:
+        auditory_id: Идентификатор аудитории (значение пэйлоада).
+        total_weight: Суммарный вес успешных событий с этой аудиторией.
+    """
+
+    __tablename__ = "popular_audience_weights"
+
+    auditory_id: str = Column(String(50), primary_key=True)
+    total_weight: int = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_popular_audience_weights_total_weight", "total_weight"),
+    )
@@ -1,6 +1,12 @@
 from fastapi import APIRouter
 from .admin import register_endpoint
+from .export import register_endpoint as register_export
+from .live import register_endpoint as register_live
+from .metrics import register_endpoint as register_metrics
 
 router = APIRouter(prefix="/api/admin")
 
 register_endpoint(router)
+register_metrics(router)
+register_export(router)
+register_live(router)
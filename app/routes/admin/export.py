@@ -0,0 +1,89 @@
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_analytics_session_maker, get_db
+from app.handlers.export import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    export_chunks,
+    iter_export_events,
+)
+from app.helpers.permissions import require_rights_with_logging
+from app.models import User
+from app.services.user_logger_service import UserLoggerService, get_user_logger_service
+
+
+async def _stream_export(
+    start: datetime,
+    end: datetime,
+    event_type_id: Optional[int],
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    # Сессия живёт, пока отдаётся тело ответа, а не до выхода из эндпоинта;
+    # выгрузка занимает соединение пула аналитики, а не записи событий
+    async with get_analytics_session_maker()() as db:
+        events = iter_export_events(db, start, end, event_type_id)
+        async for chunk in export_chunks(events, export_format):
+            yield chunk
+
+
+def register_endpoint(router: APIRouter):
+    @router.get(
+        "/events/export",
+        description=(
+            "Выгрузка событий с пэйлоадами за [start, end) в NDJSON или CSV. "
+            "Ответ отдаётся потоком: память не зависит от размера окна"
+        ),
+        tags=["admin"],
+        response_class=StreamingResponse,
+        responses={
+            200: {
+                "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES},
+                "description": "Поток событий",
+            },
+            400: {"description": "Пустое или обратное окно"},
+            401: {"description": "Требуется аутентификация"},
+            403: {"description": "Недостаточно прав"},
+        },
+    )
+    async def export_events(
+        start: datetime = Query(..., description="Начало окна (включительно)"),
+        end: datetime = Query(..., description="Конец окна (не включительно)"),
+        event_type_id: Optional[int] = Query(None, description="Тип события"),
+        export_format: ExportFormat = Query(
+            "ndjson", alias="format", description="Формат: ndjson или csv"
+        ),
+        current_user: User = Depends(
+            require_rights_with_logging(
+                "stats",
+                "view",
+                error_text="Попытка выгрузки событий без прав",
+            )
+        ),
+        logger: UserLoggerService = Depends(get_user_logger_service),
+        db: AsyncSession = Depends(get_db),
+    ) -> StreamingResponse:
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start должен быть меньше end",
+            )
+
+        # Фоновая запись лога ждала бы конца выгрузки и пропала бы при обрыве,
+        # а сессия проверки прав держала бы соединение основного пула
+        await logger.log_now(
+            current_user,
+            f"Выгрузка событий {start.isoformat()}..{end.isoformat()} "
+            f"(тип {event_type_id}, {export_format})",
+        )
+        await db.close()
+        filename = f"events-{start:%Y%m%d}-{end:%Y%m%d}.{export_format}"
+        return StreamingResponse(
+            _stream_export(start, end, event_type_id, export_format),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
@@ -0,0 +1,82 @@
+import asyncio
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.helpers.permissions import require_rights_with_logging
+from app.models import User
+from app.services.live_counters import LiveEventCounters, live_event_counters
+from app.services.user_logger_service import UserLoggerService, get_user_logger_service
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def _sse_message(snapshot: dict) -> str:
+    return f"event: counters\ndata: {json.dumps(snapshot)}\n\n"
+
+
+async def stream_live_counters(
+    request: Request,
+    interval: float,
+    counters: LiveEventCounters = live_event_counters,
+) -> AsyncIterator[str]:
+    """
+    Снимок счётчиков сразу и затем раз в interval секунд, пока клиент подключён.
+
+    Поле retry подсказывает браузеру (EventSource) интервал переподключения.
+    """
+    yield f"retry: {int(interval * 1000)}\n"
+    while True:
+        yield _sse_message(counters.snapshot())
+        await asyncio.sleep(interval)
+        if await request.is_disconnected():
+            return
+
+
+def register_endpoint(router: APIRouter):
+    @router.get(
+        "/events/live",
+        description=(
+            "Счётчики принятых событий по типам за последние минуту, час и сутки "
+            "потоком Server-Sent Events: без опроса статистики и запросов к БД"
+        ),
+        tags=["admin"],
+        response_class=StreamingResponse,
+        responses={
+            200: {
+                "content": {SSE_MEDIA_TYPE: {}},
+                "description": "Поток событий counters",
+            },
+            401: {"description": "Требуется аутентификация"},
+            403: {"description": "Недостаточно прав"},
+        },
+    )
+    async def live_events(
+        request: Request,
+        interval: float = Query(
+            2.0, ge=0.5, le=60, description="Интервал отправки снимков, секунд"
+        ),
+        current_user: User = Depends(
+            require_rights_with_logging(
+                "stats",
+                "view",
+                error_text="Попытка просмотра живых счётчиков без прав",
+            )
+        ),
+        logger: UserLoggerService = Depends(get_user_logger_service),
+        db: AsyncSession = Depends(get_db),
+    ) -> StreamingResponse:
+        # Поток живёт, пока открыта страница: фоновая запись лога ждала бы его
+        # конца, а сессия проверки прав держала бы соединение пула
+        await logger.log_now(current_user, "Просмотр живых счётчиков событий")
+        await db.close()
+        return StreamingResponse(
+            stream_live_counters(request, interval),
+            media_type=SSE_MEDIA_TYPE,
+            # Прокси (nginx) не должны буферизовать поток
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
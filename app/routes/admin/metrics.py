@@ -0,0 +1,58 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.helpers.permissions import require_rights_with_logging
+from app.models import User
+from app.services.analytics_guard import get_cost_guard
+from app.services.client_cache import client_id_cache
+from app.services.client_pool import get_client_pool
+from app.services.dashboard_data import dashboard_data_cache
+from app.services.event_buffer import get_event_buffer
+from app.services.event_catalog import event_catalog
+from app.services.event_cube import get_event_cube
+from app.services.event_spool import get_event_spool
+from app.services.live_counters import live_event_counters
+from app.services.popular_audiences import popular_audiences_cache
+from app.services.stats_cache import period_stats_cache
+from app.services.user_logger_service import UserLoggerService, get_user_logger_service
+
+
+def register_endpoint(router: APIRouter):
+    @router.get(
+        "/metrics",
+        description="Внутренние метрики ингеста статистики и кэшей",
+        tags=["admin"],
+        responses={
+            401: {"description": "Требуется аутентификация"},
+            403: {"description": "Недостаточно прав"},
+        },
+    )
+    async def get_metrics(
+        current_user: User = Depends(
+            require_rights_with_logging(
+                "admin",
+                "view",
+                error_text="Попытка просмотра метрик без прав",
+            )
+        ),
+        logger: UserLoggerService = Depends(get_user_logger_service),
+    ) -> dict[str, Any]:
+        buffer = get_event_buffer()
+        spool = get_event_spool()
+        pool = get_client_pool()
+        cube = get_event_cube()
+        logger.log(current_user, "Просмотр метрик")
+        return {
+            "event_buffer": buffer.metrics() if buffer is not None else None,
+            "event_spool": await spool.metrics() if spool is not None else None,
+            "event_catalog": event_catalog.metrics(),
+            "client_id_cache": client_id_cache.metrics(),
+            "client_pool": pool.metrics() if pool is not None else None,
+            "popular_audiences": popular_audiences_cache.metrics(),
+            "period_stats_cache": period_stats_cache.metrics(),
+            "dashboard_data_cache": dashboard_data_cache.metrics(),
+            "event_cube": cube.metrics() if cube is not None else None,
+            "analytics_cost_guard": get_cost_guard().metrics(),
+            "live_event_counters": live_event_counters.metrics(),
+        }
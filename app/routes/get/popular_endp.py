@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas import PopularAudience, Status
 from app.database import get_db
-from app.handlers import get_popular_audiences
+from app.services.popular_audiences import popular_audiences_cache
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {item.strip().removeprefix("W/") for item in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
 
 
 def register_endpoint(router: APIRouter):
@@ -24,7 +31,16 @@ def register_endpoint(router: APIRouter):
                     }
                 },
             },
+            304: {
+                "description": "Rating has not changed since the ETag in If-None-Match"
+            },
         },
     )
-    async def get_popular(db: AsyncSession = Depends(get_db)) -> list[PopularAudience]:
-        return await get_popular_audiences(db)
+    async def get_popular(
+        request: Request, db: AsyncSession = Depends(get_db)
+    ) -> Response:
+        snapshot = await popular_audiences_cache.get(db)
+        headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(snapshot.body, media_type="application/json", headers=headers)
@@ -7,6 +7,7 @@ from app.handlers import create_client_id
 from app.helpers.permissions import require_rights
 from app.models import ClientId
 from app.schemas import ClientIdentResponse, ClientRegisterRequest, Status
+from app.services.client_cache import client_id_cache
 
 
 def register_endpoint(router: APIRouter):
@@ -40,12 +41,12 @@ def register_endpoint(router: APIRouter):
                 detail="Client already exists",
             )
 
-        db.add(
-            ClientId(
-                ident=data.ident,
-                creation_date=data.first_interaction_date,
-            )
+        client = ClientId(
+            ident=data.ident,
+            creation_date=data.first_interaction_date,
         )
+        db.add(client)
         await db.commit()
+        client_id_cache.put(client.ident, client.id, client.creation_date.date())
 
         return Status(status="ok")
@@ -1,52 +1,27 @@
 from datetime import datetime, UTC
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Body, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.guards.governor import stat_rate_limiter
-from app.models import (
-    AllowedPayload,
-    ClientId,
-    Event,
-    EventType,
-    Payload,
-    PayloadType,
-    ValueType,
+from app.guards.body import event_create_body
+from app.guards.governor import stat_batch_rate_limiter, stat_rate_limiter
+from app.handlers.event import (
+    EventValidationError,
+    PendingEvent,
+    build_pending_event,
+    resolve_client_ids,
 )
-from app.schemas import EventCreateRequest, Status
-
-
-def _normalize_payload_value(value: str, data_type: str, payload_type_id: int) -> str:
-    if data_type == "string":
-        return value
-
-    if data_type == "int":
-        try:
-            return str(int(value))
-        except ValueError as exc:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid int value for payload_type_id={payload_type_id}",
-            ) from exc
-
-    if data_type == "bool":
-        normalized = value.lower()
-        if normalized not in {"true", "false"}:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid bool value for payload_type_id={payload_type_id}",
-            )
-        return normalized
-
-    raise HTTPException(
-        status_code=status.HTTP_400_BAD_REQUEST,
-        detail=(
-            f"Unsupported payload data type '{data_type}' "
-            f"for payload_type_id={payload_type_id}"
-        ),
-    )
+from app.schemas import (
+    EventBatchItemStatus,
+    EventBatchResponse,
+    EventCreateRequest,
+    Status,
+)
+from app.schemas.event import EVENT_BATCH_MAX_SIZE
+from app.services.event_buffer import store_events
+from app.services.event_catalog import event_catalog
 
 
 def register_endpoint(router: APIRouter):
@@ -55,86 +30,73 @@ def register_endpoint(router: APIRouter):
         response_model=Status,
         tags=["stat"],
         dependencies=[Depends(stat_rate_limiter)],
+        openapi_extra=event_create_body.openapi_extra(),
     )
     async def create_event(
-        data: EventCreateRequest,
+        data: EventCreateRequest = Depends(event_create_body),
         db: AsyncSession = Depends(get_db),
     ) -> Status:
-        client = (
-            await db.execute(select(ClientId).where(ClientId.ident == data.ident))
-        ).scalar_one_or_none()
-        if client is None:
+        client_ids = await resolve_client_ids(db, [data.ident])
+        if data.ident not in client_ids:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Unknown client ident={data.ident}",
             )
 
-        event_type = (
-            await db.execute(
-                select(EventType).where(EventType.id == data.event_type_id)
+        validators = await event_catalog.get_validators(db)
+        try:
+            event = build_pending_event(
+                data, client_ids, validators, trigger_time=datetime.now(UTC)
             )
-        ).scalar_one_or_none()
-        if event_type is None:
+        except EventValidationError as exc:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unknown event_type_id={data.event_type_id}",
-            )
+                detail=str(exc),
+            ) from exc
 
-        allowed_rows = (
-            await db.execute(
-                select(PayloadType.id, ValueType.name)
-                .join(AllowedPayload, AllowedPayload.payload_type_id == PayloadType.id)
-                .join(ValueType, ValueType.id == PayloadType.value_type_id)
-                .where(AllowedPayload.event_type_id == data.event_type_id)
-            )
-        ).all()
-        allowed_payload_types = {int(row.id): str(row.name) for row in allowed_rows}
+        await store_events(db, [event])
+        return Status(status="ok")
 
-        normalized_payloads: list[tuple[int, str]] = []
-        for payload_type_id, value in data.payloads.items():
-            expected_type = allowed_payload_types.get(payload_type_id)
-            if expected_type is None:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=(
-                        f"Payload type {payload_type_id} is not allowed "
-                        f"for event_type_id={data.event_type_id}"
-                    ),
+    @router.post(
+        "/events/batch",
+        description=(
+            "Пакетная запись событий: валидные элементы пишутся многострочными "
+            "INSERT в одной транзакции, невалидные получают статус error"
+        ),
+        response_model=EventBatchResponse,
+        tags=["stat"],
+        dependencies=[Depends(stat_batch_rate_limiter)],
+    )
+    async def create_events_batch(
+        data: Annotated[
+            list[EventCreateRequest],
+            Body(min_length=1, max_length=EVENT_BATCH_MAX_SIZE),
+        ],
+        db: AsyncSession = Depends(get_db),
+    ) -> EventBatchResponse:
+        client_ids = await resolve_client_ids(db, (item.ident for item in data))
+        validators = await event_catalog.get_validators(db)
+
+        trigger_time = datetime.now(UTC)
+        items: list[EventBatchItemStatus] = []
+        pending: list[PendingEvent] = []
+        for index, item in enumerate(data):
+            try:
+                pending.append(
+                    build_pending_event(
+                        item, client_ids, validators, trigger_time=trigger_time
+                    )
                 )
-            normalized_payloads.append(
-                (
-                    payload_type_id,
-                    _normalize_payload_value(
-                        value=value,
-                        data_type=expected_type,
-                        payload_type_id=payload_type_id,
-                    ),
+            except EventValidationError as exc:
+                items.append(
+                    EventBatchItemStatus(index=index, status="error", detail=str(exc))
                 )
-            )
-
-        event = Event(
-            client_id=client.id,
-            event_type_id=data.event_type_id,
-            trigger_time=datetime.now(UTC),
-        )
-        db.add(event)
-        await db.flush()
-
-        db.add_all(
-            [
-                Payload(
-                    event_id=event.id,
-                    type_id=payload_type_id,
-                    value=normalized_value,
-                )
-                for payload_type_id, normalized_value in normalized_payloads
-            ]
+                continue
+            items.append(EventBatchItemStatus(index=index, status="ok"))
+
+        await store_events(db, pending)
+        return EventBatchResponse(
+            accepted=len(pending),
+            rejected=len(data) - len(pending),
+            items=items,
         )
-
-        try:
-            await db.commit()
-        except Exception:
-            await db.rollback()
-            raise
-
-        return Status(status="ok")
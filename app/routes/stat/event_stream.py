@@ -0,0 +1,176 @@
+import json
+import logging
+from datetime import datetime, UTC
+from typing import Mapping, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.guards.governor import stat_batch_rate_limiter
+from app.handlers.event import (
+    EventValidationError,
+    EventValidator,
+    PendingEvent,
+    build_pending_event,
+    resolve_client_ids,
+)
+from app.helpers.ndjson import iter_ndjson_lines
+from app.schemas import (
+    EventCreateRequest,
+    EventStreamLineError,
+    EventStreamRange,
+    EventStreamResponse,
+)
+from app.schemas.event import (
+    EVENT_STREAM_BATCH_SIZE,
+    EVENT_STREAM_MAX_ERRORS_PER_RANGE,
+    EVENT_STREAM_MAX_LINE_BYTES,
+)
+from app.services.event_buffer import EventBufferFullError, store_events
+from app.services.event_catalog import event_catalog
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _parse_line(line: Optional[bytes]) -> EventCreateRequest:
+    if line is None:
+        raise EventValidationError(f"Line exceeds {EVENT_STREAM_MAX_LINE_BYTES} bytes")
+    try:
+        return EventCreateRequest.model_validate(json.loads(line))
+    except json.JSONDecodeError as exc:
+        raise EventValidationError(f"Invalid JSON: {exc.msg}") from exc
+    except ValidationError as exc:
+        error = exc.errors(include_url=False)[0]
+        location = ".".join(str(part) for part in error["loc"])
+        raise EventValidationError(f"{location}: {error['msg']}") from exc
+
+
+async def _store_range(
+    request: Request,
+    db: AsyncSession,
+    lines: list[tuple[int, Optional[bytes]]],
+    validators: Mapping[int, EventValidator],
+) -> EventStreamRange:
+    # Отклонённые строки считаются по итогу диапазона, здесь — только описания
+    errors: list[EventStreamLineError] = []
+
+    def reject(line_no: int, detail: str) -> None:
+        if len(errors) < EVENT_STREAM_MAX_ERRORS_PER_RANGE:
+            errors.append(EventStreamLineError(line=line_no, detail=detail))
+
+    parsed: list[tuple[int, EventCreateRequest]] = []
+    for line_no, line in lines:
+        try:
+            parsed.append((line_no, _parse_line(line)))
+        except EventValidationError as exc:
+            reject(line_no, str(exc))
+
+    start_line, end_line = lines[0][0], lines[-1][0]
+
+    def range_status(
+        accepted: int, retry_detail: Optional[str] = None
+    ) -> EventStreamRange:
+        if retry_detail is not None:
+            # Диапазон не записан целиком — клиент переотправляет эти строки
+            errors.append(EventStreamLineError(line=start_line, detail=retry_detail))
+        return EventStreamRange(
+            start_line=start_line,
+            end_line=end_line,
+            accepted=accepted,
+            rejected=len(lines) - accepted,
+            errors=errors,
+        )
+
+    try:
+        stat_batch_rate_limiter.check_events(request, (item for _, item in parsed))
+    except HTTPException as exc:
+        retry_after = (exc.headers or {}).get("Retry-After", "1")
+        return range_status(
+            0,
+            f"Lines {start_line}-{end_line} were rate limited, "
+            f"retry them after {retry_after} s",
+        )
+
+    try:
+        client_ids = await resolve_client_ids(db, (item.ident for _, item in parsed))
+        trigger_time = datetime.now(UTC)
+        pending: list[PendingEvent] = []
+        for line_no, item in parsed:
+            try:
+                pending.append(
+                    build_pending_event(item, client_ids, validators, trigger_time)
+                )
+            except EventValidationError as exc:
+                reject(line_no, str(exc))
+        await store_events(db, pending)
+    except (EventBufferFullError, SQLAlchemyError) as exc:
+        logger.warning(
+            "[EventStream] Failed to store lines %d-%d: %s", start_line, end_line, exc
+        )
+        await db.rollback()
+        return range_status(
+            0, f"Lines {start_line}-{end_line} were not stored, retry them"
+        )
+
+    return range_status(len(pending))
+
+
+def register_endpoint(router: APIRouter):
+    @router.post(
+        "/events/stream",
+        description=(
+            "Потоковая запись событий из тела application/x-ndjson: по одному "
+            "EventCreateRequest на строку. Тело читается по мере поступления и "
+            f"пишется пачками по {EVENT_STREAM_BATCH_SIZE} строк; ответ содержит "
+            "итоги по каждому диапазону строк"
+        ),
+        response_model=EventStreamResponse,
+        tags=["stat"],
+        openapi_extra={
+            "requestBody": {
+                "required": True,
+                "content": {
+                    NDJSON_MEDIA_TYPE: {
+                        "schema": {"type": "string", "format": "binary"}
+                    }
+                },
+            }
+        },
+        responses={
+            415: {"description": f"Тело должно быть {NDJSON_MEDIA_TYPE}"},
+        },
+    )
+    async def create_events_stream(
+        request: Request,
+        db: AsyncSession = Depends(get_db),
+    ) -> EventStreamResponse:
+        content_type = request.headers.get("content-type", "")
+        if content_type.split(";")[0].strip() != NDJSON_MEDIA_TYPE:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Expected {NDJSON_MEDIA_TYPE} body",
+            )
+
+        validators = await event_catalog.get_validators(db)
+        ranges: list[EventStreamRange] = []
+        lines: list[tuple[int, Optional[bytes]]] = []
+        async for line_no, line in iter_ndjson_lines(
+            request.stream(), EVENT_STREAM_MAX_LINE_BYTES
+        ):
+            lines.append((line_no, line))
+            if len(lines) >= EVENT_STREAM_BATCH_SIZE:
+                ranges.append(await _store_range(request, db, lines, validators))
+                lines = []
+        if lines:
+            ranges.append(await _store_range(request, db, lines, validators))
+
+        return EventStreamResponse(
+            accepted=sum(item.accepted for item in ranges),
+            rejected=sum(item.rejected for item in ranges),
+            ranges=ranges,
+        )
@@ -2,7 +2,6 @@
 
 from fastapi import APIRouter, Depends, Body, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from datetime import datetime, UTC
 
 from app.database import get_db
@@ -14,7 +13,8 @@ from app.schemas.old_events import (
     StartWayIn,
 )
 from app.guards.governor import stat_rate_limiter
-from app.models import ClientId, Event, Payload
+from app.handlers.event import PendingEvent, resolve_client_ids
+from app.services.event_buffer import store_events
 
 from app.constants import (
     EVENT_TYPE_SITE_ID,
@@ -35,25 +35,15 @@ async def _create_event_from_legacy(
 ) -> Status:
     """Транслирует старые данные в новую структуру Event -> Payload."""
     # Ищем клиента по user_id (в старой системе он выступал идентификатором)
-    client = (
-        await db.execute(select(ClientId).where(ClientId.ident == user_id))
-    ).scalar_one_or_none()
+    client_ids = await resolve_client_ids(db, [user_id])
+    client = client_ids.get(user_id)
     if client is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    # Создаём событие
-    event = Event(
-        client_id=client.id,
-        event_type_id=event_type_id,
-        trigger_time=datetime.now(UTC),
-    )
-    db.add(event)
-    await db.flush()
-
     # Формируем пэйлоады с приведением типов к строкам (как в новой системе)
-    db_payloads = []
+    normalized_payloads = []
     for p_type_id, (value, v_type) in payloads.items():
         if v_type == "bool":
             normalized = str(value).lower()
@@ -64,17 +54,20 @@ async def _create_event_from_legacy(
                 )
         else:
             normalized = str(value)
-        db_payloads.append(
-            Payload(event_id=event.id, type_id=p_type_id, value=normalized)
-        )
-
-    db.add_all(db_payloads)
-    try:
-        await db.commit()
-    except Exception:
-        await db.rollback()
-        raise
+        normalized_payloads.append((p_type_id, normalized))
 
+    await store_events(
+        db,
+        [
+            PendingEvent(
+                client_id=client.id,
+                event_type_id=event_type_id,
+                trigger_time=datetime.now(UTC),
+                payloads=normalized_payloads,
+                client_first_seen=client.first_seen,
+            )
+        ],
+    )
     return Status(status="ok")
 
 
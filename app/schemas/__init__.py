@@ -4,7 +4,12 @@ from .status import Status
 from .review import Problem
 from app.schemas.client import ClientIdentResponse, ClientRegisterRequest
 from app.schemas.event import (
+    EventBatchItemStatus,
+    EventBatchResponse,
     EventCreateRequest,
+    EventStreamLineError,
+    EventStreamRange,
+    EventStreamResponse,
     EventTypeResponse,
     PayloadTypeResponse,
 )
@@ -33,7 +38,12 @@ __all__ = [
     "CorpusDto",
     "DataDto",
     "DataEntry",
+    "EventBatchItemStatus",
+    "EventBatchResponse",
     "EventCreateRequest",
+    "EventStreamLineError",
+    "EventStreamRange",
+    "EventStreamResponse",
     "EventTypeResponse",
     "Filter",
     "FilterRoute",
@@ -1,10 +1,19 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
 from pydantic import BaseModel, Field
 
 
 type PayloadValue = Annotated[str, Field(max_length=50)]
 
+EVENT_BATCH_MAX_SIZE = 100
+
+# Сколько строк NDJSON-потока валидируется и пишется одной пачкой
+EVENT_STREAM_BATCH_SIZE = 500
+# Строка длиннее считается ошибочной и не держится в памяти целиком
+EVENT_STREAM_MAX_LINE_BYTES = 16 * 1024
+# Сколько ошибок по строкам возвращать на один диапазон
+EVENT_STREAM_MAX_ERRORS_PER_RANGE = 20
+
 
 class EventCreateRequest(BaseModel):
     ident: str = Field(
@@ -24,3 +33,34 @@ class PayloadTypeResponse(BaseModel):
     id: int
     name: str
     data_type: str
+
+
+class EventBatchItemStatus(BaseModel):
+    index: int
+    status: str
+    detail: Optional[str] = None
+
+
+class EventBatchResponse(BaseModel):
+    accepted: int
+    rejected: int
+    items: list[EventBatchItemStatus]
+
+
+class EventStreamLineError(BaseModel):
+    line: int
+    detail: str
+
+
+class EventStreamRange(BaseModel):
+    start_line: int
+    end_line: int
+    accepted: int
+    rejected: int
+    errors: list[EventStreamLineError]
+
+
+class EventStreamResponse(BaseModel):
+    accepted: int
+    rejected: int
+    ranges: list[EventStreamRange]
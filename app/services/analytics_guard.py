@@ -0,0 +1,137 @@
+import logging
+import math
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Iterator, Literal, NamedTuple
+
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CostGuardConfig
+from app.handlers.rollup import rollup_split
+from app.services.event_cube import get_event_cube
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+# SQLSTATE query_canceled: PostgreSQL прервал запрос по statement_timeout
+QUERY_CANCELED_SQLSTATE = "57014"
+
+
+class AnalyticsCostError(ValueError):
+    """Запрос статистики отклонён: окно слишком дорогое или не уложилось в лимиты."""
+
+
+class WindowDecision(NamedTuple):
+    """Как будет посчитано окно: источник и итоговый режим approximate."""
+
+    source: Literal["cube", "rollup", "events"]
+    days: int
+    approximate: bool
+    downgraded: bool = False
+
+
+class AnalyticsCostGuard:
+    """
+    Оценка стоимости окна статистики до запроса к БД.
+
+    Окно внутри колоночной копии событий считается без БД. Окно, покрытое
+    дневной сводкой, читает строку на день, а точные различные посетители
+    за месяц, год и всё окно — ещё и индекс events за всё окно: такое
+    окно длиннее max_exact_days считается приближённо по скетчам. Окно без
+    сводки читает events целиком, и длиннее max_raw_days оно отклоняется.
+    """
+
+    DEFAULT_MAX_RAW_DAYS: int = 366
+    DEFAULT_MAX_EXACT_DAYS: int = 366
+
+    def __init__(
+        self,
+        max_raw_days: int = DEFAULT_MAX_RAW_DAYS,
+        max_exact_days: int = DEFAULT_MAX_EXACT_DAYS,
+    ):
+        self.max_raw_days = max_raw_days
+        self.max_exact_days = max_exact_days
+        self._rejected = 0
+        self._downgraded = 0
+        self._timeouts = 0
+
+    @classmethod
+    def from_config(cls, config: CostGuardConfig) -> "AnalyticsCostGuard":
+        return cls(
+            max_raw_days=config.max_raw_days,
+            max_exact_days=config.max_exact_days,
+        )
+
+    async def check(
+        self,
+        db: AsyncSession,
+        period_type: str,
+        start: datetime,
+        end: datetime,
+        approximate: bool = False,
+    ) -> WindowDecision:
+        """Решение по окну или AnalyticsCostError, если окно отклонено."""
+        days = math.ceil((end - start) / timedelta(days=1))
+        cube = get_event_cube()
+        if cube is not None and cube.covers(period_type, start):
+            return WindowDecision("cube", days, approximate)
+
+        if await rollup_split(db, start, end) is None:
+            if days > self.max_raw_days:
+                self._rejected += 1
+                logger.warning(
+                    f"[CostGuard] Rejected raw window {start:%Y-%m-%d}..{end:%Y-%m-%d}"
+                )
+                raise AnalyticsCostError(
+                    f"Окно в {days} дн. не покрыто дневной сводкой и считалось бы "
+                    f"по сырым событиям; допустимо не больше {self.max_raw_days} дн. "
+                    "Сузьте окно"
+                )
+            return WindowDecision("events", days, approximate)
+
+        if not approximate and days > self.max_exact_days:
+            self._downgraded += 1
+            return WindowDecision("rollup", days, True, downgraded=True)
+        return WindowDecision("rollup", days, approximate)
+
+    @contextmanager
+    def limits(self) -> Iterator[None]:
+        """Превращает отмену по statement_timeout и ожидание пула в AnalyticsCostError."""
+        try:
+            yield
+        except PoolTimeoutError as exc:
+            self._timeouts += 1
+            raise AnalyticsCostError(
+                "Все соединения аналитики заняты, повторите запрос позже"
+            ) from exc
+        except DBAPIError as exc:
+            if getattr(exc.orig, "sqlstate", None) != QUERY_CANCELED_SQLSTATE:
+                raise
+            self._timeouts += 1
+            raise AnalyticsCostError(
+                "Запрос статистики прерван по statement_timeout: сузьте окно "
+                "или используйте approximate"
+            ) from exc
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "max_raw_days": self.max_raw_days,
+            "max_exact_days": self.max_exact_days,
+            "rejected": self._rejected,
+            "downgraded": self._downgraded,
+            "timeouts": self._timeouts,
+        }
+
+
+# Лимиты из конфигурации задаёт on_startup; до него — значения по умолчанию.
+_cost_guard = AnalyticsCostGuard()
+
+
+def init_cost_guard(config: CostGuardConfig) -> AnalyticsCostGuard:
+    global _cost_guard
+    _cost_guard = AnalyticsCostGuard.from_config(config)
+    return _cost_guard
+
+
+def get_cost_guard() -> AnalyticsCostGuard:
+    return _cost_guard
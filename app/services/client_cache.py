@@ -0,0 +1,89 @@
+from datetime import date
+from typing import Any, Iterable, NamedTuple
+
+from app.helpers.ttl_cache import TTLCache
+
+
+class CachedClient(NamedTuple):
+    id: int
+    # День создания клиента, его записывают в events.client_first_seen
+    first_seen: date
+
+
+class ClientIdCache:
+    """
+    Ограниченный LRU-кэш соответствия ident → (id, день создания) клиента.
+
+    Записи в client_ids не меняются после создания, поэтому найденное
+    соответствие можно держать сколько угодно — вытесняются только самые
+    давно использованные. Отсутствующие ident кэшируются отдельно и ненадолго
+    (negative_ttl_seconds): поток запросов с несуществующим ident не доходит
+    до БД, а клиент, зарегистрированный в другом воркере, становится виден
+    не позже чем через TTL.
+    """
+
+    DEFAULT_MAX_SIZE: int = 100_000
+    DEFAULT_NEGATIVE_MAX_SIZE: int = 10_000
+    DEFAULT_NEGATIVE_TTL_SECONDS: float = 5.0
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        negative_max_size: int = DEFAULT_NEGATIVE_MAX_SIZE,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+    ):
+        self.max_size = max_size
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+        self._ids: TTLCache[str, CachedClient] = TTLCache(max_size)
+        self._missing: TTLCache[str, None] = TTLCache(negative_max_size)
+
+    def lookup(self, idents: Iterable[str]) -> tuple[dict[str, CachedClient], set[str]]:
+        """
+        Разбирает ident по кэшу.
+
+        Returns:
+            (найденные {ident: клиент}, ident, которые нужно проверить в БД).
+            Ident из негативного кэша не попадают ни туда, ни туда.
+        """
+        found: dict[str, CachedClient] = {}
+        unresolved: set[str] = set()
+        for ident in idents:
+            hit, client = self._ids.get(ident)
+            if hit:
+                found[ident] = client
+            elif not self._missing.get(ident)[0]:
+                unresolved.add(ident)
+        return found, unresolved
+
+    def put(self, ident: str, client_id: int, first_seen: date) -> None:
+        self._missing.pop(ident)
+        self._ids.put(ident, CachedClient(client_id, first_seen))
+
+    def put_missing(self, ident: str) -> None:
+        self._missing.put(ident, None, self.negative_ttl_seconds)
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self._missing.clear()
+
+    def metrics(self) -> dict[str, Any]:
+        # Каждый промах основного кэша проверяется в негативном,
+        # поэтому промахи негативного — это промахи кэша целиком
+        hits, negative_hits = self._ids.hits, self._missing.hits
+        misses = self._missing.misses
+        lookups = hits + negative_hits + misses
+        return {
+            "size": len(self._ids),
+            "max_size": self.max_size,
+            "negative_size": len(self._missing),
+            "hits": hits,
+            "negative_hits": negative_hits,
+            "misses": misses,
+            "hit_ratio": (
+                round((hits + negative_hits) / lookups, 4) if lookups else 0.0
+            ),
+        }
+
+
+client_id_cache = ClientIdCache()
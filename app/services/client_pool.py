@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+from uuid import uuid4
+
+from sqlalchemy import delete, insert, update
+
+from app import models
+from app.config import ClientPoolConfig
+from app.database import get_session_maker
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+
+class PooledClient(NamedTuple):
+    id: int
+    ident: str
+    creation_date: datetime
+    created_at: float
+
+
+class ClientIdPool:
+    """
+    Пул заранее созданных записей client_ids для выдачи новым клиентам.
+
+    Фоновая задача досоздаёт записи одной многострочной вставкой, когда
+    в пуле остаётся меньше low_watermark, поэтому всплеск первых визитов
+    (QR-коды на днях открытых дверей) не превращается в поток коммитов.
+    Записи старше max_age_seconds не выдаются и удаляются из БД — их ident
+    ещё никто не получал, событий и отзывов у них нет.
+
+    creation_date выданной записи — время выдачи: клиент получает его сразу,
+    а в client_ids оно записывается той же фоновой задачей, одним UPDATE
+    на все выдачи между её запусками. Иначе день создания около полуночи
+    мог бы оказаться предыдущим.
+    """
+
+    def __init__(
+        self,
+        size: int = 500,
+        low_watermark: int = 100,
+        max_age_seconds: float = 300.0,
+    ):
+        self.size = size
+        self.low_watermark = low_watermark
+        self.max_age_seconds = max_age_seconds
+
+        self._clients: deque[PooledClient] = deque()
+        self._issue_dates: dict[int, datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self._issued = 0
+        self._misses = 0
+        self._refills = 0
+        self._expired = 0
+
+    @classmethod
+    def from_config(cls, config: ClientPoolConfig) -> "ClientIdPool":
+        return cls(
+            size=config.size,
+            low_watermark=config.low_watermark,
+            max_age_seconds=config.max_age_seconds,
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def take(self) -> Optional[PooledClient]:
+        """Выдаёт запись из пула или None, если свежих записей нет."""
+        client = None
+        deadline = time.monotonic() - self.max_age_seconds
+        # Старые записи лежат в начале очереди; их удалит фоновая задача
+        while self._clients and self._clients[0].created_at < deadline:
+            self._clients.popleft()
+            self._expired += 1
+            self._wakeup.set()
+        if self._clients:
+            client = self._clients.popleft()._replace(creation_date=datetime.now())
+            self._issue_dates[client.id] = client.creation_date
+            self._issued += 1
+            self._wakeup.set()
+        else:
+            self._misses += 1
+        if len(self._clients) < self.low_watermark:
+            self._wakeup.set()
+        return client
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._wakeup.set()
+        self._task = asyncio.create_task(self._run(), name="client-id-pool-refill")
+
+    async def stop(self) -> None:
+        """
+        Останавливает пополнение, записывает даты выдачи и удаляет из БД
+        невыданные записи.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._store_issue_dates()
+        leftover = [client.id for client in self._clients]
+        self._clients.clear()
+        await self._delete(leftover)
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "available": len(self._clients),
+            "size": self.size,
+            "issued": self._issued,
+            "misses": self._misses,
+            "refills": self._refills,
+            "expired": self._expired,
+        }
+
+    # ── Внутреннее ───────────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.max_age_seconds / 2
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._store_issue_dates()
+                await self._expire()
+                await self._refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[ClientIdPool] Failed to refill client id pool")
+                await asyncio.sleep(1)
+
+    async def _expire(self) -> None:
+        deadline = time.monotonic() - self.max_age_seconds
+        expired: list[int] = []
+        while self._clients and self._clients[0].created_at < deadline:
+            expired.append(self._clients.popleft().id)
+        self._expired += len(expired)
+        await self._delete(expired)
+
+    async def _refill(self) -> None:
+        missing = self.size - len(self._clients)
+        if missing <= 0:
+            return
+        now = datetime.now()
+        async with get_session_maker()() as db:
+            rows = (
+                await db.execute(
+                    insert(models.ClientId).returning(
+                        models.ClientId.id,
+                        models.ClientId.ident,
+                        models.ClientId.creation_date,
+                        sort_by_parameter_order=True,
+                    ),
+                    [
+                        {"ident": str(uuid4()), "creation_date": now}
+                        for _ in range(missing)
+                    ],
+                )
+            ).all()
+            await db.commit()
+        created_at = time.monotonic()
+        self._clients.extend(
+            PooledClient(int(row.id), str(row.ident), row.creation_date, created_at)
+            for row in rows
+        )
+        self._refills += 1
+
+    async def _store_issue_dates(self) -> None:
+        issue_dates, self._issue_dates = self._issue_dates, {}
+        if not issue_dates:
+            return
+        try:
+            async with get_session_maker()() as db:
+                await db.execute(
+                    update(models.ClientId),
+                    [
+                        {"id": client_id, "creation_date": creation_date}
+                        for client_id, creation_date in issue_dates.items()
+                    ],
+                )
+                await db.commit()
+        except BaseException:
+            # Не записанные даты уйдут следующим запуском
+            self._issue_dates = issue_dates | self._issue_dates
+            raise
+
+    @staticmethod
+    async def _delete(client_ids: list[int]) -> None:
+        if not client_ids:
+            return
+        async with get_session_maker()() as db:
+            await db.execute(
+                delete(models.ClientId).where(models.ClientId.id.in_(client_ids))
+            )
+            await db.commit()
+
+
+# Пул заводится в on_startup только при ingest.client_pool.enabled.
+_client_pool: Optional[ClientIdPool] = None
+
+
+def init_client_pool(config: ClientPoolConfig) -> Optional[ClientIdPool]:
+    global _client_pool
+    if not config.enabled:
+        _client_pool = None
+        return None
+    _client_pool = ClientIdPool.from_config(config)
+    _client_pool.start()
+    return _client_pool
+
+
+async def close_client_pool() -> None:
+    global _client_pool
+    if _client_pool is not None:
+        try:
+            await _client_pool.stop()
+        except Exception:
+            logger.exception("[ClientIdPool] Failed to release pooled client ids")
+    _client_pool = None
+
+
+def get_client_pool() -> Optional[ClientIdPool]:
+    return _client_pool
@@ -0,0 +1,156 @@
+from datetime import date, datetime, timedelta, UTC
+from typing import Any, Iterable, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.constants import DASHBOARD_TYPE_AVG_ID, DASHBOARD_TYPE_CHART_ID
+from app.handlers.get import get_window_stats
+from app.helpers.ttl_cache import TTLCache
+
+
+class DashboardKey(NamedTuple):
+    dashboard_id: int
+    event_type_id: int
+    dashboard_type_id: int
+    period_type: str
+    start: datetime
+    end: datetime
+    approximate: bool
+
+
+class DashboardStats(NamedTuple):
+    """Статистика дашборда за окно: ряд для графика, сводка для avg."""
+
+    periods: Optional[list[schemas.Statistics]]
+    aggregated: Optional[schemas.AggregatedStatistics]
+
+
+class DashboardData(NamedTuple):
+    dashboard: models.Dashboard
+    stats: DashboardStats
+
+
+class DashboardDataCache:
+    """
+    Кэш данных дашбордов за окно, по записи на дашборд.
+
+    Ключ включает тип события и тип дашборда, поэтому после изменения
+    настройки дашборда старая запись просто перестаёт использоваться.
+    Окно, закончившееся раньше now - closed_grace_seconds, живёт
+    closed_ttl_seconds (или до invalidate_days() в процессе, где отработала
+    refresh_stats_rollup), остальные окна — open_ttl_seconds.
+    """
+
+    DEFAULT_OPEN_TTL_SECONDS: float = 30.0
+    DEFAULT_CLOSED_TTL_SECONDS: float = 600.0
+    DEFAULT_CLOSED_GRACE_SECONDS: float = 3600.0
+    DEFAULT_MAX_ENTRIES: int = 10_000
+
+    def __init__(
+        self,
+        open_ttl_seconds: float = DEFAULT_OPEN_TTL_SECONDS,
+        closed_ttl_seconds: float = DEFAULT_CLOSED_TTL_SECONDS,
+        closed_grace_seconds: float = DEFAULT_CLOSED_GRACE_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.open_ttl_seconds = open_ttl_seconds
+        self.closed_ttl_seconds = closed_ttl_seconds
+        self.closed_grace_seconds = closed_grace_seconds
+        self._entries: TTLCache[DashboardKey, DashboardStats] = TTLCache(max_entries)
+
+    def lookup(self, key: DashboardKey) -> Optional[DashboardStats]:
+        return self._entries.get(key)[1]
+
+    def store(self, key: DashboardKey, stats: DashboardStats, now: datetime) -> None:
+        closed = key.end <= now - timedelta(seconds=self.closed_grace_seconds)
+        self._entries.put(
+            key, stats, self.closed_ttl_seconds if closed else self.open_ttl_seconds
+        )
+
+    def invalidate_days(self, days: Iterable[date]) -> int:
+        """Сбрасывает окна, в которые попадает хотя бы один из days."""
+        moments = [datetime.combine(day, datetime.min.time()) for day in days]
+        return self._entries.evict(
+            lambda key: any(key.start <= moment < key.end for moment in moments)
+        )
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> dict[str, Any]:
+        return self._entries.metrics()
+
+
+dashboard_data_cache = DashboardDataCache()
+
+
+async def get_dashboard_data(
+    db: AsyncSession,
+    period_type: str,
+    start: datetime,
+    end: datetime,
+    approximate: bool = False,
+    cache: DashboardDataCache = dashboard_data_cache,
+    now: Optional[datetime] = None,
+) -> list[DashboardData]:
+    """
+    Данные всех дашбордов в порядке display_order.
+
+    Дашборды, которых нет в кэше, считаются одним get_window_stats
+    по всем их типам событий, то есть одним чтением events на окно.
+    """
+    now = now or datetime.now(UTC).replace(tzinfo=None)
+    dashboards = (
+        (
+            await db.execute(
+                select(models.Dashboard).order_by(
+                    models.Dashboard.display_order, models.Dashboard.id
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+    def key(dashboard: models.Dashboard) -> DashboardKey:
+        return DashboardKey(
+            dashboard.id,
+            dashboard.event_type_id,
+            dashboard.dashboard_type_id,
+            period_type,
+            start,
+            end,
+            approximate,
+        )
+
+    cached = {dashboard.id: cache.lookup(key(dashboard)) for dashboard in dashboards}
+    missing = [dashboard for dashboard in dashboards if cached[dashboard.id] is None]
+    if missing:
+        by_type = await get_window_stats(
+            db,
+            period_type,
+            start,
+            end,
+            {dashboard.event_type_id for dashboard in missing},
+            approximate,
+        )
+        for dashboard in missing:
+            window = by_type[dashboard.event_type_id]
+            stats = DashboardStats(
+                window.periods
+                if dashboard.dashboard_type_id != DASHBOARD_TYPE_AVG_ID
+                else None,
+                window.aggregated
+                if dashboard.dashboard_type_id != DASHBOARD_TYPE_CHART_ID
+                else None,
+            )
+            cache.store(key(dashboard), stats, now)
+            cached[dashboard.id] = stats
+
+    return [
+        DashboardData(dashboard, stats)
+        for dashboard in dashboards
+        if (stats := cached[dashboard.id]) is not None
+    ]
@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import time
+from typing import Any, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import EventBufferConfig
+from app.database import get_session_maker
+from app.handlers.event import PendingEvent, insert_events
+from app.services.event_spool import get_event_spool, is_unavailable_error
+from app.services.live_counters import live_event_counters
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+
+class EventBufferFullError(Exception):
+    """Очередь write-behind буфера заполнена — запись нужно повторить позже."""
+
+    def __str__(self):
+        return "Event buffer is full, retry later"
+
+
+class EventBuffer:
+    """
+    Write-behind буфер событий статистики.
+
+    Роут валидирует событие и кладёт его в ограниченную очередь, не трогая БД.
+    Фоновый флашер собирает события в пачку и пишет её через insert_events
+    одной транзакцией: раз в flush_interval или по достижении max_batch_size
+    событий — что наступит раньше. Заполненная очередь — сигнал backpressure:
+    submit бросает EventBufferFullError, а не копит события без границ.
+
+    Если пачку отвергла сама БД (например, клиент или тип события удалены
+    после валидации), она пишется по одному событию: отвергнутые уходят
+    в dead_events спула, остальные сохраняются.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 0.2,
+        max_batch_size: int = 500,
+        capacity: int = 10_000,
+    ):
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.capacity = capacity
+
+        self._queue: asyncio.Queue[PendingEvent] = asyncio.Queue(maxsize=capacity)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self._flushes = 0
+        self._flushed_events = 0
+        self._failed_flushes = 0
+        self._failed_events = 0
+        self._dead_events = 0
+        self._rejected_events = 0
+        self._last_batch_size = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @classmethod
+    def from_config(cls, config: EventBufferConfig) -> "EventBuffer":
+        return cls(
+            flush_interval=config.flush_interval_ms / 1000,
+            max_batch_size=config.max_batch_size,
+            capacity=config.capacity,
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def submit(self, events: Sequence[PendingEvent]) -> None:
+        """
+        Ставит события в очередь без ожидания: либо все, либо ни одного.
+        Бросает EventBufferFullError, если места в очереди не хватает.
+        """
+        free = self.capacity - self._queue.qsize()
+        if self._stopping or len(events) > free:
+            self._rejected_events += len(events)
+            raise EventBufferFullError()
+        for event in events:
+            self._queue.put_nowait(event)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="event-buffer-flusher")
+
+    async def stop(self) -> None:
+        """Перестаёт принимать события и дожидается записи всего, что уже в очереди."""
+        self._stopping = True
+        if self._task is not None:
+            await self._task
+            self._task = None
+        # Флашер мог быть не запущен — дописываем остаток напрямую
+        while not self._queue.empty():
+            await self._flush(self._take_batch())
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_size": self._queue.qsize(),
+            "capacity": self.capacity,
+            "flushes": self._flushes,
+            "flushed_events": self._flushed_events,
+            "failed_flushes": self._failed_flushes,
+            "failed_events": self._failed_events,
+            "dead_events": self._dead_events,
+            "rejected_events": self._rejected_events,
+            "last_batch_size": self._last_batch_size,
+            "last_flush_ms": round(self._last_flush_ms, 3),
+            "max_flush_ms": round(self._max_flush_ms, 3),
+            "avg_flush_ms": (
+                round(self._total_flush_ms / self._flushes, 3) if self._flushes else 0.0
+            ),
+        }
+
+    # ── Внутреннее ───────────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._collect_batch()
+            if batch:
+                await self._flush(batch)
+
+    async def _collect_batch(self) -> list[PendingEvent]:
+        try:
+            first = await asyncio.wait_for(self._queue.get(), self.flush_interval)
+        except asyncio.TimeoutError:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch_size and not self._stopping:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        batch.extend(self._take_batch(self.max_batch_size - len(batch)))
+        return batch
+
+    def _take_batch(self, limit: Optional[int] = None) -> list[PendingEvent]:
+        limit = self.max_batch_size if limit is None else limit
+        batch: list[PendingEvent] = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _flush(self, batch: list[PendingEvent]) -> None:
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            async with get_session_maker()() as db:
+                await insert_events(db, batch)
+        except Exception as exc:
+            self._failed_flushes += 1
+            if is_unavailable_error(exc):
+                await self._spool_or_drop(batch, exc)
+            else:
+                await self._flush_each(batch, exc)
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self._flushes += 1
+        self._flushed_events += len(batch)
+        self._last_batch_size = len(batch)
+        self._last_flush_ms = elapsed_ms
+        self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    async def _flush_each(self, batch: list[PendingEvent], exc: Exception) -> None:
+        """Пишет отвергнутую пачку по одному событию, хороня только виновные."""
+        if len(batch) == 1:
+            await self._bury(batch, exc)
+            return
+        for index, event in enumerate(batch):
+            try:
+                async with get_session_maker()() as db:
+                    await insert_events(db, [event])
+            except Exception as event_exc:
+                if is_unavailable_error(event_exc):
+                    # БД пропала посреди повтора — остаток уходит в спул
+                    await self._spool_or_drop(batch[index:], event_exc)
+                    return
+                await self._bury([event], event_exc)
+                continue
+            self._flushed_events += 1
+
+    async def _spool_or_drop(self, events: list[PendingEvent], exc: Exception) -> None:
+        if await spool_events(events, exc):
+            logger.warning(
+                "[EventBuffer] DB unavailable, %d event(s) moved to spool",
+                len(events),
+            )
+            return
+        self._failed_events += len(events)
+        logger.error(
+            "[EventBuffer] Failed to flush %d buffered event(s)",
+            len(events),
+            exc_info=exc,
+        )
+
+    async def _bury(self, events: list[PendingEvent], exc: Exception) -> None:
+        self._dead_events += len(events)
+        logger.error(
+            "[EventBuffer] %d event(s) rejected by DB: %s",
+            len(events),
+            [
+                (event.client_id, event.event_type_id, event.trigger_time.isoformat())
+                for event in events
+            ],
+            exc_info=exc,
+        )
+        await bury_events(events, exc)
+
+
+# None — буфер выключен (ingest.buffer.enabled) и события пишутся синхронно.
+_event_buffer: Optional[EventBuffer] = None
+
+
+def init_event_buffer(config: EventBufferConfig) -> Optional[EventBuffer]:
+    """Создаёт и запускает буфер, если он включён в конфиге."""
+    global _event_buffer
+    if not config.enabled:
+        _event_buffer = None
+        return None
+    _event_buffer = EventBuffer.from_config(config)
+    _event_buffer.start()
+    return _event_buffer
+
+
+async def close_event_buffer() -> None:
+    """Дописывает очередь в БД и сбрасывает буфер. Вызывается в on_shutdown до close_database."""
+    global _event_buffer
+    if _event_buffer is not None:
+        await _event_buffer.stop()
+    _event_buffer = None
+
+
+def get_event_buffer() -> Optional[EventBuffer]:
+    return _event_buffer
+
+
+async def spool_events(events: Sequence[PendingEvent], exc: BaseException) -> bool:
+    """
+    Откладывает события в локальный спул, если ошибка записи — недоступность БД.
+
+    Returns:
+        True, если события записаны в спул и считаются принятыми.
+    """
+    spool = get_event_spool()
+    if spool is None or not is_unavailable_error(exc):
+        return False
+    try:
+        await spool.append(events)
+    except Exception:
+        logger.exception("[EventSpool] Failed to journal %d event(s)", len(events))
+        return False
+    return True
+
+
+async def bury_events(events: Sequence[PendingEvent], exc: BaseException) -> None:
+    """Сохраняет отвергнутые БД события в dead_events спула, если он включён."""
+    spool = get_event_spool()
+    if spool is None:
+        return
+    try:
+        await spool.bury(events, str(getattr(exc, "orig", None) or exc))
+    except Exception:
+        logger.exception("[EventSpool] Failed to bury %d event(s)", len(events))
+
+
+async def store_events(db: AsyncSession, events: Sequence[PendingEvent]) -> None:
+    """
+    Пишет события через буфер, если он включён, иначе — сразу в БД.
+    Если БД недоступна и включён спул, события журналируются в него.
+    Принятые события учитываются в живых счётчиках.
+    """
+    buffer = get_event_buffer()
+    if buffer is not None:
+        buffer.submit(events)
+    else:
+        try:
+            await insert_events(db, events)
+        except Exception as exc:
+            if not await spool_events(events, exc):
+                raise
+    live_event_counters.record(events)
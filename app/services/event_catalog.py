@@ -0,0 +1,79 @@
+import logging
+import time
+from typing import Any, Mapping, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.handlers.event import (
+    EventValidator,
+    compile_event_validators,
+    get_event_schemas,
+    reset_payload_value_types,
+)
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+
+class EventCatalog:
+    """
+    Версионируемый in-memory каталог схемы событий.
+
+    Держит скомпилированные EventValidator для всех типов событий, собранные
+    из event_types / allowed_payloads / payload_types / value_types. Таблицы
+    меняются только через GraphQL-мутации, которые вызывают invalidate(),
+    поэтому валидное событие проверяется без единого запроса к справочникам.
+
+    Каталог живёт в памяти процесса: при нескольких воркерах Uvicorn мутация
+    сбрасывает его только в своём процессе, остальные перечитают схему по
+    истечении ttl_seconds.
+    """
+
+    DEFAULT_TTL_SECONDS: int = 300
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._validators: Optional[dict[int, EventValidator]] = None
+        self._loaded_at = 0.0
+        self._version = 0
+        self._loads = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    async def get_validators(self, db: AsyncSession) -> Mapping[int, EventValidator]:
+        """Возвращает валидаторы, при необходимости перечитывая схему из БД."""
+        validators = self._validators
+        if validators is None or self._expired():
+            validators = await self.load(db)
+        return validators
+
+    async def load(self, db: AsyncSession) -> dict[int, EventValidator]:
+        version = self._version
+        validators = compile_event_validators(await get_event_schemas(db))
+        # Если каталог сбросили, пока шла загрузка, прочитанная схема могла
+        # устареть — отдаём её текущему вызову, но не кэшируем.
+        if version == self._version:
+            self._validators = validators
+            self._loaded_at = time.monotonic()
+            self._loads += 1
+        return validators
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._validators = None
+        reset_payload_value_types()
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "version": self._version,
+            "loaded": self._validators is not None,
+            "event_types": len(self._validators or {}),
+            "loads": self._loads,
+        }
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._loaded_at > self.ttl_seconds
+
+
+event_catalog = EventCatalog()
@@ -0,0 +1,384 @@
+import asyncio
+import logging
+from datetime import datetime, time, timedelta, UTC
+from typing import Any, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Row, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.config import EventCubeConfig
+from app.database import get_session_maker
+from app.handlers.first_seen import client_first_seen_day
+
+try:
+    import numpy as np
+except ImportError:  # numpy ставится необязательной зависимостью cube
+    np = None
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+_EPOCH = datetime(1970, 1, 1)
+_DAY_SECONDS = 86_400
+_FETCH_BATCH_SIZE = 50_000
+# Единицы datetime64 для типов периодов
+_PERIOD_UNITS = {"day": "D", "month": "M", "year": "Y"}
+
+
+class CubeStats(NamedTuple):
+    """Периоды окна и различные посетители за всё окно, как RollupStats."""
+
+    periods: list[schemas.Statistics]
+    total_visitor_count: int
+    total_unique_visitors: int
+
+
+def _seconds(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(seconds=1)
+
+
+class _Columns:
+    """Столбцы событий с запасом ёмкости: дозапись не копирует весь массив."""
+
+    __slots__ = ("time", "event_type", "client", "created_day", "size")
+
+    def __init__(self, capacity: int = 0):
+        self.time = np.empty(capacity, dtype=np.int64)
+        self.event_type = np.empty(capacity, dtype=np.int16)
+        self.client = np.empty(capacity, dtype=np.int32)
+        self.created_day = np.empty(capacity, dtype=np.int32)
+        self.size = 0
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Row]) -> "_Columns":
+        columns = cls(len(rows))
+        count = len(rows)
+        columns.time[:] = np.fromiter(
+            (_seconds(row.trigger_time) for row in rows), np.int64, count
+        )
+        columns.event_type[:] = np.fromiter(
+            (row.event_type_id for row in rows), np.int16, count
+        )
+        columns.client[:] = np.fromiter(
+            (row.client_id for row in rows), np.int32, count
+        )
+        columns.created_day[:] = np.fromiter(
+            ((row.first_seen - _EPOCH.date()).days for row in rows),
+            np.int32,
+            count,
+        )
+        columns.size = count
+        return columns
+
+    def arrays(self) -> tuple[Any, Any, Any, Any]:
+        size = self.size
+        return (
+            self.time[:size],
+            self.event_type[:size],
+            self.client[:size],
+            self.created_day[:size],
+        )
+
+    def extend(self, other: "_Columns") -> None:
+        end = self.size + other.size
+        if end > len(self.time):
+            self._grow(max(end, 2 * len(self.time), 1024))
+        for target, source in zip(self._all(), other.arrays()):
+            target[self.size : end] = source
+        self.size = end
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._all())
+
+    def _all(self) -> tuple[Any, Any, Any, Any]:
+        return self.time, self.event_type, self.client, self.created_day
+
+    def _grow(self, capacity: int) -> None:
+        grown = []
+        for column in self._all():
+            new = np.empty(capacity, dtype=column.dtype)
+            new[: self.size] = column[: self.size]
+            grown.append(new)
+        self.time, self.event_type, self.client, self.created_day = grown
+
+
+class EventCube:
+    """
+    Колоночная копия событий за последние window_days дней в памяти процесса.
+
+    Время события хранится секундами эпохи (int64), тип события — int16,
+    клиент — int32, день создания клиента — днями эпохи (int32): около
+    18 байт на событие. Статистика по окнам, которые начинаются не раньше
+    horizon, считается векторно (unique/bincount) и совпадает с
+    get_period_stats и get_aggregated_stats.
+
+    Копия строится из БД при старте и догоняет её по id событий раз в
+    sync_interval_seconds. Новые id читаются с отставанием на один запуск,
+    как в refresh_popular_audiences: к этому времени транзакции, которые
+    их выдали, успевают завершиться. Поэтому копия видит и события других
+    воркеров, буфера и спула, но отстаёт от БД не больше чем на два
+    интервала. Событие, транзакция которого шла дольше, попадёт в копию при
+    перестроении, которое sync() делает со сдвигом горизонта, то есть
+    раз в сутки.
+    """
+
+    DEFAULT_WINDOW_DAYS: int = 90
+    DEFAULT_SYNC_INTERVAL_SECONDS: float = 10.0
+
+    def __init__(
+        self,
+        window_days: int = DEFAULT_WINDOW_DAYS,
+        sync_interval_seconds: float = DEFAULT_SYNC_INTERVAL_SECONDS,
+    ):
+        if np is None:
+            raise RuntimeError("Для EventCube нужен numpy")
+        self.window_days = window_days
+        self.sync_interval_seconds = sync_interval_seconds
+        self.horizon: Optional[datetime] = None
+
+        self._columns = _Columns()
+        self._last_event_id = 0
+        self._seen_event_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+        self._syncs = 0
+        self._queries = 0
+
+    @classmethod
+    def from_config(cls, config: EventCubeConfig) -> "EventCube":
+        return cls(
+            window_days=config.window_days,
+            sync_interval_seconds=config.sync_interval_seconds,
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.horizon is not None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def rebuild(self, db: AsyncSession, now: datetime) -> None:
+        """Заново читает события окна из БД; до замены копия отвечает по старым."""
+        horizon = self._horizon(now)
+        current_max = await self._max_event_id(db)
+        columns = await self._fetch(
+            db,
+            models.Event.trigger_time >= horizon,
+            models.Event.id <= current_max,
+        )
+        self._columns = columns
+        self._last_event_id = self._seen_event_id = current_max
+        self.horizon = horizon
+
+    async def sync(self, db: AsyncSession, now: datetime) -> None:
+        if self.horizon is None:
+            await self.rebuild(db, now)
+            return
+        current_max = await self._max_event_id(db)
+        after, until = self._last_event_id, self._seen_event_id
+        if until > after:
+            self._columns.extend(
+                await self._fetch(
+                    db,
+                    models.Event.id > after,
+                    models.Event.id <= until,
+                    models.Event.trigger_time >= self.horizon,
+                )
+            )
+        self._last_event_id, self._seen_event_id = until, current_max
+
+        if self._horizon(now) > self.horizon:
+            # Раз в день, со сдвигом горизонта, копия читается заново: так в
+            # неё попадают события, чьи транзакции завершились позже, чем
+            # их id прочитала дозапись. Окна раньше нового горизонта снова
+            # идут в БД
+            await self.rebuild(db, now)
+        self._syncs += 1
+
+    def covers(self, period_type: str, start: datetime) -> bool:
+        """Считается ли окно от start по копии, без запросов к БД."""
+        return (
+            period_type in _PERIOD_UNITS
+            and self.horizon is not None
+            and start >= self.horizon
+        )
+
+    def window_stats(
+        self,
+        period_type: str,
+        start: datetime,
+        end: datetime,
+        event_type_id: Optional[int] = None,
+    ) -> Optional[CubeStats]:
+        """Статистика окна или None, если окно начинается раньше копии."""
+        if not self.covers(period_type, start):
+            return None
+        unit = _PERIOD_UNITS[period_type]
+        self._queries += 1
+
+        times, event_types, clients, created_days = self._columns.arrays()
+        mask = (times >= _seconds(start)) & (times < _seconds(end))
+        if event_type_id is not None:
+            mask &= event_types == event_type_id
+        days = times[mask] // _DAY_SECONDS
+        if not days.size:
+            return CubeStats([], 0, 0)
+        clients = clients[mask].astype(np.int64)
+
+        # Период дня берётся из таблицы на дни окна, а не преобразованием
+        # каждой строки; таблица покрывает периоды окна целиком, чтобы
+        # клиент, созданный в тот же период, но вне дней с событиями,
+        # тоже считался новым
+        first_period, last_period = _truncate(np.array([days.min(), days.max()]), unit)
+        span_start = _period_start_day(first_period, unit)
+        table = _truncate(
+            np.arange(span_start, _period_start_day(last_period + 1, unit)), unit
+        )
+        period = table[days - span_start]
+        offset = created_days[mask] - span_start
+        in_span = (offset >= 0) & (offset < len(table))
+        is_new = in_span & (table[np.clip(offset, 0, len(table) - 1)] == period)
+
+        index = period - first_period
+        visits = np.bincount(index)
+        # Различные пары (период, клиент): клиент неотрицателен и влезает в 32 бита
+        pairs = (index << 32) | clients
+        visitors = np.bincount(_distinct(pairs) >> 32, minlength=len(visits))
+        new_visitors = np.bincount(
+            _distinct(pairs[is_new]) >> 32, minlength=len(visits)
+        )
+
+        periods = [
+            schemas.Statistics(
+                period=str(
+                    np.datetime64(int(first_period + position), unit).astype(
+                        "datetime64[D]"
+                    )
+                ),
+                all_visits=int(visits[position]),
+                visitor_count=int(visitors[position]),
+                unique_visitors=int(new_visitors[position]),
+            )
+            for position in np.flatnonzero(visits)
+        ]
+        return CubeStats(
+            periods,
+            int(_distinct(clients).size),
+            int(_distinct(clients[is_new]).size),
+        )
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name="event-cube-sync")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "ready": self.ready,
+            "horizon": self.horizon.isoformat() if self.horizon else None,
+            "events": self._columns.size,
+            "bytes": self._columns.nbytes,
+            "last_event_id": self._last_event_id,
+            "syncs": self._syncs,
+            "queries": self._queries,
+        }
+
+    # ── Внутреннее ───────────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with get_session_maker()() as db:
+                    await self.sync(db, datetime.now(UTC).replace(tzinfo=None))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[EventCube] Failed to sync events")
+            await asyncio.sleep(self.sync_interval_seconds)
+
+    def _horizon(self, now: datetime) -> datetime:
+        return datetime.combine(now.date() - timedelta(days=self.window_days), time.min)
+
+    @staticmethod
+    async def _max_event_id(db: AsyncSession) -> int:
+        return int((await db.execute(select(func.max(models.Event.id)))).scalar() or 0)
+
+    @staticmethod
+    async def _fetch(db: AsyncSession, *filters) -> _Columns:
+        columns = _Columns()
+        result = await db.stream(
+            select(
+                models.Event.trigger_time,
+                models.Event.event_type_id,
+                models.Event.client_id,
+                client_first_seen_day().label("first_seen"),
+            )
+            .where(*filters)
+            .execution_options(yield_per=_FETCH_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            columns.extend(_Columns.from_rows(rows))
+        return columns
+
+
+def _truncate(days, unit: str):
+    """Дни эпохи → номер периода в единицах unit (дни, месяцы или годы эпохи)."""
+    return days.astype("datetime64[D]").astype(f"datetime64[{unit}]").astype(np.int64)
+
+
+def _period_start_day(period: int, unit: str) -> int:
+    return int(
+        np.datetime64(int(period), unit).astype("datetime64[D]").astype(np.int64)
+    )
+
+
+def _distinct(values):
+    # Сортировка с отбором соседей быстрее np.unique на миллионах значений
+    values = np.sort(values)
+    if not values.size:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+# None, пока on_startup не построит куб (analytics.cube.enabled и есть numpy).
+_event_cube: Optional[EventCube] = None
+
+
+def init_event_cube(config: EventCubeConfig) -> Optional[EventCube]:
+    global _event_cube
+    _event_cube = None
+    if not config.enabled:
+        return None
+    if np is None:
+        logger.warning(
+            "[EventCube] analytics.cube.enabled is set but numpy is not installed "
+            "(install the cube extra); statistics will be read from the database"
+        )
+        return None
+    _event_cube = EventCube.from_config(config)
+    _event_cube.start()
+    return _event_cube
+
+
+async def close_event_cube() -> None:
+    global _event_cube
+    if _event_cube is not None:
+        await _event_cube.stop()
+    _event_cube = None
+
+
+def get_event_cube() -> Optional[EventCube]:
+    return _event_cube
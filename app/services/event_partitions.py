@@ -0,0 +1,251 @@
+import logging
+import re
+from datetime import date
+from typing import Iterable, Literal, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app import models
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+# payloads ссылается на events составным FK (event_id, trigger_time), поэтому
+# секции создаются от родителя к потомку, а отцепляются и удаляются в обратном порядке
+PARTITIONED_TABLES = (models.Event.__tablename__, models.Payload.__tablename__)
+
+type RetentionAction = Literal["detach", "drop"]
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def parse_partition_month(table: str, name: str) -> Optional[date]:
+    """Месяц секции по её имени или None для чужих таблиц и DEFAULT-секции."""
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})_(\d{{2}})", name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def upcoming_months(today: date, premake_months: int) -> list[date]:
+    """Текущий месяц и premake_months следующих."""
+    current = month_start(today)
+    return [add_months(current, offset) for offset in range(premake_months + 1)]
+
+
+def retention_cutoff(today: date, retention_months: int) -> date:
+    """Секции месяцев раньше возвращённой даты считаются просроченными."""
+    return add_months(month_start(today), -retention_months)
+
+
+def expired_partitions(table: str, names: Iterable[str], cutoff: date) -> list[str]:
+    expired = []
+    for name in names:
+        month = parse_partition_month(table, name)
+        if month is not None and month < cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    """events — секционированная таблица (relkind 'p'). Только PostgreSQL."""
+    relkind = (
+        await conn.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": models.Event.__tablename__},
+        )
+    ).scalar_one_or_none()
+    return relkind == "p"
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> list[str]:
+    rows = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    )
+    return [str(name) for name in rows.scalars()]
+
+
+async def create_partitions(conn: AsyncConnection, months: Iterable[date]) -> list[str]:
+    """
+    Создаёт недостающие месячные секции events и payloads.
+
+    PostgreSQL не создаёт секцию, пока DEFAULT-секция хранит строки её
+    диапазона, поэтому такие строки на время создания переносятся во
+    временные таблицы и возвращаются уже в новую секцию.
+
+    Returns:
+        Имена созданных секций.
+    """
+    existing = {
+        table: set(await list_partitions(conn, table)) for table in PARTITIONED_TABLES
+    }
+    created: list[str] = []
+    for month in months:
+        missing = [
+            table
+            for table in PARTITIONED_TABLES
+            if partition_name(table, month) not in existing[table]
+        ]
+        if not missing:
+            continue
+        # Удаление строк events каскадом удалило бы их пэйлоады, поэтому
+        # вместе с events переносятся и пэйлоады того же месяца
+        moved = PARTITIONED_TABLES if models.Event.__tablename__ in missing else missing
+        bounds = (month.isoformat(), add_months(month, 1).isoformat())
+        for table in reversed(moved):
+            await _stash_month_rows(conn, table, bounds)
+        for table in missing:
+            name = partition_name(table, month)
+            await conn.execute(
+                text(
+                    f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ('{bounds[0]}') TO ('{bounds[1]}')"
+                )
+            )
+            created.append(name)
+        for table in moved:
+            await _restore_month_rows(conn, table)
+    return created
+
+
+def _stash_name(table: str) -> str:
+    return f"_{table}_moving"
+
+
+async def _stash_month_rows(
+    conn: AsyncConnection, table: str, bounds: tuple[str, str]
+) -> None:
+    where = f"trigger_time >= '{bounds[0]}' AND trigger_time < '{bounds[1]}'"
+    await conn.execute(
+        text(
+            f'CREATE TEMP TABLE "{_stash_name(table)}" ON COMMIT DROP AS '
+            f'SELECT * FROM "{table}" WHERE {where}'
+        )
+    )
+    await conn.execute(text(f'DELETE FROM "{table}" WHERE {where}'))
+
+
+async def _restore_month_rows(conn: AsyncConnection, table: str) -> None:
+    stash = _stash_name(table)
+    moved = await conn.execute(text(f'INSERT INTO "{table}" SELECT * FROM "{stash}"'))
+    await conn.execute(text(f'DROP TABLE "{stash}"'))
+    if moved.rowcount:
+        logger.info(
+            "[EventPartitions] Moved %d row(s) of %s out of the DEFAULT partition",
+            moved.rowcount,
+            table,
+        )
+
+
+async def expire_partitions(
+    conn: AsyncConnection, cutoff: date, action: RetentionAction
+) -> list[str]:
+    """
+    Отцепляет или удаляет секции месяцев раньше cutoff.
+
+    Отцеплённая секция payloads теряет FK на events: иначе её строки
+    не дали бы отцепить соответствующую секцию events. Просроченные строки
+    DEFAULT-секций при detach переносятся в таблицы <table>_default_expired,
+    при drop удаляются.
+
+    Returns:
+        Имена отцеплённых или удалённых секций.
+    """
+    await _expire_default_rows(conn, cutoff, action)
+    expired: list[str] = []
+    for table in reversed(PARTITIONED_TABLES):
+        for name in expired_partitions(
+            table, await list_partitions(conn, table), cutoff
+        ):
+            # Секцию events держит FK секционированной payloads, поэтому
+            # и при drop она сначала отцепляется, а затем удаляется
+            await conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            if action == "drop":
+                await conn.execute(text(f'DROP TABLE "{name}"'))
+            else:
+                await _drop_foreign_keys_to_events(conn, name)
+            expired.append(name)
+    return expired
+
+
+async def _expire_default_rows(
+    conn: AsyncConnection, cutoff: date, action: RetentionAction
+) -> None:
+    """
+    DEFAULT-секция не отцепляется по месяцам, поэтому её строки раньше
+    cutoff уходят отдельно — иначе они хранились бы бессрочно.
+    """
+    where = f"trigger_time < '{cutoff.isoformat()}'"
+    for table in reversed(PARTITIONED_TABLES):
+        default = f"{table}_default"
+        if action == "detach":
+            archive = f"{default}_expired"
+            await conn.execute(
+                text(f'CREATE TABLE IF NOT EXISTS "{archive}" (LIKE "{table}")')
+            )
+            await conn.execute(
+                text(f'INSERT INTO "{archive}" SELECT * FROM "{default}" WHERE {where}')
+            )
+        removed = await conn.execute(text(f'DELETE FROM "{default}" WHERE {where}'))
+        if removed.rowcount:
+            logger.info(
+                "[EventPartitions] %s %d expired row(s) of %s",
+                "Dropped" if action == "drop" else "Detached",
+                removed.rowcount,
+                default,
+            )
+
+
+async def _drop_foreign_keys_to_events(conn: AsyncConnection, table: str) -> None:
+    constraints = (
+        await conn.execute(
+            text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = to_regclass(:table) AND contype = 'f' "
+                "AND confrelid = to_regclass(:events)"
+            ),
+            {"table": table, "events": models.Event.__tablename__},
+        )
+    ).scalars()
+    for constraint in list(constraints):
+        await conn.execute(
+            text(f'ALTER TABLE "{table}" DROP CONSTRAINT "{constraint}"')
+        )
+
+
+async def maintain_partitions(
+    conn: AsyncConnection,
+    today: date,
+    premake_months: int,
+    retention_months: Optional[int] = None,
+    retention_action: RetentionAction = "detach",
+) -> tuple[list[str], list[str]]:
+    """
+    Создаёт секции наперёд и применяет retention. Транзакцией управляет вызывающий код.
+
+    Returns:
+        Имена созданных и просроченных секций.
+    """
+    created = await create_partitions(conn, upcoming_months(today, premake_months))
+    expired: list[str] = []
+    if retention_months is not None:
+        expired = await expire_partitions(
+            conn, retention_cutoff(today, retention_months), retention_action
+        )
+    return created, expired
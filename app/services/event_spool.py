@@ -0,0 +1,369 @@
+import json
+import logging
+import uuid
+from datetime import datetime
+from contextlib import asynccontextmanager
+from os import makedirs, path
+from typing import Any, AsyncIterator, Optional, Sequence
+
+import aiosqlite
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import (
+    DBAPIError,
+    DisconnectionError,
+    IntegrityError,
+    InterfaceError,
+    OperationalError,
+)
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import models
+from app.config import EventSpoolConfig
+from app.handlers.event import PendingEvent, write_events
+
+logger = logging.getLogger(f"uvicorn.{__name__}")
+
+_CREATE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS spool_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS spooled_events (
+    seq           INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id     INTEGER NOT NULL,
+    event_type_id INTEGER NOT NULL,
+    trigger_time  TEXT NOT NULL,
+    payloads      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dead_events (
+    seq           INTEGER PRIMARY KEY,
+    client_id     INTEGER NOT NULL,
+    event_type_id INTEGER NOT NULL,
+    trigger_time  TEXT NOT NULL,
+    payloads      TEXT NOT NULL,
+    error         TEXT NOT NULL,
+    failed_at     TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def is_unavailable_error(exc: BaseException) -> bool:
+    """
+    Ошибка говорит о недоступности БД или пула, а не о самих данных.
+
+    Только такие события имеет смысл откладывать в спул: нарушение
+    ограничений при повторе упадёт так же.
+    """
+    if isinstance(exc, DBAPIError):
+        return exc.connection_invalidated or isinstance(
+            exc, (OperationalError, InterfaceError)
+        )
+    return isinstance(exc, (PoolTimeoutError, DisconnectionError, OSError))
+
+
+class EventSpool:
+    """
+    Локальный журнал событий в SQLite-файле на время недоступности основной БД.
+
+    append() дописывает события одной транзакцией (WAL, synchronous=FULL) —
+    после возврата они переживут падение процесса. replay() переносит их
+    в основную БД пачками. Номер последней перенесённой записи хранится
+    в spool_checkpoints основной БД и обновляется в той же транзакции, что
+    и вставка событий, поэтому каждое событие попадает в БД ровно один раз.
+    Записи, которые БД отвергает по содержимому, уходят в dead_events.
+    """
+
+    def __init__(self, db_path: str, replay_batch_size: int = 1_000):
+        self.db_path = db_path
+        self.replay_batch_size = replay_batch_size
+        self._spool_id: Optional[str] = None
+
+        self._appended_events = 0
+        self._replayed_events = 0
+        self._dead_events = 0
+        self._failed_replays = 0
+
+    @classmethod
+    def from_config(cls, config: EventSpoolConfig, static_path: str) -> "EventSpool":
+        db_path = config.path
+        if not path.isabs(db_path):
+            db_path = path.join(static_path, db_path)
+        return cls(db_path, replay_batch_size=config.replay_batch_size)
+
+    async def open(self) -> str:
+        """Создаёт файл и схему спула, возвращает его spool_id."""
+        if self._spool_id is not None:
+            return self._spool_id
+
+        directory = path.dirname(self.db_path)
+        if directory:
+            makedirs(directory, exist_ok=True)
+        async with self._connect() as db:
+            await db.execute("PRAGMA journal_mode=WAL")
+            await db.executescript(_CREATE_SCHEMA_SQL)
+            await db.execute(
+                "INSERT OR IGNORE INTO spool_meta (key, value) VALUES ('spool_id', ?)",
+                (str(uuid.uuid4()),),
+            )
+            await db.commit()
+            async with db.execute(
+                "SELECT value FROM spool_meta WHERE key = 'spool_id'"
+            ) as cursor:
+                row = await cursor.fetchone()
+        self._spool_id = str(row[0])
+        return self._spool_id
+
+    async def append(self, events: Sequence[PendingEvent]) -> None:
+        if not events:
+            return
+        await self.open()
+        async with self._connect() as db:
+            await db.executemany(
+                """
+                INSERT INTO spooled_events
+                    (client_id, event_type_id, trigger_time, payloads)
+                VALUES (?, ?, ?, ?)
+                """,
+                [
+                    (
+                        event.client_id,
+                        event.event_type_id,
+                        event.trigger_time.isoformat(),
+                        json.dumps(event.payloads),
+                    )
+                    for event in events
+                ],
+            )
+            await db.commit()
+        self._appended_events += len(events)
+
+    async def pending_count(self) -> int:
+        await self.open()
+        async with self._connect() as db:
+            async with db.execute("SELECT COUNT(*) FROM spooled_events") as cursor:
+                row = await cursor.fetchone()
+        return int(row[0])
+
+    async def replay(self, session_maker: async_sessionmaker[AsyncSession]) -> int:
+        """
+        Переносит накопленные события в основную БД.
+
+        Останавливается на первой ошибке доступности БД — следующий запуск
+        задачи продолжит с сохранённой позиции.
+
+        Returns:
+            Количество перенесённых событий.
+        """
+        spool_id = await self.open()
+        replayed = 0
+        # До этого номера записи переносятся по одной, чтобы отсеять
+        # отвергнутую БД запись, не хороня вместе с ней всю пачку
+        isolate_until = 0
+        while True:
+            async with session_maker() as db:
+                last_seq = await self._load_checkpoint(db, spool_id)
+            await self._forget_up_to(last_seq)
+
+            limit = 1 if last_seq < isolate_until else self.replay_batch_size
+            batch = await self._read_batch(last_seq, limit)
+            if not batch:
+                return replayed
+
+            seqs = [seq for seq, _ in batch]
+            try:
+                async with session_maker() as db:
+                    await write_events(db, [event for _, event in batch])
+                    result = await db.execute(
+                        update(models.SpoolCheckpoint)
+                        .where(
+                            models.SpoolCheckpoint.spool_id == spool_id,
+                            models.SpoolCheckpoint.last_seq == last_seq,
+                        )
+                        .values(last_seq=seqs[-1])
+                    )
+                    if result.rowcount != 1:
+                        # Тот же спул параллельно переносит другой воркер
+                        await db.rollback()
+                        return replayed
+                    await db.commit()
+            except IntegrityError as exc:
+                if len(batch) > 1:
+                    isolate_until = seqs[-1]
+                    continue
+                logger.error(
+                    "[EventSpool] Spool record %d rejected by DB, moved to dead_events: %s",
+                    seqs[0],
+                    exc,
+                )
+                await self._bury(seqs, str(exc.orig or exc))
+                continue
+            except Exception:
+                self._failed_replays += 1
+                logger.warning(
+                    "[EventSpool] Replay of %d event(s) failed, will retry later",
+                    len(batch),
+                    exc_info=True,
+                )
+                return replayed
+
+            await self._forget_up_to(seqs[-1])
+            replayed += len(batch)
+            self._replayed_events += len(batch)
+
+    async def metrics(self) -> dict[str, Any]:
+        return {
+            "pending_events": await self.pending_count(),
+            "appended_events": self._appended_events,
+            "replayed_events": self._replayed_events,
+            "dead_events": self._dead_events,
+            "failed_replays": self._failed_replays,
+        }
+
+    # ── Внутреннее ───────────────────────────────────────────────────────────
+
+    @asynccontextmanager
+    async def _connect(self) -> AsyncIterator[aiosqlite.Connection]:
+        async with aiosqlite.connect(self.db_path) as db:
+            # Подтверждённая запись должна пережить и падение ОС, не только процесса
+            await db.execute("PRAGMA synchronous=FULL")
+            yield db
+
+    @staticmethod
+    async def _load_checkpoint(db: AsyncSession, spool_id: str) -> int:
+        last_seq = (
+            await db.execute(
+                select(models.SpoolCheckpoint.last_seq).where(
+                    models.SpoolCheckpoint.spool_id == spool_id
+                )
+            )
+        ).scalar_one_or_none()
+        if last_seq is not None:
+            return int(last_seq)
+        try:
+            await db.execute(
+                insert(models.SpoolCheckpoint).values(spool_id=spool_id, last_seq=0)
+            )
+            await db.commit()
+        except IntegrityError:
+            # Строку успел создать другой воркер
+            await db.rollback()
+        return 0
+
+    async def _read_batch(
+        self, after_seq: int, limit: int
+    ) -> list[tuple[int, PendingEvent]]:
+        async with self._connect() as db:
+            async with db.execute(
+                """
+                SELECT seq, client_id, event_type_id, trigger_time, payloads
+                FROM spooled_events
+                WHERE seq > ?
+                ORDER BY seq
+                LIMIT ?
+                """,
+                (after_seq, limit),
+            ) as cursor:
+                rows = await cursor.fetchall()
+        return [
+            (
+                int(seq),
+                PendingEvent(
+                    client_id=int(client_id),
+                    event_type_id=int(event_type_id),
+                    trigger_time=datetime.fromisoformat(trigger_time),
+                    payloads=[
+                        (int(type_id), str(value))
+                        for type_id, value in json.loads(payloads)
+                    ],
+                ),
+            )
+            for seq, client_id, event_type_id, trigger_time, payloads in rows
+        ]
+
+    async def _forget_up_to(self, seq: int) -> None:
+        if seq <= 0:
+            return
+        async with self._connect() as db:
+            await db.execute("DELETE FROM spooled_events WHERE seq <= ?", (seq,))
+            await db.commit()
+
+    async def bury(self, events: Sequence[PendingEvent], error: str) -> None:
+        """
+        Кладёт отвергнутые БД события сразу в dead_events, минуя перенос.
+
+        Номер каждой записи выдаёт spooled_events в той же транзакции,
+        поэтому он не пересечётся с номерами журнала.
+        """
+        if not events:
+            return
+        await self.open()
+        async with self._connect() as db:
+            seqs = []
+            for event in events:
+                cursor = await db.execute(
+                    """
+                    INSERT INTO spooled_events
+                        (client_id, event_type_id, trigger_time, payloads)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (
+                        event.client_id,
+                        event.event_type_id,
+                        event.trigger_time.isoformat(),
+                        json.dumps(event.payloads),
+                    ),
+                )
+                seqs.append(cursor.lastrowid)
+            await self._move_to_dead(db, seqs, error)
+            await db.commit()
+        self._dead_events += len(events)
+
+    async def _bury(self, seqs: list[int], error: str) -> None:
+        async with self._connect() as db:
+            await self._move_to_dead(db, seqs, error)
+            await db.commit()
+        self._dead_events += len(seqs)
+
+    @staticmethod
+    async def _move_to_dead(
+        db: aiosqlite.Connection, seqs: list[int], error: str
+    ) -> None:
+        placeholders = ", ".join("?" for _ in seqs)
+        await db.execute(
+            f"""
+            INSERT OR REPLACE INTO dead_events
+                (seq, client_id, event_type_id, trigger_time, payloads, error)
+            SELECT seq, client_id, event_type_id, trigger_time, payloads, ?
+            FROM spooled_events WHERE seq IN ({placeholders})
+            """,
+            (error, *seqs),
+        )
+        await db.execute(
+            f"DELETE FROM spooled_events WHERE seq IN ({placeholders})", seqs
+        )
+
+
+# Спул открывает on_startup при ingest.spool.enabled.
+_event_spool: Optional[EventSpool] = None
+
+
+async def init_event_spool(
+    config: EventSpoolConfig, static_path: str
+) -> Optional[EventSpool]:
+    global _event_spool
+    if not config.enabled:
+        _event_spool = None
+        return None
+    _event_spool = EventSpool.from_config(config, static_path)
+    await _event_spool.open()
+    return _event_spool
+
+
+def close_event_spool() -> None:
+    global _event_spool
+    _event_spool = None
+
+
+def get_event_spool() -> Optional[EventSpool]:
+    return _event_spool
@@ -0,0 +1,111 @@
+import time
+from collections import Counter
+from typing import Any, Callable, Iterable
+
+from app.handlers.event import PendingEvent
+
+# Окна счётчиков в секундах. Минута считается секундными корзинами,
+# час и сутки — минутными
+LIVE_WINDOWS: dict[str, int] = {"minute": 60, "hour": 3_600, "day": 86_400}
+_SECOND_BUCKETS = LIVE_WINDOWS["minute"]
+_MINUTE_BUCKETS = LIVE_WINDOWS["day"] // 60
+
+
+class _Ring:
+    """
+    Кольцо корзин фиксированного шага.
+
+    Корзина помнит номер своего шага и обнуляется при повторном
+    использовании, поэтому запись — O(1) без фоновой очистки.
+    """
+
+    __slots__ = ("steps", "counts")
+
+    def __init__(self, size: int):
+        self.steps = [-1] * size
+        self.counts = [0] * size
+
+    def add(self, step: int, count: int) -> None:
+        index = step % len(self.steps)
+        if self.steps[index] != step:
+            self.steps[index] = step
+            self.counts[index] = 0
+        self.counts[index] += count
+
+    def total(self, first_step: int, last_step: int) -> int:
+        return sum(
+            count
+            for step, count in zip(self.steps, self.counts)
+            if first_step <= step <= last_step
+        )
+
+
+class LiveEventCounters:
+    """
+    Скользящие счётчики принятых событий по типам за минуту, час и сутки.
+
+    Час и сутки считаются одним кольцом минутных корзин, поэтому их
+    граница сдвигается раз в минуту. Запись увеличивает по корзине на шаг —
+    O(1) на тип в пачке; чтение суммирует корзины и вызывается только
+    при отдаче снимка. Счётчики живут в памяти процесса: при нескольких
+    воркерах Uvicorn каждый считает свои события.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._seconds: dict[int, _Ring] = {}
+        self._minutes: dict[int, _Ring] = {}
+        self._recorded = 0
+
+    def record(self, events: Iterable[PendingEvent]) -> None:
+        for event_type_id, count in Counter(
+            event.event_type_id for event in events
+        ).items():
+            self.add(event_type_id, count)
+
+    def add(self, event_type_id: int, count: int = 1) -> None:
+        now = int(self._clock())
+        seconds = self._seconds.get(event_type_id)
+        if seconds is None:
+            seconds = self._seconds[event_type_id] = _Ring(_SECOND_BUCKETS)
+            self._minutes[event_type_id] = _Ring(_MINUTE_BUCKETS)
+        seconds.add(now, count)
+        self._minutes[event_type_id].add(now // 60, count)
+        self._recorded += count
+
+    def snapshot(self) -> dict[str, Any]:
+        """Счётчики по типам событий и сумма по всем типам за каждое окно."""
+        now = int(self._clock())
+        minute = now // 60
+        by_type: dict[int, dict[str, int]] = {}
+        for event_type_id, seconds in sorted(self._seconds.items()):
+            minutes = self._minutes[event_type_id]
+            counts = {
+                "minute": seconds.total(now - _SECOND_BUCKETS + 1, now),
+                "hour": minutes.total(minute - LIVE_WINDOWS["hour"] // 60 + 1, minute),
+                "day": minutes.total(minute - _MINUTE_BUCKETS + 1, minute),
+            }
+            if counts["day"]:
+                by_type[event_type_id] = counts
+        return {
+            "at": now,
+            "event_types": by_type,
+            "total": {
+                name: sum(counts[name] for counts in by_type.values())
+                for name in LIVE_WINDOWS
+            },
+        }
+
+    def clear(self) -> None:
+        self._seconds.clear()
+        self._minutes.clear()
+        self._recorded = 0
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "event_types": len(self._seconds),
+            "recorded": self._recorded,
+        }
+
+
+live_event_counters = LiveEventCounters()
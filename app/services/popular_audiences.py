@@ -0,0 +1,90 @@
+import hashlib
+import time
+from typing import Any, NamedTuple, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.handlers.get import get_popular_audiences
+from app.handlers.popular import read_popular_audiences
+
+_response_adapter = TypeAdapter(list[schemas.PopularAudience])
+
+
+class PopularSnapshot(NamedTuple):
+    body: bytes
+    etag: str
+    materialized: bool
+
+
+class PopularAudiencesCache:
+    """
+    Готовый JSON-ответ GET /api/get/popular с ETag.
+
+    Рейтинг читается из popular_audience_weights, которую обновляет задача
+    refresh_popular_audiences; пока рейтинг не построен, он считается
+    по событиям. Ответ сериализуется один раз и отдаётся из памяти до
+    истечения ttl_seconds или invalidate() после обновления рейтинга, так что
+    запрос к эндпоинту обычно не обращается к БД. При нескольких воркерах
+    Uvicorn остальные процессы увидят новый рейтинг не позже чем через TTL.
+    """
+
+    DEFAULT_TTL_SECONDS: int = 60
+    DEFAULT_LIMIT: int = 100
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        limit: int = DEFAULT_LIMIT,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.limit = limit
+        self._snapshot: Optional[PopularSnapshot] = None
+        self._loaded_at = 0.0
+        self._version = 0
+        self._loads = 0
+        self._hits = 0
+
+    async def get(self, db: AsyncSession) -> PopularSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None or self._expired():
+            return await self.load(db)
+        self._hits += 1
+        return snapshot
+
+    async def load(self, db: AsyncSession) -> PopularSnapshot:
+        version = self._version
+        audiences = await read_popular_audiences(db, self.limit)
+        materialized = audiences is not None
+        if audiences is None:
+            audiences = await get_popular_audiences(db, self.limit)
+        body = _response_adapter.dump_json(audiences)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        snapshot = PopularSnapshot(body, etag, materialized)
+        # Сброс во время загрузки: прочитанный рейтинг мог устареть
+        if version == self._version:
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+            self._loads += 1
+        return snapshot
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._snapshot = None
+
+    def metrics(self) -> dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "materialized": snapshot.materialized if snapshot is not None else None,
+            "etag": snapshot.etag if snapshot is not None else None,
+            "loads": self._loads,
+            "hits": self._hits,
+        }
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._loaded_at > self.ttl_seconds
+
+
+popular_audiences_cache = PopularAudiencesCache()
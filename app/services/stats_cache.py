@@ -0,0 +1,176 @@
+from datetime import date, datetime, timedelta, UTC
+from typing import Any, Awaitable, Callable, Iterable, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.handlers.get import get_period_stats
+from app.handlers.rollup import period_key
+from app.helpers.ttl_cache import TTLCache
+from app.services.event_partitions import add_months
+
+
+type Fetch = Callable[[datetime, datetime], Awaitable[list[schemas.Statistics]]]
+
+
+class PeriodKey(NamedTuple):
+    period_type: str
+    period: str
+    event_type_id: Optional[int]
+    approximate: bool
+
+
+def period_floor(period_type: str, value: datetime) -> datetime:
+    key = period_key(period_type, value.date())
+    if isinstance(key, int):
+        return datetime(key, 1, 1)
+    return datetime.combine(key, datetime.min.time())
+
+
+def next_period(period_type: str, value: datetime) -> datetime:
+    if period_type == "day":
+        return value + timedelta(days=1)
+    if period_type == "month":
+        return datetime.combine(add_months(value.date(), 1), datetime.min.time())
+    return value.replace(year=value.year + 1)
+
+
+class PeriodStatsCache:
+    """
+    Кэш статистики по отдельным периодам (день, месяц, год).
+
+    Закрытые периоды — закончившиеся раньше now - closed_grace_seconds —
+    живут closed_ttl_seconds: их статистика меняется только опоздавшими
+    событиями. Запас нужен событиям, которые доходят до БД с задержкой
+    (буфер, spool). Текущие периоды живут open_ttl_seconds. Пустой период
+    тоже кэшируется, чтобы не запрашивать его снова.
+
+    Опоздавшие события в давно закрытые дни находит задача
+    refresh_stats_rollup и сбрасывает их периоды через invalidate_days().
+    Кэш живёт в памяти процесса, и при нескольких воркерах Uvicorn сброс
+    действует только в процессе, где отработала задача; остальные увидят
+    пересчёт не позже чем через closed_ttl_seconds.
+    """
+
+    DEFAULT_OPEN_TTL_SECONDS: float = 30.0
+    # Как интервал refresh_stats_rollup: дольше пересчёт не запаздывает
+    DEFAULT_CLOSED_TTL_SECONDS: float = 600.0
+    DEFAULT_CLOSED_GRACE_SECONDS: float = 3600.0
+    DEFAULT_MAX_ENTRIES: int = 200_000
+
+    def __init__(
+        self,
+        open_ttl_seconds: float = DEFAULT_OPEN_TTL_SECONDS,
+        closed_ttl_seconds: float = DEFAULT_CLOSED_TTL_SECONDS,
+        closed_grace_seconds: float = DEFAULT_CLOSED_GRACE_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.open_ttl_seconds = open_ttl_seconds
+        self.closed_ttl_seconds = closed_ttl_seconds
+        self.closed_grace_seconds = closed_grace_seconds
+        self._entries: TTLCache[PeriodKey, Optional[schemas.Statistics]] = TTLCache(
+            max_entries
+        )
+
+    def lookup(self, key: PeriodKey) -> tuple[bool, Optional[schemas.Statistics]]:
+        """(найден ли период, его статистика или None для пустого периода)."""
+        return self._entries.get(key)
+
+    def store(
+        self, key: PeriodKey, stats: Optional[schemas.Statistics], closed: bool
+    ) -> None:
+        self._entries.put(
+            key,
+            stats,
+            self.closed_ttl_seconds if closed else self.open_ttl_seconds,
+        )
+
+    def is_closed(self, period_end: datetime, now: datetime) -> bool:
+        return period_end <= now - timedelta(seconds=self.closed_grace_seconds)
+
+    def invalidate_days(self, days: Iterable[date]) -> int:
+        """Сбрасывает периоды всех типов, в которые попадают days."""
+        periods = {
+            (
+                period_type,
+                period_floor(period_type, datetime.combine(day, datetime.min.time()))
+                .date()
+                .isoformat(),
+            )
+            for day in days
+            for period_type in ("day", "month", "year")
+        }
+        return self._entries.evict(lambda key: key[:2] in periods)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> dict[str, Any]:
+        return self._entries.metrics()
+
+
+period_stats_cache = PeriodStatsCache()
+
+
+async def get_cached_period_stats(
+    db: AsyncSession,
+    period_type: str,
+    start: datetime,
+    end: datetime,
+    event_type_id: Optional[int] = None,
+    approximate: bool = False,
+    cache: PeriodStatsCache = period_stats_cache,
+    now: Optional[datetime] = None,
+    fetch: Optional[Fetch] = None,
+) -> list[schemas.Statistics]:
+    """
+    get_period_stats через кэш периодов.
+
+    Периоды окна читаются из кэша до первого промаха; в БД запрашивается
+    только окно от этого периода до конца, и ответ склеивается. Окно,
+    начало которого не совпадает с началом периода, считается без кэша.
+    fetch(start, end) заменяет get_period_stats для запроса промахов —
+    например, лоадером GraphQL-операции.
+    """
+    if fetch is None:
+
+        async def fetch(fetch_start: datetime, fetch_end: datetime):
+            return await get_period_stats(
+                db, period_type, fetch_start, fetch_end, event_type_id, approximate
+            )
+
+    if (
+        period_type not in ("day", "month", "year")
+        or period_floor(period_type, start) != start
+    ):
+        return await fetch(start, end)
+    now = now or datetime.now(UTC).replace(tzinfo=None)
+
+    def key(period_start: datetime) -> PeriodKey:
+        return PeriodKey(
+            period_type, period_start.date().isoformat(), event_type_id, approximate
+        )
+
+    result: list[schemas.Statistics] = []
+    period_start = start
+    while period_start < end:
+        found, stats = cache.lookup(key(period_start))
+        if not found:
+            break
+        if stats is not None:
+            result.append(stats)
+        period_start = next_period(period_type, period_start)
+    if period_start >= end:
+        return result
+
+    fresh = {stats.period: stats for stats in await fetch(period_start, end)}
+    while period_start < end:
+        period_end = next_period(period_type, period_start)
+        stats = fresh.get(period_start.date().isoformat())
+        # Неполный последний период окна не кэшируется
+        if period_end <= end:
+            cache.store(key(period_start), stats, cache.is_closed(period_end, now))
+        if stats is not None:
+            result.append(stats)
+        period_start = period_end
+    return result
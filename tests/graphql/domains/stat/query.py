@@ -129,6 +129,64 @@ class TestStatsQueries:
         result = resp["data"]["data"]["endpointStatistics"]
         assert isinstance(result, list)
 
+    def test_200_approximate_statistics(self):
+        """Приближённый режим принимается обоими запросами статистики."""
+        query = """
+        query GetStats($byMonth: EndpointStatisticsByMonthInput) {
+            endpointStatistics(byMonth: $byMonth, approximate: true) {
+                visitorCount
+                period
+            }
+            endpointStatisticsAvg(byMonth: $byMonth, approximate: true) {
+                totalVisitorCount
+            }
+        }
+        """
+        resp = graphql_query(
+            query,
+            variables={"byMonth": {"start": "2024-01", "end": "2024-03"}},
+            headers=ADMIN_HEADERS,
+        )
+        assert resp["status_code"] == 200
+        data = resp["data"]["data"]
+        assert isinstance(data["endpointStatistics"], list)
+        assert isinstance(data["endpointStatisticsAvg"]["totalVisitorCount"], int)
+
+    def test_200_dashboard_data(self):
+        """Данные всех дашбордов за окно одним запросом."""
+        query = """
+        query GetDashboards($byDate: EndpointStatisticsByDateInput) {
+            dashboardData(byDate: $byDate) {
+                id
+                displayOrder
+                titleText
+                dashboardTypeId
+                series {
+                    allVisits
+                    period
+                }
+                aggregated {
+                    totalVisits
+                }
+            }
+        }
+        """
+        resp = graphql_query(
+            query,
+            variables={"byDate": {"start": "2024-01-01", "end": "2024-01-07"}},
+            headers=ADMIN_HEADERS,
+        )
+        assert resp["status_code"] == 200
+        result = resp["data"]["data"]["dashboardData"]
+        assert result
+        assert [item["displayOrder"] for item in result] == sorted(
+            item["displayOrder"] for item in result
+        )
+        for item in result:
+            if item["series"] is not None:
+                # Пустые дни окна заполняются нулями, как в endpointStatistics
+                assert len(item["series"]) == 7
+
     # =============================================================================
     # Тесты валидации окон
     # =============================================================================
@@ -277,6 +335,24 @@ class TestStatsQueries:
             "неизвестный код" in e["message"].lower() for e in resp["data"]["errors"]
         )
 
+    def test_400_oversized_raw_window(self):
+        """Окно без дневной сводки длиннее лимита отклоняется до запроса к events."""
+        query = """
+        query GetStats($byYear: EndpointStatisticsByYearInput) {
+            endpointStatisticsAvg(byYear: $byYear) { totalVisits }
+        }
+        """
+        resp = graphql_query(
+            query,
+            variables={"byYear": {"start": "2015", "end": "2024"}},
+            headers=ADMIN_HEADERS,
+        )
+        assert resp["status_code"] == 200
+        assert "errors" in resp["data"]
+        assert any(
+            "не покрыто дневной сводкой" in e["message"] for e in resp["data"]["errors"]
+        )
+
     # =============================================================================
     # Тесты прав доступа
     # =============================================================================
@@ -0,0 +1,37 @@
+"""Тесты на настоящем PostgreSQL: адрес задаёт STATAPI_TEST_PG_URL."""
+
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+PG_URL = os.environ.get("STATAPI_TEST_PG_URL")
+
+# Тест помечается postgres и пропускается, если PostgreSQL не задан
+postgres = [
+    pytest.mark.postgres,
+    pytest.mark.skipif(PG_URL is None, reason="нужен STATAPI_TEST_PG_URL"),
+]
+
+
+@asynccontextmanager
+async def pg_schema() -> AsyncIterator[AsyncEngine]:
+    """Движок, все соединения которого работают в отдельной временной схеме."""
+    schema = f"test_{uuid.uuid4().hex[:8]}"
+    admin = create_async_engine(PG_URL)
+    async with admin.begin() as conn:
+        await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    engine = create_async_engine(
+        PG_URL, connect_args={"server_settings": {"search_path": schema}}
+    )
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+        async with admin.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        await admin.dispose()
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from app.constants import (
     PAYLOAD_TYPE_AUDITORY_ID,
     PAYLOAD_TYPE_ENDPOINT_ID,
@@ -18,46 +20,74 @@ class PayloadSeeder(BaseSeeder):
             {
                 "id": 1,
                 "event_id": 1,
+                "trigger_time": datetime(2026, 4, 25, 10, 0, 0),
                 "type_id": PAYLOAD_TYPE_AUDITORY_ID,
                 "value": "a-100",
             },
             {
                 "id": 2,
                 "event_id": 1,
+                "trigger_time": datetime(2026, 4, 25, 10, 0, 0),
                 "type_id": PAYLOAD_TYPE_SUCCESS_ID,
                 "value": "true",
+                "value_bool": True,
             },
             {
                 "id": 3,
                 "event_id": 2,
+                "trigger_time": datetime(2026, 4, 25, 11, 0, 0),
                 "type_id": PAYLOAD_TYPE_START_ID,
                 "value": "a-100",
             },
-            {"id": 4, "event_id": 2, "type_id": PAYLOAD_TYPE_END_ID, "value": "a-101"},
+            {
+                "id": 4,
+                "event_id": 2,
+                "trigger_time": datetime(2026, 4, 25, 11, 0, 0),
+                "type_id": PAYLOAD_TYPE_END_ID,
+                "value": "a-101",
+            },
             {
                 "id": 5,
                 "event_id": 2,
+                "trigger_time": datetime(2026, 4, 25, 11, 0, 0),
                 "type_id": PAYLOAD_TYPE_SUCCESS_ID,
                 "value": "true",
+                "value_bool": True,
             },
             {
                 "id": 6,
                 "event_id": 3,
+                "trigger_time": datetime(2026, 4, 26, 11, 0, 0),
                 "type_id": PAYLOAD_TYPE_START_ID,
                 "value": "a-101",
             },
-            {"id": 7, "event_id": 3, "type_id": PAYLOAD_TYPE_END_ID, "value": "a-102"},
+            {
+                "id": 7,
+                "event_id": 3,
+                "trigger_time": datetime(2026, 4, 26, 11, 0, 0),
+                "type_id": PAYLOAD_TYPE_END_ID,
+                "value": "a-102",
+            },
             {
                 "id": 8,
                 "event_id": 3,
+                "trigger_time": datetime(2026, 4, 26, 11, 0, 0),
                 "type_id": PAYLOAD_TYPE_SUCCESS_ID,
                 "value": "false",
+                "value_bool": False,
             },
             {
                 "id": 9,
                 "event_id": 4,
+                "trigger_time": datetime(2026, 4, 26, 12, 0, 0),
                 "type_id": PAYLOAD_TYPE_ENDPOINT_ID,
                 "value": "/api/get/route",
             },
-            {"id": 10, "event_id": 5, "type_id": PAYLOAD_TYPE_PLAN_ID, "value": "A-3"},
+            {
+                "id": 10,
+                "event_id": 5,
+                "trigger_time": datetime(2026, 4, 26, 12, 0, 0),
+                "type_id": PAYLOAD_TYPE_PLAN_ID,
+                "value": "A-3",
+            },
         ]
@@ -1,3 +1,5 @@
+import uuid
+
 import pytest
 
 from app.constants import (
@@ -13,6 +15,9 @@ from app.constants import (
     PAYLOAD_TYPE_SUCCESS_ID,
 )
 
+from app.guards.body import event_create_body
+from app.schemas import EventCreateRequest
+
 from .base import client
 
 
@@ -52,3 +57,116 @@ def test_200_stat_event(event_type_id, payloads):
     )
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+def test_stat_event_body_is_validated_once(monkeypatch):
+    validations = 0
+
+    class CountingEventCreateRequest(EventCreateRequest):
+        @classmethod
+        def model_validate(cls, obj, **kwargs):
+            nonlocal validations
+            validations += 1
+            return super().model_validate(obj, **kwargs)
+
+    monkeypatch.setattr(event_create_body, "model", CountingEventCreateRequest)
+    response = client.post(
+        "/api/stat/event",
+        json={
+            "ident": str(uuid.uuid4()),
+            "event_type_id": EVENT_TYPE_SITE_ID,
+            "payloads": {PAYLOAD_TYPE_ENDPOINT_ID: "/api/get/route"},
+        },
+    )
+    # Клиента нет в БД, но guard и эндпоинт уже отработали на одной модели
+    assert response.status_code == 400
+    assert validations == 1
+
+
+def test_stat_event_openapi_keeps_request_body():
+    schema = client.get("/openapi.json").json()
+    request_body = schema["paths"]["/api/stat/event"]["post"]["requestBody"]
+    ref = request_body["content"]["application/json"]["schema"]["$ref"]
+    assert ref == "#/components/schemas/EventCreateRequest"
+    assert "EventCreateRequest" in schema["components"]["schemas"]
+
+
+@pytest.fixture
+def fresh_rate_limit():
+    # Пачка делит лимит с одиночной записью тех же типов выше
+    client.app.state.app_state.user_access.clear()
+
+
+def test_200_stat_events_batch(fresh_rate_limit):
+    response = client.post(
+        "/api/stat/events/batch",
+        json=[
+            {
+                "ident": CLIENT_IDENT,
+                "event_type_id": EVENT_TYPE_SITE_ID,
+                "payloads": {PAYLOAD_TYPE_ENDPOINT_ID: "/api/get/route"},
+            },
+            {
+                "ident": CLIENT_IDENT,
+                "event_type_id": EVENT_TYPE_PLANS_ID,
+                "payloads": {PAYLOAD_TYPE_PLAN_ID: "A-0"},
+            },
+        ],
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "accepted": 2,
+        "rejected": 0,
+        "items": [
+            {"index": 0, "status": "ok", "detail": None},
+            {"index": 1, "status": "ok", "detail": None},
+        ],
+    }
+
+
+def test_200_stat_events_batch_reports_item_errors(fresh_rate_limit):
+    unknown_ident = "11e1a4b8-7fa7-4501-9faa-541a5e0ff1e1"
+    response = client.post(
+        "/api/stat/events/batch",
+        json=[
+            {
+                "ident": unknown_ident,
+                "event_type_id": EVENT_TYPE_SITE_ID,
+                "payloads": {PAYLOAD_TYPE_ENDPOINT_ID: "/api/get/route"},
+            },
+            {
+                "ident": CLIENT_IDENT,
+                "event_type_id": EVENT_TYPE_AUDS_ID,
+                "payloads": {
+                    PAYLOAD_TYPE_AUDITORY_ID: "a-100",
+                    PAYLOAD_TYPE_SUCCESS_ID: "maybe",
+                },
+            },
+            {
+                "ident": CLIENT_IDENT,
+                "event_type_id": EVENT_TYPE_AUDS_ID,
+                "payloads": {
+                    PAYLOAD_TYPE_AUDITORY_ID: "a-100",
+                    PAYLOAD_TYPE_SUCCESS_ID: "FALSE",
+                },
+            },
+        ],
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "accepted": 1,
+        "rejected": 2,
+        "items": [
+            {
+                "index": 0,
+                "status": "error",
+                "detail": f"Unknown client ident={unknown_ident}",
+            },
+            {
+                "index": 1,
+                "status": "error",
+                "detail": "Invalid bool value for payload_type_id=5",
+            },
+            {"index": 2, "status": "ok", "detail": None},
+        ],
+    }
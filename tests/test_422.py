@@ -6,3 +6,26 @@ from .base import client
 def test_422_stat_event():
     response = client.post("/api/stat/event", json={})
     assert response.status_code == 422
+
+
+def test_422_stat_events_batch_empty():
+    response = client.post("/api/stat/events/batch", json=[])
+    assert response.status_code == 422
+
+
+def test_422_stat_event_reports_body_location():
+    response = client.post("/api/stat/event", json={"ident": "short"})
+    assert response.status_code == 422
+    locations = {tuple(error["loc"]) for error in response.json()["detail"]}
+    assert ("body", "ident") in locations
+    assert ("body", "event_type_id") in locations
+
+
+def test_422_stat_event_invalid_json():
+    response = client.post(
+        "/api/stat/event",
+        content=b"{not json",
+        headers={"content-type": "application/json"},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
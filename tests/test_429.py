@@ -18,3 +18,33 @@ def test_429_stat_event():
     assert response.json() == {
         "detail": "Too many requests for this event type within one second"
     }
+
+
+def test_429_stat_events_batch():
+    item = {
+        "ident": "11e1a4b8-7fa7-4501-9faa-541a5e0ff1e2",
+        "event_type_id": EVENT_TYPE_AUDS_ID,
+        "payloads": {PAYLOAD_TYPE_AUDITORY_ID: "a-100"},
+    }
+    response = client.post("/api/stat/events/batch", json=[item])
+    assert response.status_code == 200
+    response = client.post("/api/stat/events/batch", json=[item])
+    assert response.status_code == 429
+    # Лимит общий с одиночной записью
+    response = client.post("/api/stat/event", json=item)
+    assert response.status_code == 429
+
+
+def test_429_stat_events_batch_counts_each_event():
+    item = {
+        "ident": "11e1a4b8-7fa7-4501-9faa-541a5e0ff1e3",
+        "event_type_id": EVENT_TYPE_AUDS_ID,
+        "payloads": {PAYLOAD_TYPE_AUDITORY_ID: "a-100"},
+    }
+    response = client.post("/api/stat/events/batch", json=[item, item, item])
+    assert response.status_code == 200
+    # Три события одного типа заняли три окна подряд
+    sleep(1.1)
+    response = client.post("/api/stat/event", json=item)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
@@ -4,11 +4,13 @@ import uuid
 from datetime import datetime
 
 import pytest
-from sqlalchemy import delete
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
 
 from app import models
 from app.constants import EVENT_TYPE_WAYS_ID
 from app.handlers import get_aggregated_stats, get_period_stats, get_popular_audiences
+from app.handlers.period import period_bucket
 
 from .base import session_maker
 
@@ -51,6 +53,33 @@ class TestPopularAuditories:
         assert result[1].total_weight == 3
 
 
+# =============================================================================
+# Period Bucketing Tests
+# =============================================================================
+class TestPeriodBucket:
+    """Тесты для period_bucket."""
+
+    def test_postgresql_groups_by_date_trunc_without_text_cast(self):
+        period = period_bucket("month", models.Event.trigger_time, True).label("p")
+        sql = str(
+            select(period, func.count())
+            .group_by(period)
+            .compile(dialect=postgresql.dialect())
+        )
+        # Литерал вместо bind-параметра: SELECT и GROUP BY совпадают текстом
+        assert sql.count("date_trunc('month', events.trigger_time)") == 2
+        assert "CAST" not in sql
+
+    def test_sqlite_uses_stored_iso_prefix(self):
+        period = period_bucket("year", models.Event.trigger_time, False)
+        sql = str(period.compile(dialect=sqlite.dialect()))
+        assert sql == "substr(events.trigger_time, 1, 4)"
+
+    def test_rejects_unknown_period(self):
+        with pytest.raises(ValueError):
+            period_bucket("week", models.Event.trigger_time, True)
+
+
 # =============================================================================
 # Period Stats Tests
 # =============================================================================
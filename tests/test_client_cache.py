@@ -0,0 +1,71 @@
+"""Tests for the ident → id client cache."""
+
+import uuid
+from datetime import date
+
+import pytest
+
+from app.handlers import create_client_id
+from app.handlers.event import resolve_client_ids
+from app.services.client_cache import CachedClient, ClientIdCache, client_id_cache
+
+from .base import client, session_maker
+
+CLIENT_IDENT = "11e1a4b8-7fa7-4501-9faa-541a5e0ff1ec"
+
+
+class TestClientIdCache:
+    def test_negative_entries_expire(self):
+        cache = ClientIdCache(negative_ttl_seconds=60)
+        cache.put_missing("ghost")
+        assert cache.lookup(["ghost"]) == ({}, set())
+        assert cache.metrics()["negative_hits"] == 1
+
+        expired = ClientIdCache(negative_ttl_seconds=0)
+        expired.put_missing("ghost")
+        assert expired.lookup(["ghost"]) == ({}, {"ghost"})
+        assert expired.metrics()["misses"] == 1
+
+    def test_put_overrides_negative_entry(self):
+        cache = ClientIdCache()
+        cache.put_missing("late")
+        cache.put("late", 7, date(2026, 4, 1))
+        assert cache.lookup(["late"]) == (
+            {"late": CachedClient(7, date(2026, 4, 1))},
+            set(),
+        )
+
+
+class TestResolveClientIds:
+    @pytest.mark.asyncio
+    async def test_second_resolve_is_served_from_cache(self):
+        client_id_cache.clear()
+        unknown = str(uuid.uuid4())
+        async with session_maker() as db:
+            first = await resolve_client_ids(db, [CLIENT_IDENT, unknown])
+            hits = client_id_cache.metrics()["hits"]
+            negative_hits = client_id_cache.metrics()["negative_hits"]
+            second = await resolve_client_ids(db, [CLIENT_IDENT, unknown])
+
+        assert first == second
+        assert first.keys() == {CLIENT_IDENT}
+        assert first[CLIENT_IDENT].id == 1
+        assert client_id_cache.metrics()["hits"] == hits + 1
+        assert client_id_cache.metrics()["negative_hits"] == negative_hits + 1
+
+    @pytest.mark.asyncio
+    async def test_created_client_is_cached(self):
+        async with session_maker() as db:
+            created = await create_client_id(db)
+
+        found, unresolved = client_id_cache.lookup([created.ident])
+        assert created.ident in found
+        assert not unresolved
+
+    def test_check_client_id_uses_cache(self):
+        client_id_cache.clear()
+        response = client.get(
+            "/api/check/client-id", params={"client_id": CLIENT_IDENT}
+        )
+        assert response.status_code == 200
+        assert client_id_cache.lookup([CLIENT_IDENT])[0][CLIENT_IDENT].id == 1
@@ -0,0 +1,123 @@
+"""Tests for the denormalized client first-seen day on events."""
+
+from datetime import date, datetime, UTC
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from app import models
+from app.cli.db.backfill import _backfill_client_first_seen
+from app.constants import EVENT_TYPE_WAYS_ID
+from app.handlers.event import PendingEvent, insert_events
+from app.handlers.first_seen import get_client_first_seen
+from app.handlers.get import get_window_stats
+
+from .base import session_maker
+from .test_stats_rollup import WINDOW, _stats, rollup_events  # noqa: F401
+
+
+async def _first_seen(client_ids: list[int]) -> set:
+    async with session_maker() as db:
+        return set(
+            (
+                await db.execute(
+                    select(models.Event.client_first_seen).where(
+                        models.Event.client_id.in_(client_ids)
+                    )
+                )
+            ).scalars()
+        )
+
+
+@pytest.mark.asyncio
+async def test_write_fills_client_first_seen():
+    async with session_maker() as db:
+        expected = (await get_client_first_seen(db, [3]))[3]
+        [event_id] = await insert_events(
+            db,
+            [
+                PendingEvent(
+                    client_id=3,
+                    event_type_id=EVENT_TYPE_WAYS_ID,
+                    trigger_time=datetime.now(UTC),
+                )
+            ],
+        )
+    try:
+        async with session_maker() as db:
+            event = await db.scalar(
+                select(models.Event).where(models.Event.id == event_id)
+            )
+            assert event.client_first_seen == expected
+    finally:
+        async with session_maker.begin() as db:
+            await db.execute(delete(models.Event).where(models.Event.id == event_id))
+
+
+@pytest.mark.asyncio
+async def test_write_uses_carried_first_seen(monkeypatch):
+    async def no_lookup(db, client_ids):
+        raise AssertionError("client_ids queried")
+
+    monkeypatch.setattr("app.handlers.event.get_client_first_seen", no_lookup)
+    async with session_maker() as db:
+        [event_id] = await insert_events(
+            db,
+            [
+                PendingEvent(
+                    client_id=3,
+                    event_type_id=EVENT_TYPE_WAYS_ID,
+                    trigger_time=datetime.now(UTC),
+                    client_first_seen=date(2026, 1, 2),
+                )
+            ],
+        )
+    try:
+        async with session_maker() as db:
+            event = await db.scalar(
+                select(models.Event).where(models.Event.id == event_id)
+            )
+            assert event.client_first_seen == date(2026, 1, 2)
+    finally:
+        async with session_maker.begin() as db:
+            await db.execute(delete(models.Event).where(models.Event.id == event_id))
+
+
+@pytest.mark.asyncio
+async def test_get_client_first_seen_returns_creation_day(rollup_events):  # noqa: F811
+    fresh, old = rollup_events
+    async with session_maker() as db:
+        assert await get_client_first_seen(db, [fresh, old, fresh]) == {
+            fresh: date(2026, 4, 28),
+            old: date(2026, 3, 10),
+        }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("period_type", ["day", "month", "year"])
+async def test_stats_match_before_and_after_backfill(rollup_events, period_type):  # noqa: F811
+    assert await _first_seen(rollup_events) == {None}
+    before = await _stats(period_type)
+
+    assert await _backfill_client_first_seen(batch_size=3) >= len(before[0])
+    assert await _first_seen(rollup_events) == {date(2026, 4, 28), date(2026, 3, 10)}
+    assert await _stats(period_type) == before
+
+
+@pytest.mark.asyncio
+async def test_stats_read_first_seen_from_events(rollup_events):  # noqa: F811
+    _, old = rollup_events
+    await _backfill_client_first_seen(batch_size=1_000)
+    [april, _], _ = await _stats("month")
+    # Клиенты больше не читаются: новым считается день из строки события
+    async with session_maker.begin() as db:
+        await db.execute(
+            update(models.Event)
+            .where(models.Event.client_id == old)
+            .values(client_first_seen=date(2026, 4, 28))
+        )
+    periods, aggregated = await _stats("month")
+    assert periods[0]["unique_visitors"] == april["unique_visitors"] + 1
+    async with session_maker() as db:
+        by_type = await get_window_stats(db, "month", *WINDOW, [None])
+    assert by_type[None].aggregated.model_dump() == aggregated
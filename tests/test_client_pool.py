@@ -0,0 +1,111 @@
+"""Tests for client id issuance and the pre-allocated ident pool."""
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import func, select
+
+from app import models
+from app.services import client_pool
+from app.services.client_cache import client_id_cache
+from app.services.client_pool import ClientIdPool
+
+from .base import client, session_maker
+
+
+async def _exists(client_id: int) -> bool:
+    async with session_maker() as db:
+        count = (
+            await db.execute(
+                select(func.count())
+                .select_from(models.ClientId)
+                .where(models.ClientId.id == client_id)
+            )
+        ).scalar_one()
+    return count == 1
+
+
+async def _wait_for(predicate, timeout: float = 2.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition was not met in time"
+        await asyncio.sleep(0.01)
+
+
+def test_issued_client_is_persisted_and_cached():
+    response = client.get("/api/stat/client")
+    assert response.status_code == 200
+    ident = response.json()["ident"]
+
+    found, unresolved = client_id_cache.lookup([ident])
+    assert not unresolved
+    assert asyncio.run(_exists(found[ident].id))
+
+
+class TestClientIdPool:
+    @pytest.mark.asyncio
+    async def test_refills_below_watermark_and_releases_on_stop(self):
+        pool = ClientIdPool(size=4, low_watermark=2, max_age_seconds=60)
+        pool.start()
+        try:
+            await _wait_for(lambda: pool.metrics()["available"] == 4)
+
+            issued = [pool.take() for _ in range(3)]
+            assert all(item is not None for item in issued)
+            await _wait_for(lambda: pool.metrics()["available"] == 4)
+            assert pool.metrics()["refills"] == 2
+        finally:
+            leftover = [item.id for item in pool._clients]
+            await pool.stop()
+
+        assert all([await _exists(item.id) for item in issued])
+        assert not any([await _exists(client_id) for client_id in leftover])
+
+    @pytest.mark.asyncio
+    async def test_stale_records_are_not_issued(self):
+        pool = ClientIdPool(size=2, low_watermark=0, max_age_seconds=60)
+        await pool._refill()
+        stale = [item.id for item in pool._clients]
+        pool.max_age_seconds = 0
+
+        assert pool.take() is None
+        assert pool.metrics()["expired"] == 2
+        assert pool.metrics()["misses"] == 1
+
+        await pool._delete(stale)
+        await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_issue_time_is_the_creation_date(self):
+        pool = ClientIdPool(size=1, low_watermark=0, max_age_seconds=600)
+        await pool._refill()
+        [pooled] = list(pool._clients)
+
+        # Запись выдана через пять минут после пополнения
+        with patch.object(client_pool, "datetime", wraps=datetime) as clock:
+            clock.now.return_value = pooled.creation_date + timedelta(minutes=5)
+            issued = pool.take()
+        assert issued.creation_date == pooled.creation_date + timedelta(minutes=5)
+        await pool.stop()
+
+        async with session_maker() as db:
+            stored = await db.scalar(
+                select(models.ClientId.creation_date).where(
+                    models.ClientId.id == issued.id
+                )
+            )
+        assert stored == issued.creation_date
+
+    def test_endpoint_issues_from_pool(self, monkeypatch):
+        pool = ClientIdPool(size=1, low_watermark=0, max_age_seconds=60)
+        asyncio.run(pool._refill())
+        [pooled] = list(pool._clients)
+        monkeypatch.setattr(client_pool, "_client_pool", pool)
+
+        response = client.get("/api/stat/client")
+        assert response.status_code == 200
+        assert response.json()["ident"] == pooled.ident
+        assert pool.metrics()["issued"] == 1
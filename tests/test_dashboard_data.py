@@ -0,0 +1,145 @@
+"""Tests for server-side dashboard data."""
+
+from datetime import date, datetime
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import delete
+
+from app import models
+from app.constants import DASHBOARD_TYPE_AVG_ID, EVENT_TYPE_SITE_ID
+from app.handlers import get_aggregated_stats, get_period_stats
+from app.handlers.get import get_window_stats
+from app.services.dashboard_data import (
+    DashboardDataCache,
+    DashboardKey,
+    DashboardStats,
+    get_dashboard_data,
+)
+
+from .base import session_maker
+from .test_stats_rollup import WINDOW, rollup_events  # noqa: F401
+
+# Окно целиком в прошлом: записи кэша закрыты
+NOW = datetime(2026, 6, 1)
+
+
+@pytest.fixture
+async def avg_dashboard():
+    async with session_maker.begin() as db:
+        dashboard = models.Dashboard(
+            display_order=0,
+            event_type_id=EVENT_TYPE_SITE_ID,
+            dashboard_type_id=DASHBOARD_TYPE_AVG_ID,
+            title_text="Сайт: средние",
+        )
+        db.add(dashboard)
+        await db.flush()
+        dashboard_id = dashboard.id
+    try:
+        yield dashboard_id
+    finally:
+        async with session_maker.begin() as db:
+            await db.execute(
+                delete(models.Dashboard).where(models.Dashboard.id == dashboard_id)
+            )
+
+
+@pytest.fixture
+def spy(monkeypatch):
+    spy = AsyncMock(wraps=get_window_stats)
+    monkeypatch.setattr("app.services.dashboard_data.get_window_stats", spy)
+    return spy
+
+
+async def _dashboard_data(cache: DashboardDataCache):
+    async with session_maker() as db:
+        return await get_dashboard_data(db, "day", *WINDOW, cache=cache, now=NOW)
+
+
+@pytest.mark.asyncio
+async def test_dashboards_match_separate_queries(
+    rollup_events,  # noqa: F811
+    avg_dashboard,
+    spy,
+):
+    data = await _dashboard_data(DashboardDataCache())
+
+    assert spy.await_count == 1
+    assert data[0].dashboard.id == avg_dashboard
+    assert [item.dashboard.display_order for item in data] == sorted(
+        item.dashboard.display_order for item in data
+    )
+    async with session_maker() as db:
+        for item in data:
+            event_type_id = item.dashboard.event_type_id
+            if item.dashboard.dashboard_type_id == DASHBOARD_TYPE_AVG_ID:
+                assert item.stats.periods is None
+                assert item.stats.aggregated == await get_aggregated_stats(
+                    db, "day", *WINDOW, event_type_id
+                )
+            else:
+                assert item.stats.aggregated is None
+                assert item.stats.periods == await get_period_stats(
+                    db, "day", *WINDOW, event_type_id
+                )
+
+
+@pytest.mark.asyncio
+async def test_cached_dashboards_skip_scan(rollup_events, avg_dashboard, spy):  # noqa: F811
+    cache = DashboardDataCache()
+    first = await _dashboard_data(cache)
+    second = await _dashboard_data(cache)
+
+    assert spy.await_count == 1
+    assert [item.stats for item in second] == [item.stats for item in first]
+    assert cache.metrics()["hits"] == len(first)
+
+
+@pytest.mark.asyncio
+async def test_new_dashboard_reads_only_its_event_type(avg_dashboard, spy):
+    cache = DashboardDataCache()
+    async with session_maker.begin() as db:
+        dashboard = await db.get(models.Dashboard, avg_dashboard)
+        await db.delete(dashboard)
+    try:
+        await _dashboard_data(cache)
+    finally:
+        async with session_maker.begin() as db:
+            db.add(
+                models.Dashboard(
+                    id=avg_dashboard,
+                    display_order=0,
+                    event_type_id=EVENT_TYPE_SITE_ID,
+                    dashboard_type_id=DASHBOARD_TYPE_AVG_ID,
+                    title_text="Сайт: средние",
+                )
+            )
+
+    await _dashboard_data(cache)
+    assert spy.await_count == 2
+    assert spy.await_args.args[4] == {EVENT_TYPE_SITE_ID}
+
+
+@pytest.mark.asyncio
+async def test_invalidate_days_drops_covering_windows(avg_dashboard):
+    cache = DashboardDataCache()
+    data = await _dashboard_data(cache)
+
+    assert cache.invalidate_days([date(2026, 6, 15)]) == 0
+    assert cache.invalidate_days([date(2026, 4, 29)]) == len(data)
+    assert cache.metrics()["size"] == 0
+
+
+def test_open_window_expires():
+    cache = DashboardDataCache(open_ttl_seconds=0)
+    key = DashboardKey(1, 1, 1, "day", *WINDOW, False)
+    cache.store(key, DashboardStats(None, None), now=datetime(2026, 5, 1, 12, 0))
+    assert cache.lookup(key) is None
+
+
+def test_closed_window_expires():
+    cache = DashboardDataCache(closed_ttl_seconds=0)
+    key = DashboardKey(1, 1, 1, "day", *WINDOW, False)
+    cache.store(key, DashboardStats(None, None), now=datetime(2026, 6, 1))
+    assert cache.lookup(key) is None
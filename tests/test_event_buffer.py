@@ -0,0 +1,164 @@
+"""Tests for the write-behind event buffer."""
+
+import uuid
+from datetime import datetime, UTC
+
+import aiosqlite
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app import models
+from app.constants import (
+    EVENT_TYPE_PLANS_ID,
+    PAYLOAD_TYPE_PLAN_ID,
+)
+from app.services import event_buffer, event_spool
+from app.services.event_buffer import EventBuffer, EventBufferFullError
+from app.services.event_spool import EventSpool
+from app.handlers.event import PendingEvent
+
+from .base import client, session_maker
+
+CLIENT_IDENT = "33e1a4b8-7fa7-4501-9faa-541a5e0ff1ec"
+
+
+def _pending(plan_id: str) -> PendingEvent:
+    return PendingEvent(
+        client_id=3,
+        event_type_id=EVENT_TYPE_PLANS_ID,
+        trigger_time=datetime.now(UTC),
+        payloads=[(PAYLOAD_TYPE_PLAN_ID, plan_id)],
+    )
+
+
+async def _cleanup(plan_id: str) -> int:
+    async with session_maker.begin() as db:
+        event_ids = (
+            await db.execute(
+                select(models.Payload.event_id).where(models.Payload.value == plan_id)
+            )
+        ).scalars()
+        event_ids = list(event_ids)
+        await db.execute(
+            delete(models.Payload).where(models.Payload.event_id.in_(event_ids))
+        )
+        await db.execute(delete(models.Event).where(models.Event.id.in_(event_ids)))
+    return len(event_ids)
+
+
+class TestEventBuffer:
+    @pytest.mark.asyncio
+    async def test_flushes_in_batches_and_drains_on_stop(self):
+        plan_id = f"buf-{uuid.uuid4().hex[:8]}"
+        buffer = EventBuffer(flush_interval=0.05, max_batch_size=2, capacity=10)
+        buffer.start()
+        buffer.submit([_pending(plan_id) for _ in range(3)])
+        await buffer.stop()
+
+        try:
+            async with session_maker() as db:
+                written = (
+                    await db.execute(
+                        select(func.count())
+                        .select_from(models.Payload)
+                        .where(models.Payload.value == plan_id)
+                    )
+                ).scalar_one()
+            metrics = buffer.metrics()
+            assert written == 3
+            assert metrics["flushed_events"] == 3
+            assert metrics["flushes"] == 2
+            assert metrics["queue_size"] == 0
+            assert metrics["running"] is False
+        finally:
+            await _cleanup(plan_id)
+
+    def test_rejects_when_full(self):
+        buffer = EventBuffer(capacity=2)
+        buffer.submit([_pending("full")])
+
+        with pytest.raises(EventBufferFullError):
+            buffer.submit([_pending("full"), _pending("full")])
+
+        assert buffer.metrics()["queue_size"] == 1
+        assert buffer.metrics()["rejected_events"] == 2
+
+
+class TestRejectedBatch:
+    """Пачка, которую отвергла БД, пишется по одному событию."""
+
+    @pytest.fixture
+    def spool(self, tmp_path, monkeypatch) -> EventSpool:
+        spool = EventSpool(str(tmp_path / "spool.db"))
+        monkeypatch.setattr(event_spool, "_event_spool", spool)
+        return spool
+
+    @staticmethod
+    def _reject(monkeypatch, bad_plan_id: str, error: Exception) -> None:
+        real_insert = event_buffer.insert_events
+
+        async def insert_events(db, events):
+            if any(event.payloads[0][1] == bad_plan_id for event in events):
+                raise error
+            return await real_insert(db, events)
+
+        monkeypatch.setattr(event_buffer, "insert_events", insert_events)
+
+    @pytest.mark.asyncio
+    async def test_only_rejected_event_is_buried(self, monkeypatch, spool):
+        plan_id = f"buf-{uuid.uuid4().hex[:8]}"
+        self._reject(monkeypatch, "bad", IntegrityError("INSERT", {}, ValueError("fk")))
+        buffer = EventBuffer(max_batch_size=10)
+        try:
+            await buffer._flush([_pending(plan_id), _pending("bad"), _pending(plan_id)])
+
+            metrics = buffer.metrics()
+            assert metrics["flushed_events"] == 2
+            assert metrics["dead_events"] == 1
+            assert metrics["failed_events"] == 0
+            assert (await spool.metrics())["dead_events"] == 1
+            async with aiosqlite.connect(spool.db_path) as db:
+                async with db.execute("SELECT payloads, error FROM dead_events") as cur:
+                    [(payloads, error)] = await cur.fetchall()
+            assert '"bad"' in payloads
+            assert error == "fk"
+            assert await spool.pending_count() == 0
+        finally:
+            assert await _cleanup(plan_id) == 2
+
+    @pytest.mark.asyncio
+    async def test_outage_during_retry_spools_rest(self, monkeypatch, spool):
+        calls = 0
+
+        async def insert_events(db, events):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise IntegrityError("INSERT", {}, ValueError("fk"))
+            raise OperationalError("INSERT", {}, ConnectionError("db is down"))
+
+        monkeypatch.setattr(event_buffer, "insert_events", insert_events)
+        buffer = EventBuffer(max_batch_size=10)
+        await buffer._flush([_pending("down"), _pending("down")])
+
+        assert buffer.metrics()["dead_events"] == 0
+        assert await spool.pending_count() == 2
+
+
+def test_503_stat_event_when_buffer_full(monkeypatch):
+    buffer = EventBuffer(capacity=1)
+    buffer.submit([_pending("full")])
+    monkeypatch.setattr(event_buffer, "_event_buffer", buffer)
+
+    response = client.post(
+        "/api/stat/event",
+        json={
+            "ident": CLIENT_IDENT,
+            "event_type_id": EVENT_TYPE_PLANS_ID,
+            "payloads": {PAYLOAD_TYPE_PLAN_ID: "A-0"},
+        },
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json() == {"status": "Event buffer is full, retry later"}
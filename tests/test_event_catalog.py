@@ -0,0 +1,103 @@
+"""Tests for the in-memory event-schema catalog."""
+
+import pytest
+from sqlalchemy import delete
+
+from app import models
+from app.constants import (
+    EVENT_TYPE_PLANS_ID,
+    EVENT_TYPE_WAYS_ID,
+    PAYLOAD_TYPE_AUDITORY_ID,
+    PAYLOAD_TYPE_PLAN_ID,
+    PAYLOAD_TYPE_SUCCESS_ID,
+)
+from app.handlers.event import (
+    EventValidationError,
+    EventValidator,
+    compile_event_validators,
+)
+from app.services.event_catalog import EventCatalog
+
+from .base import session_maker
+
+
+class TestEventValidator:
+    def test_normalizes_values_by_value_type(self):
+        validator = EventValidator(1, {1: "int", 2: "string", 3: "bool"})
+        assert validator.validate({1: "042", 2: "a-100", 3: "TRUE"}) == [
+            (1, "42"),
+            (2, "a-100"),
+            (3, "true"),
+        ]
+
+    def test_rejects_not_allowed_payload(self):
+        validator = EventValidator(1, {1: "string"})
+        with pytest.raises(EventValidationError, match="is not allowed"):
+            validator.validate({2: "x"})
+
+    def test_rejects_invalid_value(self):
+        validators = compile_event_validators({1: {1: "int", 2: "bool"}})
+        with pytest.raises(EventValidationError, match="Invalid int value"):
+            validators[1].validate({1: "abc"})
+        with pytest.raises(EventValidationError, match="Invalid bool value"):
+            validators[1].validate({2: "yes"})
+
+
+class TestEventCatalog:
+    @pytest.mark.asyncio
+    async def test_loads_lazily_and_caches(self):
+        catalog = EventCatalog()
+        async with session_maker() as db:
+            first = await catalog.get_validators(db)
+            second = await catalog.get_validators(db)
+
+        assert first is second
+        assert EVENT_TYPE_WAYS_ID in first
+        assert catalog.metrics()["loads"] == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_picks_up_new_rule(self):
+        catalog = EventCatalog()
+        async with session_maker() as db:
+            validators = await catalog.get_validators(db)
+        with pytest.raises(EventValidationError):
+            validators[EVENT_TYPE_PLANS_ID].validate({PAYLOAD_TYPE_AUDITORY_ID: "a-1"})
+
+        async with session_maker.begin() as db:
+            db.add(
+                models.AllowedPayload(
+                    event_type_id=EVENT_TYPE_PLANS_ID,
+                    payload_type_id=PAYLOAD_TYPE_AUDITORY_ID,
+                )
+            )
+        try:
+            version = catalog.version
+            catalog.invalidate()
+            assert catalog.version == version + 1
+
+            async with session_maker() as db:
+                validators = await catalog.get_validators(db)
+            assert validators[EVENT_TYPE_PLANS_ID].validate(
+                {PAYLOAD_TYPE_AUDITORY_ID: "a-1", PAYLOAD_TYPE_PLAN_ID: "A-1"}
+            ) == [(PAYLOAD_TYPE_AUDITORY_ID, "a-1"), (PAYLOAD_TYPE_PLAN_ID, "A-1")]
+        finally:
+            async with session_maker.begin() as db:
+                await db.execute(
+                    delete(models.AllowedPayload).where(
+                        models.AllowedPayload.event_type_id == EVENT_TYPE_PLANS_ID,
+                        models.AllowedPayload.payload_type_id
+                        == PAYLOAD_TYPE_AUDITORY_ID,
+                    )
+                )
+
+    @pytest.mark.asyncio
+    async def test_expired_catalog_is_reloaded(self):
+        catalog = EventCatalog(ttl_seconds=0)
+        async with session_maker() as db:
+            await catalog.get_validators(db)
+            validators = await catalog.get_validators(db)
+
+        assert catalog.metrics()["loads"] == 2
+        assert validators[EVENT_TYPE_WAYS_ID].validate(
+            {PAYLOAD_TYPE_SUCCESS_ID: "False"}
+        ) == [(PAYLOAD_TYPE_SUCCESS_ID, "false")]
@@ -0,0 +1,148 @@
+"""Tests for the in-memory event cube."""
+
+import os
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app import models
+from app.config import EventCubeConfig
+from app.constants import EVENT_TYPE_WAYS_ID
+from app.handlers import get_aggregated_stats, get_period_stats
+from app.services import event_cube
+from app.services.event_cube import EventCube, init_event_cube
+
+from .base import session_maker
+from .test_stats_rollup import CASES, WINDOW, rollup_events  # noqa: F401
+
+# В CI numpy ставится из extra cube, и без него тесты должны падать, а не пропускаться
+requires_numpy = pytest.mark.skipif(
+    event_cube.np is None and not os.environ.get("CI"),
+    reason="нужен numpy (uv sync --extra cube)",
+)
+
+NOW = datetime(2026, 5, 1, 12, 0)
+
+
+async def _stats(period_type: str, event_type_id=None):
+    async with session_maker() as db:
+        periods = await get_period_stats(db, period_type, *WINDOW, event_type_id)
+        aggregated = await get_aggregated_stats(db, period_type, *WINDOW, event_type_id)
+    return [item.model_dump() for item in periods], aggregated.model_dump()
+
+
+@pytest.fixture
+async def cube(monkeypatch):
+    cube = EventCube(window_days=90)
+    async with session_maker() as db:
+        await cube.rebuild(db, NOW)
+    return cube
+
+
+def _use(monkeypatch, cube):
+    monkeypatch.setattr("app.handlers.get.get_event_cube", lambda: cube)
+    # Сравнение идёт с ответом по events, без дневной сводки
+    monkeypatch.setattr("app.handlers.get.rollup_split", AsyncMock(return_value=None))
+
+
+@requires_numpy
+@pytest.mark.asyncio
+@pytest.mark.parametrize("period_type, event_type_id", CASES)
+async def test_cube_matches_raw_events(
+    rollup_events,  # noqa: F811
+    monkeypatch,
+    period_type,
+    event_type_id,
+):
+    monkeypatch.setattr("app.handlers.get.rollup_split", AsyncMock(return_value=None))
+    expected = await _stats(period_type, event_type_id)
+    cube = EventCube(window_days=90)
+    async with session_maker() as db:
+        await cube.rebuild(db, NOW)
+    _use(monkeypatch, cube)
+
+    assert await _stats(period_type, event_type_id) == expected
+    assert cube.metrics()["queries"] == 2
+
+
+@requires_numpy
+@pytest.mark.asyncio
+async def test_sync_reads_new_events_one_run_later(rollup_events, cube):  # noqa: F811
+    fresh_id, _old_id = rollup_events
+    before = cube.window_stats("day", *WINDOW)
+    async with session_maker.begin() as db:
+        db.add(
+            models.Event(
+                client_id=fresh_id,
+                event_type_id=EVENT_TYPE_WAYS_ID,
+                trigger_time=datetime(2026, 4, 30, 10, 0),
+            )
+        )
+
+    async with session_maker() as db:
+        await cube.sync(db, NOW)
+        assert cube.window_stats("day", *WINDOW) == before
+        await cube.sync(db, NOW)
+    after = cube.window_stats("day", *WINDOW)
+    visits = {item.period: item.all_visits for item in after.periods}
+    assert visits["2026-04-30"] == 1 + {
+        item.period: item.all_visits for item in before.periods
+    }.get("2026-04-30", 0)
+
+
+@requires_numpy
+@pytest.mark.asyncio
+async def test_window_before_horizon_goes_to_database(cube):
+    assert cube.window_stats("day", datetime(2026, 1, 1), WINDOW[1]) is None
+    assert cube.window_stats("week", *WINDOW) is None
+
+
+@requires_numpy
+@pytest.mark.asyncio
+async def test_moving_horizon_drops_old_events(rollup_events, cube):  # noqa: F811
+    async with session_maker() as db:
+        await cube.sync(db, datetime(2026, 7, 29, 12, 0))
+    assert cube.horizon == datetime(2026, 4, 30)
+    stats = cube.window_stats("day", datetime(2026, 4, 30), datetime(2100, 1, 1))
+    periods = [item.period for item in stats.periods]
+    assert periods[:2] == ["2026-04-30", "2026-05-01"]
+    # В копии остались только события от нового горизонта
+    assert sum(item.all_visits for item in stats.periods) == cube.metrics()["events"]
+
+
+@requires_numpy
+@pytest.mark.asyncio
+async def test_horizon_change_picks_up_late_commits(rollup_events, cube):  # noqa: F811
+    fresh_id, _old_id = rollup_events
+    day = (datetime(2026, 5, 1), datetime(2026, 5, 2))
+
+    def visits() -> int:
+        return sum(item.all_visits for item in cube.window_stats("day", *day).periods)
+
+    before = visits()
+    async with session_maker.begin() as db:
+        event = models.Event(
+            client_id=fresh_id,
+            event_type_id=EVENT_TYPE_WAYS_ID,
+            trigger_time=datetime(2026, 5, 1, 10, 0),
+        )
+        db.add(event)
+    # Транзакция события завершилась после того, как дозапись прочитала его id
+    cube._last_event_id = cube._seen_event_id = event.id
+
+    async with session_maker() as db:
+        await cube.sync(db, NOW)
+        assert visits() == before
+        await cube.sync(db, NOW.replace(day=2))
+    assert visits() == before + 1
+
+
+def test_cube_disabled_without_numpy(monkeypatch):
+    monkeypatch.setattr(event_cube, "np", None)
+    assert init_event_cube(EventCubeConfig(enabled=True)) is None
+    assert event_cube.get_event_cube() is None
+
+
+def test_cube_disabled_by_default():
+    assert init_event_cube(EventCubeConfig()) is None
@@ -0,0 +1,160 @@
+"""Tests for the streaming raw event export."""
+
+import csv
+import io
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app import models
+from app.handlers import export
+from app.handlers.export import export_chunks, iter_export_events
+from app.routes import admin
+from app.services.user_logger_service import UserLoggerService
+from app.state import AppState
+
+from .base import session_maker
+
+ADMIN_TOKEN = "11e1a4b8-7fa7-4501-9faa-541a5e0ff1ed"
+ADMIN_HEADERS = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+
+# Окно сид-событий за 25–26 апреля
+WINDOW = (datetime(2026, 4, 25), datetime(2026, 4, 27))
+
+
+async def _expected() -> dict[int, int]:
+    """id события → число его пэйлоадов по данным БД."""
+    async with session_maker() as db:
+        rows = await db.execute(
+            select(models.Event.id, func.count(models.Payload.id))
+            .outerjoin(models.Payload, models.Payload.event_id == models.Event.id)
+            .where(
+                models.Event.trigger_time >= WINDOW[0],
+                models.Event.trigger_time < WINDOW[1],
+            )
+            .group_by(models.Event.id)
+        )
+        return {row[0]: row[1] for row in rows}
+
+
+async def _exported(export_format: str) -> bytes:
+    async with session_maker() as db:
+        events = iter_export_events(db, *WINDOW)
+        return b"".join([chunk async for chunk in export_chunks(events, export_format)])
+
+
+@pytest.mark.asyncio
+async def test_export_groups_payloads_by_event():
+    expected = await _expected()
+    async with session_maker() as db:
+        events = [event async for event in iter_export_events(db, *WINDOW)]
+
+    assert expected
+    assert {event.id: len(event.payloads) for event in events} == expected
+    assert [event.trigger_time for event in events] == sorted(
+        event.trigger_time for event in events
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_filters_event_type():
+    async with session_maker() as db:
+        event_type_id = (
+            await db.execute(
+                select(models.Event.event_type_id).where(
+                    models.Event.trigger_time >= WINDOW[0]
+                )
+            )
+        ).scalar()
+        code_name = (await db.get(models.EventType, event_type_id)).code_name
+        events = [
+            event async for event in iter_export_events(db, *WINDOW, event_type_id)
+        ]
+    assert events
+    assert {event.event_type for event in events} == {code_name}
+
+
+@pytest.mark.asyncio
+async def test_ndjson_and_csv_carry_same_events(monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_CHUNK_EVENTS", 1)
+    expected = await _expected()
+
+    lines = [json.loads(line) for line in (await _exported("ndjson")).splitlines()]
+    assert {line["id"]: len(line["payloads"]) for line in lines} == expected
+
+    rows = list(csv.DictReader(io.StringIO((await _exported("csv")).decode())))
+    assert {int(row["id"]): len(json.loads(row["payloads"])) for row in rows} == (
+        expected
+    )
+    assert [row["client"] for row in rows] == [line["client"] for line in lines]
+
+
+@pytest.mark.asyncio
+async def test_export_chunks_by_event_count(monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_CHUNK_EVENTS", 2)
+    async with session_maker() as db:
+        chunks = [
+            chunk
+            async for chunk in export_chunks(iter_export_events(db, *WINDOW), "ndjson")
+        ]
+    assert len(chunks) == (len(await _expected()) + 1) // 2
+
+
+class TestExportEndpoint:
+    """Эндпоинт GET /api/admin/events/export."""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        app.state.app_state = AppState()
+        app.include_router(admin.router)
+        return TestClient(app)
+
+    def test_200_streams_csv(self, client):
+        resp = client.get(
+            "/api/admin/events/export",
+            params={
+                "start": WINDOW[0].isoformat(),
+                "end": WINDOW[1].isoformat(),
+                "format": "csv",
+            },
+            headers=ADMIN_HEADERS,
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        assert "events-20260425-20260427.csv" in resp.headers["content-disposition"]
+        assert resp.text.splitlines()[0] == ",".join(export.EXPORT_CSV_COLUMNS)
+
+    def test_audit_record_is_written_before_streaming(self, client, monkeypatch):
+        log_now = AsyncMock()
+        log = Mock()
+        monkeypatch.setattr(UserLoggerService, "log_now", log_now)
+        monkeypatch.setattr(UserLoggerService, "log", log)
+        resp = client.get(
+            "/api/admin/events/export",
+            params={"start": WINDOW[0].isoformat(), "end": WINDOW[1].isoformat()},
+            headers=ADMIN_HEADERS,
+        )
+        assert resp.status_code == 200
+        log_now.assert_awaited_once()
+        log.assert_not_called()
+
+    def test_400_empty_window(self, client):
+        resp = client.get(
+            "/api/admin/events/export",
+            params={"start": WINDOW[1].isoformat(), "end": WINDOW[0].isoformat()},
+            headers=ADMIN_HEADERS,
+        )
+        assert resp.status_code == 400
+
+    def test_401_unauthorized(self, client):
+        resp = client.get(
+            "/api/admin/events/export",
+            params={"start": WINDOW[0].isoformat(), "end": WINDOW[1].isoformat()},
+        )
+        assert resp.status_code == 401
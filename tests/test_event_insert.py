@@ -0,0 +1,99 @@
+"""Tests for the event insert paths on PostgreSQL."""
+
+from datetime import date, datetime, timedelta, UTC
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import models
+from app.handlers.event import (
+    PendingEvent,
+    copy_events,
+    insert_events,
+    reset_payload_value_types,
+)
+
+from .pg import pg_schema, postgres
+
+
+class TestInsertEventsPostgres:
+    """Все три пути вставки пишут одинаковые строки в настоящий PostgreSQL."""
+
+    pytestmark = postgres
+
+    @pytest.fixture
+    async def sessions(self):
+        reset_payload_value_types()
+        async with pg_schema() as engine:
+            async with engine.begin() as conn:
+                await conn.run_sync(models.Base.metadata.create_all)
+            maker = async_sessionmaker(engine, expire_on_commit=False)
+            async with maker.begin() as db:
+                db.add(models.ValueType(id=1, name="int"))
+                db.add(models.PayloadType(id=1, code_name="count", value_type_id=1))
+                db.add(models.EventType(id=1, code_name="visit"))
+                db.add(models.ClientId(id=1, creation_date=datetime(2026, 3, 2, 10)))
+            yield maker
+        reset_payload_value_types()
+
+    @pytest.mark.parametrize("method", ["orm", "statement", "copy"])
+    async def test_writes_events_in_order(self, sessions, method):
+        start = datetime(2026, 3, 5, 12, tzinfo=UTC)
+        events = [
+            PendingEvent(
+                client_id=1,
+                event_type_id=1,
+                trigger_time=start + timedelta(minutes=i),
+                payloads=[(1, str(i))],
+                # День из client_id_cache; без него запись читает client_ids
+                client_first_seen=date(2026, 3, 1) if i == 0 else None,
+            )
+            for i in range(3)
+        ]
+        async with sessions() as db:
+            event_ids = await insert_events(db, events, method)
+        async with sessions() as db:
+            rows = (
+                await db.execute(
+                    select(
+                        models.Event.id,
+                        models.Event.trigger_time,
+                        models.Event.client_first_seen,
+                        models.Payload.value_int,
+                        models.Payload.trigger_time.label("payload_time"),
+                    )
+                    .join(models.Payload, models.Payload.event_id == models.Event.id)
+                    .order_by(models.Event.trigger_time)
+                )
+            ).all()
+        assert [row.id for row in rows] == event_ids
+        assert [row.value_int for row in rows] == [0, 1, 2]
+        for row, event in zip(rows, events):
+            assert row.trigger_time == event.trigger_time.replace(tzinfo=None)
+            assert row.payload_time == row.trigger_time
+            assert row.client_first_seen == (
+                event.client_first_seen or date(2026, 3, 2)
+            )
+
+    async def test_copy_events_splits_into_chunks(self, sessions):
+        start = datetime(2026, 3, 5, 12, tzinfo=UTC)
+        events = (
+            PendingEvent(
+                client_id=1,
+                event_type_id=1,
+                trigger_time=start + timedelta(minutes=i),
+                payloads=[(1, str(i))],
+            )
+            for i in range(5)
+        )
+        async with sessions.begin() as db:
+            event_ids = await copy_events(await db.connection(), events, chunk_size=2)
+        async with sessions() as db:
+            stored = (
+                await db.execute(
+                    select(models.Event.id).order_by(models.Event.trigger_time)
+                )
+            ).scalars()
+        assert list(stored) == event_ids
+        assert len(set(event_ids)) == 5
@@ -0,0 +1,252 @@
+"""Tests for monthly event partition planning."""
+
+from datetime import date, datetime, UTC
+
+import pytest
+from sqlalchemy import delete, select, text
+
+from app import models
+from app.constants import EVENT_TYPE_PLANS_ID, PAYLOAD_TYPE_PLAN_ID
+from app.handlers.event import PendingEvent, insert_events
+from app.services.event_partitions import (
+    add_months,
+    create_partitions,
+    expire_partitions,
+    expired_partitions,
+    list_partitions,
+    parse_partition_month,
+    partition_name,
+    retention_cutoff,
+    upcoming_months,
+)
+
+from .base import session_maker
+from .pg import pg_schema, postgres
+
+
+class TestPartitionPlanning:
+    def test_add_months_crosses_year_boundaries(self):
+        assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+    def test_upcoming_months_include_current(self):
+        assert upcoming_months(date(2026, 12, 18), 2) == [
+            date(2026, 12, 1),
+            date(2027, 1, 1),
+            date(2027, 2, 1),
+        ]
+
+    def test_partition_name_round_trip(self):
+        name = partition_name("events", date(2026, 3, 1))
+        assert name == "events_p2026_03"
+        assert parse_partition_month("events", name) == date(2026, 3, 1)
+        assert parse_partition_month("events", "events_default") is None
+        assert parse_partition_month("events", "payloads_p2026_03") is None
+
+    def test_expired_partitions_keep_retention_window(self):
+        cutoff = retention_cutoff(date(2026, 10, 18), 2)
+        assert cutoff == date(2026, 8, 1)
+        names = [
+            "payloads_p2026_09",
+            "payloads_default",
+            "payloads_p2026_07",
+            "payloads_p2026_08",
+            "payloads_p2025_12",
+        ]
+        assert expired_partitions("payloads", names, cutoff) == [
+            "payloads_p2025_12",
+            "payloads_p2026_07",
+        ]
+
+
+@pytest.mark.asyncio
+async def test_payloads_copy_event_trigger_time():
+    trigger_time = datetime(2026, 10, 18, 9, 30, tzinfo=UTC)
+    event = PendingEvent(
+        client_id=3,
+        event_type_id=EVENT_TYPE_PLANS_ID,
+        trigger_time=trigger_time,
+        payloads=[(PAYLOAD_TYPE_PLAN_ID, "partition-key")],
+    )
+    async with session_maker() as db:
+        [event_id] = await insert_events(db, [event])
+
+    try:
+        async with session_maker() as db:
+            event_time, payload_time = (
+                await db.execute(
+                    select(models.Event.trigger_time, models.Payload.trigger_time)
+                    .join(models.Payload, models.Payload.event_id == models.Event.id)
+                    .where(models.Event.id == event_id)
+                )
+            ).one()
+        assert payload_time == event_time
+    finally:
+        async with session_maker.begin() as db:
+            await db.execute(
+                delete(models.Payload).where(models.Payload.event_id == event_id)
+            )
+            await db.execute(delete(models.Event).where(models.Event.id == event_id))
+
+
+@pytest.fixture
+async def pg_conn():
+    async with pg_schema() as engine, engine.connect() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE events (id integer NOT NULL, "
+                "trigger_time timestamp NOT NULL, "
+                "PRIMARY KEY (id, trigger_time)) "
+                "PARTITION BY RANGE (trigger_time)"
+            )
+        )
+        await conn.execute(
+            text(
+                "CREATE TABLE payloads (id integer NOT NULL, "
+                "event_id integer NOT NULL, value varchar(50) NOT NULL, "
+                "trigger_time timestamp NOT NULL, "
+                "PRIMARY KEY (id, trigger_time), "
+                "FOREIGN KEY (event_id, trigger_time) "
+                "REFERENCES events (id, trigger_time) ON DELETE CASCADE) "
+                "PARTITION BY RANGE (trigger_time)"
+            )
+        )
+        await conn.execute(
+            text("CREATE TABLE events_default PARTITION OF events DEFAULT")
+        )
+        await conn.execute(
+            text("CREATE TABLE payloads_default PARTITION OF payloads DEFAULT")
+        )
+        await conn.commit()
+        yield conn
+        await conn.rollback()
+
+
+async def _count(conn, table: str) -> int:
+    return (await conn.execute(text(f"SELECT count(*) FROM {table}"))).scalar_one()
+
+
+class TestCreatePartitionsPostgres:
+    """create_partitions против настоящих секционированных таблиц в отдельной схеме."""
+
+    pytestmark = postgres
+
+    async def test_moves_default_rows_into_new_month(self, pg_conn):
+        await pg_conn.execute(
+            text(
+                "INSERT INTO events VALUES "
+                "(1, '2026-11-05 10:00'), (2, '2026-12-01 00:00')"
+            )
+        )
+        await pg_conn.execute(
+            text(
+                "INSERT INTO payloads VALUES "
+                "(1, 1, 'late', '2026-11-05 10:00'), "
+                "(2, 2, 'other', '2026-12-01 00:00')"
+            )
+        )
+        await pg_conn.commit()
+
+        created = await create_partitions(pg_conn, [date(2026, 11, 1)])
+        await pg_conn.commit()
+
+        assert created == ["events_p2026_11", "payloads_p2026_11"]
+        assert await _count(pg_conn, "events_p2026_11") == 1
+        assert await _count(pg_conn, "payloads_p2026_11") == 1
+        assert await _count(pg_conn, "events_default") == 1
+        assert await _count(pg_conn, "payloads_default") == 1
+        moved = (
+            await pg_conn.execute(
+                text("SELECT value FROM payloads_p2026_11 WHERE event_id = 1")
+            )
+        ).scalar_one()
+        assert moved == "late"
+
+    async def test_skips_existing_partitions(self, pg_conn):
+        assert await create_partitions(pg_conn, [date(2026, 11, 1)]) == [
+            "events_p2026_11",
+            "payloads_p2026_11",
+        ]
+        assert await create_partitions(pg_conn, [date(2026, 11, 1)]) == []
+
+
+class TestExpirePartitionsPostgres:
+    """expire_partitions: просроченный месяц вместе с секцией payloads и DEFAULT."""
+
+    pytestmark = postgres
+
+    @pytest.fixture
+    async def conn(self, pg_conn):
+        await create_partitions(pg_conn, [date(2026, 7, 1), date(2026, 8, 1)])
+        await pg_conn.execute(
+            text(
+                "INSERT INTO events VALUES "
+                "(1, '2026-07-10 10:00'), (2, '2026-08-10 10:00'), "
+                "(3, '2026-05-02 10:00'), (4, '2026-09-02 10:00')"
+            )
+        )
+        await pg_conn.execute(
+            text(
+                "INSERT INTO payloads VALUES "
+                "(1, 1, 'july', '2026-07-10 10:00'), "
+                "(2, 2, 'august', '2026-08-10 10:00'), "
+                "(3, 3, 'may', '2026-05-02 10:00'), "
+                "(4, 4, 'september', '2026-09-02 10:00')"
+            )
+        )
+        await pg_conn.commit()
+        return pg_conn
+
+    @staticmethod
+    async def _partitions(conn) -> set[str]:
+        return {
+            *await list_partitions(conn, "events"),
+            *await list_partitions(conn, "payloads"),
+        }
+
+    async def test_drop_removes_expired_month_and_default_rows(self, conn):
+        expired = await expire_partitions(conn, date(2026, 8, 1), "drop")
+        await conn.commit()
+
+        assert expired == ["payloads_p2026_07", "events_p2026_07"]
+        assert await self._partitions(conn) == {
+            "events_p2026_08",
+            "events_default",
+            "payloads_p2026_08",
+            "payloads_default",
+        }
+        assert (
+            await conn.execute(text("SELECT to_regclass('events_p2026_07')"))
+        ).scalar_one() is None
+        ids = (await conn.execute(text("SELECT id FROM events ORDER BY id"))).scalars()
+        assert list(ids) == [2, 4]
+        values = (
+            await conn.execute(text("SELECT value FROM payloads ORDER BY id"))
+        ).scalars()
+        assert list(values) == ["august", "september"]
+
+    async def test_detach_keeps_expired_rows_outside_parents(self, conn):
+        expired = await expire_partitions(conn, date(2026, 8, 1), "detach")
+        await conn.commit()
+
+        assert expired == ["payloads_p2026_07", "events_p2026_07"]
+        assert "events_p2026_07" not in await self._partitions(conn)
+        assert await _count(conn, "events_p2026_07") == 1
+        assert await _count(conn, "payloads_p2026_07") == 1
+        # Отцеплённая секция payloads больше не ссылается на events
+        foreign_keys = (
+            await conn.execute(
+                text(
+                    "SELECT count(*) FROM pg_constraint "
+                    "WHERE conrelid = 'payloads_p2026_07'::regclass AND contype = 'f'"
+                )
+            )
+        ).scalar_one()
+        assert foreign_keys == 0
+        assert await _count(conn, "events") == 2
+        assert await _count(conn, "payloads") == 2
+        assert await _count(conn, "events_default_expired") == 1
+        archived = (
+            await conn.execute(text("SELECT value FROM payloads_default_expired"))
+        ).scalar_one()
+        assert archived == "may"
@@ -0,0 +1,135 @@
+"""Tests for the local event spool used during DB outages."""
+
+import uuid
+from datetime import datetime, UTC
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app import models
+from app.constants import EVENT_TYPE_PLANS_ID, PAYLOAD_TYPE_PLAN_ID
+from app.handlers.event import PendingEvent
+from app.services import event_buffer, event_spool
+from app.services.event_buffer import store_events
+from app.services.event_spool import EventSpool
+
+from .base import session_maker
+
+
+def _pending(plan_id: str) -> PendingEvent:
+    return PendingEvent(
+        client_id=3,
+        event_type_id=EVENT_TYPE_PLANS_ID,
+        trigger_time=datetime.now(UTC),
+        payloads=[(PAYLOAD_TYPE_PLAN_ID, plan_id)],
+    )
+
+
+async def _count(plan_id: str) -> int:
+    async with session_maker() as db:
+        return (
+            await db.execute(
+                select(func.count())
+                .select_from(models.Payload)
+                .where(models.Payload.value == plan_id)
+            )
+        ).scalar_one()
+
+
+async def _cleanup(plan_id: str, spool: EventSpool) -> None:
+    async with session_maker.begin() as db:
+        event_ids = list(
+            (
+                await db.execute(
+                    select(models.Payload.event_id).where(
+                        models.Payload.value == plan_id
+                    )
+                )
+            ).scalars()
+        )
+        await db.execute(
+            delete(models.Payload).where(models.Payload.event_id.in_(event_ids))
+        )
+        await db.execute(delete(models.Event).where(models.Event.id.in_(event_ids)))
+        await db.execute(
+            delete(models.SpoolCheckpoint).where(
+                models.SpoolCheckpoint.spool_id == await spool.open()
+            )
+        )
+
+
+@pytest.fixture
+def plan_id() -> str:
+    return f"spool-{uuid.uuid4().hex[:8]}"
+
+
+class TestEventSpool:
+    @pytest.mark.asyncio
+    async def test_replays_in_batches_and_empties_spool(self, tmp_path, plan_id):
+        spool = EventSpool(str(tmp_path / "spool.db"), replay_batch_size=2)
+        try:
+            await spool.append([_pending(plan_id) for _ in range(5)])
+            assert await spool.pending_count() == 5
+
+            assert await spool.replay(session_maker) == 5
+            assert await spool.pending_count() == 0
+            assert await _count(plan_id) == 5
+            assert await spool.replay(session_maker) == 0
+        finally:
+            await _cleanup(plan_id, spool)
+
+    @pytest.mark.asyncio
+    async def test_replay_is_exactly_once_after_crash(
+        self, tmp_path, plan_id, monkeypatch
+    ):
+        spool = EventSpool(str(tmp_path / "spool.db"), replay_batch_size=10)
+        try:
+            await spool.append([_pending(plan_id) for _ in range(3)])
+
+            # Падение после commit в основную БД, но до очистки спула
+            async def crash(_seq: int) -> None:
+                return None
+
+            with monkeypatch.context() as patch:
+                patch.setattr(spool, "_forget_up_to", crash)
+                patch.setattr(spool, "replay_batch_size", 3)
+                await spool.replay(session_maker)
+            assert await spool.pending_count() == 3
+
+            assert await spool.replay(session_maker) == 0
+            assert await spool.pending_count() == 0
+            assert await _count(plan_id) == 3
+        finally:
+            await _cleanup(plan_id, spool)
+
+
+class TestStoreEventsFallback:
+    @pytest.mark.asyncio
+    async def test_unavailable_db_spools_events(self, tmp_path, monkeypatch):
+        spool = EventSpool(str(tmp_path / "spool.db"))
+        monkeypatch.setattr(event_spool, "_event_spool", spool)
+
+        async def unavailable(*_args, **_kwargs):
+            raise OperationalError("INSERT", {}, ConnectionError("db is down"))
+
+        monkeypatch.setattr(event_buffer, "insert_events", unavailable)
+        async with session_maker() as db:
+            await store_events(db, [_pending("down")])
+
+        assert await spool.pending_count() == 1
+
+    @pytest.mark.asyncio
+    async def test_data_errors_are_not_spooled(self, tmp_path, monkeypatch):
+        spool = EventSpool(str(tmp_path / "spool.db"))
+        monkeypatch.setattr(event_spool, "_event_spool", spool)
+
+        async def broken(*_args, **_kwargs):
+            raise IntegrityError("INSERT", {}, ValueError("fk violation"))
+
+        monkeypatch.setattr(event_buffer, "insert_events", broken)
+        async with session_maker() as db:
+            with pytest.raises(IntegrityError):
+                await store_events(db, [_pending("broken")])
+
+        assert await spool.pending_count() == 0
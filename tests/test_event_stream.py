@@ -0,0 +1,133 @@
+"""Tests for NDJSON streaming event ingestion."""
+
+import json
+import uuid
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.constants import (
+    EVENT_TYPE_PLANS_ID,
+    EVENT_TYPE_SITE_ID,
+    PAYLOAD_TYPE_ENDPOINT_ID,
+    PAYLOAD_TYPE_PLAN_ID,
+)
+from app.handlers.event import resolve_client_ids
+from app.helpers.ndjson import iter_ndjson_lines
+from app.routes.stat import event_stream
+
+from .base import client
+
+CLIENT_IDENT = "22e1a4b8-7fa7-4501-9faa-541a5e0ff1ec"
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def _collect(*parts: bytes, max_line_bytes: int = 64):
+    return [item async for item in iter_ndjson_lines(_chunks(*parts), max_line_bytes)]
+
+
+class TestIterNdjsonLines:
+    @pytest.mark.asyncio
+    async def test_joins_lines_split_across_chunks(self):
+        lines = await _collect(b'{"a":', b" 1}\n\n", b'{"b": 2}\n{"c"', b": 3}")
+        assert lines == [(1, b'{"a": 1}'), (3, b'{"b": 2}'), (4, b'{"c": 3}')]
+
+    @pytest.mark.asyncio
+    async def test_long_line_is_reported_without_buffering(self):
+        lines = await _collect(b"x" * 40, b"x" * 40, b"\n{}\n", max_line_bytes=64)
+        assert lines == [(1, None), (2, b"{}")]
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limit():
+    # Поток делит лимит с одиночной и пакетной записью
+    client.app.state.app_state.user_access.clear()
+
+
+def _line(event_type_id: int, payloads: dict, ident: str = CLIENT_IDENT) -> str:
+    return json.dumps(
+        {"ident": ident, "event_type_id": event_type_id, "payloads": payloads}
+    )
+
+
+def test_stream_reports_accepted_and_rejected_lines():
+    body = "\n".join(
+        [
+            _line(EVENT_TYPE_SITE_ID, {PAYLOAD_TYPE_ENDPOINT_ID: "/stream/1"}),
+            "{broken",
+            _line(EVENT_TYPE_PLANS_ID, {PAYLOAD_TYPE_PLAN_ID: "A-1"}),
+            _line(EVENT_TYPE_PLANS_ID, {PAYLOAD_TYPE_ENDPOINT_ID: "/nope"}),
+            "",
+            _line(EVENT_TYPE_SITE_ID, {PAYLOAD_TYPE_ENDPOINT_ID: "/stream/2"}),
+        ]
+    )
+    response = client.post(
+        "/api/stat/events/stream",
+        content=body.encode(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 3
+    assert data["rejected"] == 2
+    [range_] = data["ranges"]
+    assert (range_["start_line"], range_["end_line"]) == (1, 6)
+    assert [error["line"] for error in range_["errors"]] == [2, 4]
+    assert range_["errors"][0]["detail"].startswith("Invalid JSON")
+
+
+def test_stream_requires_ndjson_content_type():
+    response = client.post(
+        "/api/stat/events/stream",
+        content=_line(EVENT_TYPE_SITE_ID, {PAYLOAD_TYPE_ENDPOINT_ID: "/x"}),
+        headers={"content-type": "application/json"},
+    )
+    assert response.status_code == 415
+
+
+def _post_stream(lines: list[str]):
+    return client.post(
+        "/api/stat/events/stream",
+        content="\n".join(lines).encode(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+
+def test_stream_ranges_share_the_batch_rate_limit():
+    lines = [_line(EVENT_TYPE_SITE_ID, {PAYLOAD_TYPE_ENDPOINT_ID: "/limit"})]
+    assert _post_stream(lines).json()["accepted"] == 1
+
+    data = _post_stream(lines).json()
+    assert (data["accepted"], data["rejected"]) == (0, 1)
+    assert "rate limited" in data["ranges"][0]["errors"][0]["detail"]
+
+
+def test_failed_range_is_reported_after_stored_ranges(monkeypatch):
+    calls = 0
+
+    async def flaky_resolve(db, idents):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise OperationalError("SELECT", {}, Exception("db down"))
+        return await resolve_client_ids(db, idents)
+
+    monkeypatch.setattr(event_stream, "EVENT_STREAM_BATCH_SIZE", 2)
+    monkeypatch.setattr(event_stream, "resolve_client_ids", flaky_resolve)
+    lines = [
+        _line(EVENT_TYPE_SITE_ID, {PAYLOAD_TYPE_ENDPOINT_ID: f"/flaky/{i}"}, ident)
+        for i, ident in enumerate([CLIENT_IDENT] * 2 + [str(uuid.uuid4())] * 2)
+    ]
+    lines[1] = _line(EVENT_TYPE_PLANS_ID, {PAYLOAD_TYPE_PLAN_ID: "A-1"})
+    response = _post_stream(lines)
+
+    assert response.status_code == 200
+    first, second = response.json()["ranges"]
+    assert (first["accepted"], first["rejected"]) == (2, 0)
+    assert (second["accepted"], second["rejected"]) == (0, 2)
+    assert second["errors"][0]["detail"] == "Lines 3-4 were not stored, retry them"
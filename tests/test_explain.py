@@ -0,0 +1,55 @@
+"""Tests for the `db explain` query plan audit."""
+
+import pytest
+
+from app.cli.db.explain import (
+    collect_statements,
+    explain_statements,
+    pg_seq_scans,
+    sqlite_seq_scans,
+)
+
+from .base import session_maker
+
+
+def test_pg_seq_scans_ignore_ctes_and_index_scans():
+    plan = {
+        "Node Type": "Hash Join",
+        "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "events_p2026_10"},
+            {"Node Type": "Index Scan", "Relation Name": "client_ids"},
+            {"Node Type": "CTE Scan", "Relation Name": "period_stats"},
+        ],
+    }
+    assert pg_seq_scans(plan) == ["events_p2026_10"]
+
+
+def test_sqlite_seq_scans_only_report_tables_without_index():
+    details = [
+        "SCAN events",
+        "SEARCH client_ids USING INTEGER PRIMARY KEY (rowid=?)",
+        "SCAN payloads USING COVERING INDEX ix_payloads_type_id_value",
+        "SCAN period_stats",
+    ]
+    assert sqlite_seq_scans(details) == ["events"]
+
+
+@pytest.mark.asyncio
+async def test_analytics_and_ingestion_queries_use_indexes():
+    async with session_maker() as db:
+        try:
+            statements = await collect_statements(db)
+            plans = await explain_statements(await db.connection(), statements)
+        finally:
+            await db.rollback()
+
+    names = {plan.name.split(" #")[0] for plan in plans}
+    assert {
+        "get_popular_audiences",
+        "get_period_stats",
+        "get_aggregated_stats",
+        "resolve_client_ids",
+        "write_events",
+    } <= names
+    scanned = {table for plan in plans for table in plan.seq_scans}
+    assert not scanned & {"events", "payloads", "client_ids"}
@@ -0,0 +1,39 @@
+"""Tests for the HyperLogLog sketch."""
+
+import pytest
+
+from app.helpers.hll import HLL_STANDARD_ERROR, HyperLogLog
+
+
+def test_small_cardinalities_are_counted_almost_exactly():
+    assert HyperLogLog().count() == 0
+    assert HyperLogLog().update([1, 2, 3, 3, 2]).count() == 3
+    assert abs(HyperLogLog().update(range(100)).count() - 100) <= 2
+
+
+@pytest.mark.parametrize("size", [10_000, 50_000])
+def test_estimate_within_error_bound(size):
+    estimate = HyperLogLog().update(range(size)).count()
+    assert abs(estimate - size) / size < 4 * HLL_STANDARD_ERROR
+
+
+def test_merge_estimates_union():
+    first = HyperLogLog().update(range(0, 6_000))
+    second = HyperLogLog().update(range(3_000, 9_000))
+    direct = HyperLogLog().update(range(9_000)).count()
+    assert first.merge(second).count() == direct
+
+
+def test_round_trip_and_union_of_serialized_sketches():
+    days = [HyperLogLog().update(range(day * 100, day * 100 + 150)) for day in range(5)]
+    restored = HyperLogLog.from_bytes(days[0].to_bytes())
+    assert restored.registers == days[0].registers
+    union = HyperLogLog.union([day.to_bytes() for day in days] + [None])
+    assert union.count() == HyperLogLog().update(range(550)).count()
+    # Пустой скетч почти целиком из нулей и хорошо сжимается
+    assert len(HyperLogLog().to_bytes()) < 100
+
+
+def test_merge_rejects_different_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(10))
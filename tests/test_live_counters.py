@@ -0,0 +1,187 @@
+"""Tests for live event-rate counters and their SSE endpoint."""
+
+import json
+from datetime import datetime, UTC
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, func, select
+
+from app import models
+from app.constants import EVENT_TYPE_SITE_ID, EVENT_TYPE_WAYS_ID
+from app.handlers.event import PendingEvent
+from app.routes import admin
+from app.routes.admin import live
+from app.services import event_buffer
+from app.services.live_counters import LiveEventCounters
+from app.state import AppState
+
+from .base import session_maker
+
+ADMIN_TOKEN = "11e1a4b8-7fa7-4501-9faa-541a5e0ff1ed"
+ADMIN_HEADERS = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _event(event_type_id: int) -> PendingEvent:
+    return PendingEvent(
+        client_id=3, event_type_id=event_type_id, trigger_time=datetime.now(UTC)
+    )
+
+
+def test_windows_slide_out():
+    clock = FakeClock()
+    counters = LiveEventCounters(clock)
+    counters.add(EVENT_TYPE_WAYS_ID, 2)
+
+    clock.now += 30
+    counters.add(EVENT_TYPE_WAYS_ID)
+    assert counters.snapshot()["event_types"] == {
+        EVENT_TYPE_WAYS_ID: {"minute": 3, "hour": 3, "day": 3}
+    }
+
+    clock.now += 45
+    assert counters.snapshot()["event_types"][EVENT_TYPE_WAYS_ID]["minute"] == 1
+
+    clock.now += 3_600
+    assert counters.snapshot()["event_types"][EVENT_TYPE_WAYS_ID] == {
+        "minute": 0,
+        "hour": 0,
+        "day": 3,
+    }
+
+    clock.now += 86_400
+    snapshot = counters.snapshot()
+    assert snapshot["event_types"] == {}
+    assert snapshot["total"] == {"minute": 0, "hour": 0, "day": 0}
+
+
+def test_reused_bucket_starts_from_zero():
+    clock = FakeClock()
+    counters = LiveEventCounters(clock)
+    counters.add(EVENT_TYPE_WAYS_ID, 5)
+    # Та же секундная корзина через полный оборот кольца
+    clock.now += 60
+    counters.add(EVENT_TYPE_WAYS_ID)
+    assert counters.snapshot()["event_types"][EVENT_TYPE_WAYS_ID]["minute"] == 1
+
+
+def test_record_counts_by_type_and_total():
+    counters = LiveEventCounters(FakeClock())
+    counters.record(
+        [
+            _event(EVENT_TYPE_WAYS_ID),
+            _event(EVENT_TYPE_SITE_ID),
+            _event(EVENT_TYPE_WAYS_ID),
+        ]
+    )
+    snapshot = counters.snapshot()
+    assert snapshot["event_types"][EVENT_TYPE_WAYS_ID]["minute"] == 2
+    assert snapshot["event_types"][EVENT_TYPE_SITE_ID]["minute"] == 1
+    assert snapshot["total"] == {"minute": 3, "hour": 3, "day": 3}
+    assert counters.metrics() == {"event_types": 2, "recorded": 3}
+
+    counters.clear()
+    assert counters.snapshot()["total"] == {"minute": 0, "hour": 0, "day": 0}
+    assert counters.metrics() == {"event_types": 0, "recorded": 0}
+
+
+@pytest.mark.asyncio
+async def test_store_events_records_accepted_events(monkeypatch):
+    counters = LiveEventCounters()
+    monkeypatch.setattr(event_buffer, "live_event_counters", counters)
+    async with session_maker() as db:
+        last_id = (await db.execute(select(func.max(models.Event.id)))).scalar()
+        await event_buffer.store_events(db, [_event(EVENT_TYPE_SITE_ID)])
+    try:
+        assert counters.snapshot()["total"]["minute"] == 1
+    finally:
+        async with session_maker.begin() as db:
+            await db.execute(delete(models.Event).where(models.Event.id > last_id))
+
+
+@pytest.mark.asyncio
+async def test_store_events_skips_failed_write(monkeypatch):
+    counters = LiveEventCounters()
+    monkeypatch.setattr(event_buffer, "live_event_counters", counters)
+
+    async def failing_insert(db, events):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(event_buffer, "insert_events", failing_insert)
+    async with session_maker() as db:
+        with pytest.raises(RuntimeError):
+            await event_buffer.store_events(db, [_event(EVENT_TYPE_SITE_ID)])
+    assert counters.metrics()["recorded"] == 0
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after: int):
+        self.checks = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        self.checks += 1
+        return self.checks >= self.disconnect_after
+
+
+@pytest.mark.asyncio
+async def test_stream_pushes_snapshots_until_disconnect():
+    counters = LiveEventCounters(FakeClock())
+    counters.add(EVENT_TYPE_WAYS_ID)
+    messages = [
+        message
+        async for message in live.stream_live_counters(
+            FakeRequest(disconnect_after=2), 0.01, counters
+        )
+    ]
+    assert messages[0] == "retry: 10\n"
+    assert len(messages) == 3
+    event, data = messages[1].strip().split("\n")
+    assert event == "event: counters"
+    assert json.loads(data.removeprefix("data: "))["total"]["minute"] == 1
+
+
+class TestLiveEndpoint:
+    """Эндпоинт GET /api/admin/events/live."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        real_stream = live.stream_live_counters
+
+        async def one_snapshot(request, interval):
+            async for message in real_stream(request, interval):
+                yield message
+                if message.startswith("event:"):
+                    return
+
+        monkeypatch.setattr(live, "stream_live_counters", one_snapshot)
+        app = FastAPI()
+        app.state.app_state = AppState()
+        app.include_router(admin.router)
+        return TestClient(app)
+
+    def test_200_event_stream(self, client):
+        resp = client.get("/api/admin/events/live", headers=ADMIN_HEADERS)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        assert resp.headers["cache-control"] == "no-cache"
+        assert "event: counters\ndata: " in resp.text
+
+    def test_422_interval_out_of_range(self, client):
+        resp = client.get(
+            "/api/admin/events/live", params={"interval": 0}, headers=ADMIN_HEADERS
+        )
+        assert resp.status_code == 422
+
+    def test_401_unauthorized(self, client):
+        resp = client.get("/api/admin/events/live")
+        assert resp.status_code == 401
@@ -0,0 +1,114 @@
+"""Tests for the materialized popular auditories rating."""
+
+from datetime import date, datetime, UTC
+
+import pytest
+from sqlalchemy import delete
+
+from app import models
+from app.constants import (
+    EVENT_TYPE_AUDS_ID,
+    PAYLOAD_TYPE_AUDITORY_ID,
+    PAYLOAD_TYPE_SUCCESS_ID,
+)
+from app.handlers import get_popular_audiences
+from app.handlers.event import PendingEvent, insert_events
+from app.handlers.popular import (
+    POPULAR_AUDIENCES,
+    read_popular_audiences,
+    refresh_popular_audiences,
+)
+from app.services.popular_audiences import popular_audiences_cache
+
+from .base import client, session_maker
+
+TODAY = date(2026, 10, 18)
+
+
+@pytest.fixture
+async def clean_rating():
+    popular_audiences_cache.invalidate()
+    event_ids: list[int] = []
+    try:
+        yield event_ids
+    finally:
+        async with session_maker.begin() as db:
+            await db.execute(
+                delete(models.StatsRollupState).where(
+                    models.StatsRollupState.name == POPULAR_AUDIENCES
+                )
+            )
+            await db.execute(delete(models.PopularAudienceWeight))
+            await db.execute(
+                delete(models.Payload).where(models.Payload.event_id.in_(event_ids))
+            )
+            await db.execute(delete(models.Event).where(models.Event.id.in_(event_ids)))
+        popular_audiences_cache.invalidate()
+
+
+async def _success_event(auditory_id: str) -> int:
+    event = PendingEvent(
+        client_id=3,
+        event_type_id=EVENT_TYPE_AUDS_ID,
+        trigger_time=datetime.now(UTC),
+        payloads=[
+            (PAYLOAD_TYPE_AUDITORY_ID, auditory_id),
+            (PAYLOAD_TYPE_SUCCESS_ID, "true"),
+        ],
+    )
+    async with session_maker() as db:
+        [event_id] = await insert_events(db, [event])
+    return event_id
+
+
+async def _refresh() -> None:
+    async with session_maker() as db:
+        await refresh_popular_audiences(db, TODAY)
+
+
+@pytest.mark.asyncio
+async def test_first_refresh_matches_live_ranking(clean_rating):
+    async with session_maker() as db:
+        assert await read_popular_audiences(db) is None
+        live = await get_popular_audiences(db)
+
+    await _refresh()
+    async with session_maker() as db:
+        assert await read_popular_audiences(db) == live
+
+
+@pytest.mark.asyncio
+async def test_new_events_are_counted_once_after_lag(clean_rating):
+    await _refresh()
+    clean_rating.append(await _success_event("a-test-popular"))
+
+    # Событие новее водяного знака: учитывается со следующего запуска
+    await _refresh()
+    async with session_maker() as db:
+        ranking = {item.auditory_id: item for item in await read_popular_audiences(db)}
+    assert "a-test-popular" not in ranking
+
+    await _refresh()
+    await _refresh()
+    async with session_maker() as db:
+        ranking = {item.auditory_id: item for item in await read_popular_audiences(db)}
+        live = {item.auditory_id: item for item in await get_popular_audiences(db)}
+    assert ranking["a-test-popular"].total_weight == 1
+    assert ranking == live
+
+
+@pytest.mark.asyncio
+async def test_endpoint_serves_cached_body_with_etag(clean_rating):
+    response = client.get("/api/get/popular")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.json()[0] == {"auditory_id": "a-100", "total_weight": 4}
+
+    cached = client.get("/api/get/popular", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert popular_audiences_cache.metrics()["hits"] >= 1
+
+    stale = client.get("/api/get/popular", headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+    assert stale.content == response.content
@@ -0,0 +1,100 @@
+"""Tests for the closed-period statistics cache."""
+
+from datetime import date, datetime
+
+import pytest
+
+from app.handlers import get_period_stats
+from app.services import stats_cache
+from app.services.stats_cache import (
+    PeriodStatsCache,
+    get_cached_period_stats,
+    next_period,
+    period_floor,
+)
+
+from .base import session_maker
+
+NOW = datetime(2026, 4, 26, 15, 0)
+
+
+@pytest.fixture
+def spy(monkeypatch):
+    calls: list[tuple[datetime, datetime]] = []
+
+    async def counting_get_period_stats(db, period_type, start, end, *args):
+        calls.append((start, end))
+        return await get_period_stats(db, period_type, start, end, *args)
+
+    monkeypatch.setattr(stats_cache, "get_period_stats", counting_get_period_stats)
+    return calls
+
+
+async def _cached(cache, period_type, start, end, now=NOW):
+    async with session_maker() as db:
+        return await get_cached_period_stats(
+            db, period_type, start, end, cache=cache, now=now
+        )
+
+
+def test_period_helpers():
+    assert period_floor("month", datetime(2026, 4, 26, 15)) == datetime(2026, 4, 1)
+    assert period_floor("year", datetime(2026, 4, 26)) == datetime(2026, 1, 1)
+    assert next_period("month", datetime(2026, 12, 1)) == datetime(2027, 1, 1)
+    assert next_period("day", datetime(2026, 4, 30)) == datetime(2026, 5, 1)
+
+
+@pytest.mark.asyncio
+async def test_only_uncached_suffix_is_queried(spy):
+    cache = PeriodStatsCache()
+    start = datetime(2026, 4, 20)
+    first = await _cached(cache, "day", start, datetime(2026, 4, 26))
+    assert spy == [(start, datetime(2026, 4, 26))]
+
+    # Закрытые дни из кэша, в БД только добавившийся хвост окна
+    second = await _cached(cache, "day", start, datetime(2026, 4, 27))
+    assert spy[-1] == (datetime(2026, 4, 26), datetime(2026, 4, 27))
+    async with session_maker() as db:
+        expected = await get_period_stats(db, "day", start, datetime(2026, 4, 27))
+    assert second == expected
+    assert second[: len(first)] == first
+
+
+@pytest.mark.asyncio
+async def test_open_periods_expire(spy):
+    cache = PeriodStatsCache(open_ttl_seconds=0)
+    window = (datetime(2026, 4, 25), datetime(2026, 4, 27))
+    await _cached(cache, "day", *window)
+    await _cached(cache, "day", *window)
+    # 25 апреля закрыт и берётся из кэша, 26-е ещё идёт и запрашивается снова
+    assert spy == [window, (datetime(2026, 4, 26), datetime(2026, 4, 27))]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_days_drops_periods_containing_day(spy):
+    cache = PeriodStatsCache()
+    window = (datetime(2026, 1, 1), datetime(2026, 4, 1))
+    await _cached(cache, "month", *window)
+    assert cache.invalidate_days([date(2026, 2, 14)]) == 1
+
+    await _cached(cache, "month", *window)
+    assert spy[-1] == (datetime(2026, 2, 1), datetime(2026, 4, 1))
+
+
+@pytest.mark.asyncio
+async def test_unaligned_window_bypasses_cache(spy):
+    cache = PeriodStatsCache()
+    await _cached(cache, "day", datetime(2026, 4, 25, 12), datetime(2026, 4, 27))
+    assert cache.metrics()["size"] == 0
+    assert len(spy) == 1
+
+
+@pytest.mark.asyncio
+async def test_closed_periods_expire(spy):
+    # Сброс из refresh_stats_rollup доходит только до своего воркера,
+    # остальные перечитывают закрытые периоды по closed_ttl_seconds
+    cache = PeriodStatsCache(closed_ttl_seconds=0)
+    window = (datetime(2026, 4, 20), datetime(2026, 4, 22))
+    await _cached(cache, "day", *window)
+    await _cached(cache, "day", *window)
+    assert spy == [window, window]
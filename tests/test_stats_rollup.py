@@ -0,0 +1,196 @@
+"""Tests for the daily statistics rollup."""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import delete, event, select
+
+from app import models
+from app.constants import EVENT_TYPE_SITE_ID, EVENT_TYPE_WAYS_ID
+from app.handlers import get_aggregated_stats, get_period_stats
+from app.handlers.rollup import (
+    DAILY_ROLLUP,
+    ROLLUP_ALL_EVENT_TYPES,
+    refresh_daily_rollup,
+    rollup_split,
+)
+
+from .base import session_maker
+
+# Окно апрель–начало мая: сиды за 25–26 апреля и события ниже
+WINDOW = (datetime(2026, 4, 1), datetime(2026, 5, 2))
+# 1 мая ещё не закрыт: его события считаются по events
+TODAY = date(2026, 5, 1)
+
+
+async def _clear_rollup() -> None:
+    async with session_maker.begin() as db:
+        await db.execute(delete(models.StatsRollupState))
+        await db.execute(delete(models.DailyEventStats))
+
+
+@pytest.fixture
+async def rollup_events():
+    async with session_maker.begin() as db:
+        fresh = models.ClientId(creation_date=datetime(2026, 4, 28, 10, 0))
+        old = models.ClientId(creation_date=datetime(2026, 3, 10, 8, 0))
+        db.add_all([fresh, old])
+        await db.flush()
+        events = [
+            (fresh.id, EVENT_TYPE_WAYS_ID, datetime(2026, 4, 28, 11, 0)),
+            (fresh.id, EVENT_TYPE_WAYS_ID, datetime(2026, 4, 28, 12, 0)),
+            (fresh.id, EVENT_TYPE_SITE_ID, datetime(2026, 4, 29, 9, 0)),
+            (old.id, EVENT_TYPE_WAYS_ID, datetime(2026, 4, 28, 15, 0)),
+            (old.id, EVENT_TYPE_SITE_ID, datetime(2026, 4, 30, 18, 0)),
+            (fresh.id, EVENT_TYPE_WAYS_ID, datetime(2026, 5, 1, 7, 0)),
+            (old.id, EVENT_TYPE_WAYS_ID, datetime(2026, 5, 1, 8, 0)),
+        ]
+        db.add_all(
+            models.Event(client_id=client_id, event_type_id=type_id, trigger_time=at)
+            for client_id, type_id, at in events
+        )
+        client_ids = [fresh.id, old.id]
+    try:
+        yield client_ids
+    finally:
+        await _clear_rollup()
+        async with session_maker.begin() as db:
+            await db.execute(
+                delete(models.Event).where(models.Event.client_id.in_(client_ids))
+            )
+            await db.execute(
+                delete(models.ClientId).where(models.ClientId.id.in_(client_ids))
+            )
+
+
+async def _stats(period_type: str, event_type_id=None, approximate=False):
+    async with session_maker() as db:
+        periods = await get_period_stats(
+            db, period_type, *WINDOW, event_type_id, approximate
+        )
+        aggregated = await get_aggregated_stats(
+            db, period_type, *WINDOW, event_type_id, approximate
+        )
+    return [item.model_dump() for item in periods], aggregated.model_dump()
+
+
+async def _raw_stats(monkeypatch, period_type: str, event_type_id=None):
+    with monkeypatch.context() as patch:
+        patch.setattr("app.handlers.get.rollup_split", AsyncMock(return_value=None))
+        return await _stats(period_type, event_type_id)
+
+
+CASES = [
+    (period_type, event_type_id)
+    for period_type in ("day", "month", "year")
+    for event_type_id in (None, EVENT_TYPE_WAYS_ID, EVENT_TYPE_SITE_ID)
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("period_type, event_type_id", CASES)
+async def test_rollup_matches_raw_events(
+    rollup_events, monkeypatch, period_type, event_type_id
+):
+    expected = await _raw_stats(monkeypatch, period_type, event_type_id)
+    async with session_maker() as db:
+        await refresh_daily_rollup(db, TODAY, max_days=1_000)
+        assert await rollup_split(db, *WINDOW) == datetime(2026, 5, 1)
+
+    assert await _stats(period_type, event_type_id) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("period_type, event_type_id", CASES)
+async def test_approximate_rollup_matches_small_windows(
+    rollup_events, monkeypatch, period_type, event_type_id
+):
+    # На единицах посетителей HyperLogLog считает точно (линейный подсчёт)
+    expected = await _raw_stats(monkeypatch, period_type, event_type_id)
+    async with session_maker() as db:
+        await refresh_daily_rollup(db, TODAY, max_days=1_000)
+
+    assert await _stats(period_type, event_type_id, approximate=True) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("period_type, scans", [("day", 0), ("month", 1)])
+async def test_period_stats_count_distinct_only_where_needed(
+    rollup_events, period_type, scans
+):
+    async with session_maker() as db:
+        await refresh_daily_rollup(db, TODAY, max_days=1_000)
+
+    distinct_scans = []
+
+    def record(conn, cursor, statement, *args):
+        if "DISTINCT" in statement:
+            distinct_scans.append(statement)
+
+    async with session_maker() as db:
+        engine = db.bind.sync_engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            await get_period_stats(db, period_type, *WINDOW)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+    # Дни целиком из сводки, месяцам нужен один сгруппированный проход
+    assert len(distinct_scans) == scans
+
+
+@pytest.mark.asyncio
+async def test_rollup_counts_all_event_types_once(rollup_events):
+    async with session_maker() as db:
+        await refresh_daily_rollup(db, TODAY, max_days=1_000)
+        row = await db.get(
+            models.DailyEventStats, (date(2026, 4, 28), ROLLUP_ALL_EVENT_TYPES)
+        )
+    assert (row.visits, row.visitors, row.new_visitors) == (3, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_late_event_recomputes_rolled_day(rollup_events, monkeypatch):
+    _fresh_id, old_id = rollup_events
+    async with session_maker() as db:
+        await refresh_daily_rollup(db, TODAY, max_days=1_000)
+
+    async with session_maker.begin() as db:
+        db.add(
+            models.Event(
+                client_id=old_id,
+                event_type_id=EVENT_TYPE_WAYS_ID,
+                trigger_time=datetime(2026, 4, 29, 20, 0),
+            )
+        )
+    async with session_maker() as db:
+        refresh = await refresh_daily_rollup(db, TODAY)
+    assert refresh.refreshed_days == [date(2026, 4, 29)]
+    assert refresh.rolled_days == []
+
+    expected = await _raw_stats(monkeypatch, "month")
+    assert await _stats("month") == expected
+
+
+@pytest.mark.asyncio
+async def test_refresh_rolls_limited_days_per_run(rollup_events):
+    async with session_maker() as db:
+        first = await refresh_daily_rollup(db, TODAY, max_days=2)
+        state = await db.get(models.StatsRollupState, DAILY_ROLLUP)
+        assert len(first.rolled_days) == 2
+        assert state.rolled_until == first.rolled_days[-1] + timedelta(days=1)
+        # Сводка отстаёт больше чем на ROLLUP_MAX_RAW_DAYS: окно целиком по events
+        assert await rollup_split(db, *WINDOW) is None
+
+        second = await refresh_daily_rollup(db, TODAY, max_days=2)
+    assert second.rolled_days[0] > first.rolled_days[-1]
+
+
+@pytest.mark.asyncio
+async def test_rollup_not_used_without_state_or_for_unaligned_start():
+    async with session_maker() as db:
+        assert await rollup_split(db, *WINDOW) is None
+        assert (
+            await db.execute(select(models.StatsRollupState))
+        ).scalar_one_or_none() is None
+        assert await rollup_split(db, datetime(2026, 4, 1, 12, 0), WINDOW[1]) is None
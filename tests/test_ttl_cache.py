@@ -0,0 +1,40 @@
+"""Tests for the in-process TTL/LRU cache helper."""
+
+from app.helpers.ttl_cache import TTLCache
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert [cache.get(key) for key in "abc"] == [(True, 1), (False, None), (True, 3)]
+
+
+def test_entries_expire():
+    cache = TTLCache(max_entries=10)
+    cache.put("open", 1, ttl_seconds=0)
+    cache.put("closed", 2)
+
+    assert cache.get("open") == (False, None)
+    assert cache.get("closed") == (True, 2)
+    assert len(cache) == 1
+
+
+def test_none_is_a_cached_value():
+    cache = TTLCache(max_entries=10)
+    cache.put("empty", None)
+    assert cache.get("empty") == (True, None)
+
+
+def test_evict_and_metrics():
+    cache = TTLCache(max_entries=10)
+    for key in range(4):
+        cache.put(key, str(key))
+    cache.get(0)
+    cache.get(10)
+
+    assert cache.evict(lambda key: key % 2 == 1) == 2
+    assert cache.metrics() == {"size": 2, "hits": 1, "misses": 1}
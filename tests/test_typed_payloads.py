@@ -0,0 +1,96 @@
+"""Tests for typed payload value columns."""
+
+from datetime import datetime, UTC
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from app import models
+from app.cli.db.backfill import _backfill_payload_values
+from app.constants import (
+    EVENT_TYPE_AUDS_ID,
+    PAYLOAD_TYPE_AUDITORY_ID,
+    PAYLOAD_TYPE_SUCCESS_ID,
+)
+from app.handlers.event import PendingEvent, insert_events, typed_payload_value
+
+from .base import session_maker
+
+
+def test_typed_payload_value_by_value_type():
+    assert typed_payload_value("int", "42") == (42, None)
+    assert typed_payload_value("int", "4x") == (None, None)
+    assert typed_payload_value("bool", "True") == (None, True)
+    assert typed_payload_value("bool", "0") == (None, False)
+    assert typed_payload_value("string", "1") == (None, None)
+
+
+async def _payload_values(event_id: int) -> dict[int, tuple]:
+    async with session_maker() as db:
+        rows = await db.execute(
+            select(
+                models.Payload.type_id,
+                models.Payload.value_int,
+                models.Payload.value_bool,
+            ).where(models.Payload.event_id == event_id)
+        )
+        return {row.type_id: (row.value_int, row.value_bool) for row in rows}
+
+
+async def _delete_event(event_id: int) -> None:
+    async with session_maker.begin() as db:
+        await db.execute(
+            delete(models.Payload).where(models.Payload.event_id == event_id)
+        )
+        await db.execute(delete(models.Event).where(models.Event.id == event_id))
+
+
+@pytest.mark.asyncio
+async def test_write_fills_typed_columns():
+    event = PendingEvent(
+        client_id=3,
+        event_type_id=EVENT_TYPE_AUDS_ID,
+        trigger_time=datetime.now(UTC),
+        payloads=[(PAYLOAD_TYPE_AUDITORY_ID, "a-1"), (PAYLOAD_TYPE_SUCCESS_ID, "true")],
+    )
+    async with session_maker() as db:
+        [event_id] = await insert_events(db, [event])
+    try:
+        assert await _payload_values(event_id) == {
+            PAYLOAD_TYPE_AUDITORY_ID: (None, None),
+            PAYLOAD_TYPE_SUCCESS_ID: (None, True),
+        }
+    finally:
+        await _delete_event(event_id)
+
+
+@pytest.mark.asyncio
+async def test_backfill_fills_rows_written_before_typed_columns():
+    trigger_time = datetime(2026, 5, 1, 12, 0)
+    async with session_maker.begin() as db:
+        event_id = (
+            await db.execute(
+                insert(models.Event)
+                .values(
+                    client_id=3,
+                    event_type_id=EVENT_TYPE_AUDS_ID,
+                    trigger_time=trigger_time,
+                )
+                .returning(models.Event.id)
+            )
+        ).scalar_one()
+        await db.execute(
+            insert(models.Payload).values(
+                event_id=event_id,
+                type_id=PAYLOAD_TYPE_SUCCESS_ID,
+                value="false",
+                trigger_time=trigger_time,
+            )
+        )
+    try:
+        assert await _backfill_payload_values(batch_size=2) >= 1
+        assert await _payload_values(event_id) == {
+            PAYLOAD_TYPE_SUCCESS_ID: (None, False)
+        }
+    finally:
+        await _delete_event(event_id)
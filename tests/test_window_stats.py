@@ -0,0 +1,109 @@
+"""Tests for shared-scan window statistics and the stats loader."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.constants import EVENT_TYPE_SITE_ID, EVENT_TYPE_WAYS_ID
+from app.graphql.core.loaders import StatsLoader, StatsRequest
+from app.handlers import get_aggregated_stats, get_period_stats
+from app.handlers.get import get_window_stats
+from app.handlers.rollup import refresh_daily_rollup
+
+from .base import session_maker
+from .test_stats_rollup import TODAY, WINDOW, rollup_events  # noqa: F401
+
+TYPE_IDS = (None, EVENT_TYPE_WAYS_ID, EVENT_TYPE_SITE_ID)
+
+
+async def _separate_stats(period_type: str) -> dict:
+    async with session_maker() as db:
+        return {
+            event_type_id: (
+                [
+                    item.model_dump()
+                    for item in await get_period_stats(
+                        db, period_type, *WINDOW, event_type_id
+                    )
+                ],
+                (
+                    await get_aggregated_stats(db, period_type, *WINDOW, event_type_id)
+                ).model_dump(),
+            )
+            for event_type_id in TYPE_IDS
+        }
+
+
+async def _window_stats(period_type: str) -> dict:
+    async with session_maker() as db:
+        by_type = await get_window_stats(db, period_type, *WINDOW, TYPE_IDS)
+    return {
+        event_type_id: (
+            [item.model_dump() for item in stats.periods],
+            stats.aggregated.model_dump(),
+        )
+        for event_type_id, stats in by_type.items()
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("period_type", ["day", "month", "year"])
+async def test_window_stats_match_separate_queries(rollup_events, period_type):  # noqa: F811
+    assert await _window_stats(period_type) == await _separate_stats(period_type)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("period_type", ["day", "month"])
+async def test_window_stats_match_separate_queries_over_rollup(
+    rollup_events,  # noqa: F811
+    period_type,
+):
+    async with session_maker() as db:
+        await refresh_daily_rollup(db, TODAY, max_days=1_000)
+    assert await _window_stats(period_type) == await _separate_stats(period_type)
+
+
+@pytest.mark.asyncio
+async def test_window_stats_single_type_without_all():
+    async with session_maker() as db:
+        by_type = await get_window_stats(db, "day", *WINDOW, [EVENT_TYPE_WAYS_ID])
+    assert list(by_type) == [EVENT_TYPE_WAYS_ID]
+
+
+@pytest.mark.asyncio
+async def test_loader_batches_fields_of_one_window(monkeypatch):
+    async with session_maker() as db:
+        spy = AsyncMock(wraps=get_window_stats)
+        monkeypatch.setattr("app.graphql.core.loaders.get_window_stats", spy)
+        loader = StatsLoader(db, asyncio.Lock())
+        results = await asyncio.gather(
+            *(
+                loader.load(StatsRequest("month", *WINDOW, event_type_id))
+                for event_type_id in TYPE_IDS
+            ),
+            loader.load(StatsRequest("day", *WINDOW, None)),
+        )
+
+    assert spy.await_count == 2
+    windows = {call.args[1] for call in spy.await_args_list}
+    assert windows == {"month", "day"}
+    month_call = next(c for c in spy.await_args_list if c.args[1] == "month")
+    assert month_call.args[4] == set(TYPE_IDS)
+    assert len(results) == 4
+
+
+@pytest.mark.asyncio
+async def test_loader_waits_for_the_session_lock():
+    lock = asyncio.Lock()
+    async with session_maker() as db:
+        loader = StatsLoader(db, lock)
+        # Соседний резолвер занял сессию: батч ждёт, а не шлёт запрос параллельно
+        async with lock:
+            load = asyncio.ensure_future(
+                loader.load(StatsRequest("day", *WINDOW, None))
+            )
+            await asyncio.sleep(0.05)
+            assert not load.done()
+        stats = await load
+    assert stats.periods is not None